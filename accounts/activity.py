@@ -0,0 +1,115 @@
+"""Compteurs d'activité par utilisateur (``UserActivity``).
+
+Articles, commentaires et sondages écrits, et votes reçus sur ses sondages :
+les signaux de ``accounts.signals`` les tiennent à jour par un
+``UPDATE ... SET n = n + delta`` dans la même transaction que l'écriture. Les
+chemins de masse sans signaux (``bulk_create`` du tampon de votes et des
+commentaires groupés de l'API, suppression par lots de ``accounts.deletion``)
+appellent ces fonctions directement. Une
+ligne absente est calculée à la lecture (``for_user``), une ligne douteuse
+recalculée par ``rebuild`` (commande ``rebuild_activity``).
+"""
+from collections import Counter
+
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+from blog.models import Article, Comment
+from polls.models import Ballot, Question, Vote
+from .models import UserActivity
+
+FIELDS = ('articles', 'comments', 'polls', 'votes_received')
+
+
+def bump(user_id, **deltas):
+    """Ajoute ``deltas`` aux compteurs de l'utilisateur.
+
+    Sans ligne, rien n'est fait : ``for_user`` la calculera en entier à la
+    lecture (la créer ici pourrait croiser la suppression en cours du compte).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or user_id is None:
+        return
+    UserActivity.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(),
+        # Borné à 0 sans passer par une valeur négative (colonnes UNSIGNED sur MySQL)
+        **{
+            field: Case(When(**{f'{field}__gte': -delta}, then=F(field) + delta), default=Value(0))
+            for field, delta in deltas.items()
+        },
+    )
+
+
+def add_votes(question_counts):
+    """``{question_id: votes}`` -> votes reçus par les auteurs de ces sondages"""
+    question_counts = {pk: n for pk, n in question_counts.items() if n}
+    if not question_counts:
+        return
+    received = Counter()
+    authors = Question.objects.filter(pk__in=list(question_counts)).values_list('pk', 'author_id')
+    for question_id, author_id in authors:
+        received[author_id] += question_counts[question_id]
+    for author_id, votes in received.items():
+        bump(author_id, votes_received=votes)
+
+
+def subtract(queryset, user_field, counter):
+    """Avant une suppression sans signaux : retire les lignes de ``queryset`` à chaque utilisateur"""
+    rows = queryset.order_by().values(user_field).annotate(n=Count('pk')).values_list(user_field, 'n')
+    for user_id, count in rows:
+        bump(user_id, **{counter: -count})
+
+
+def _counts(queryset, user_field, user_ids):
+    rows = queryset.filter(**{f'{user_field}__in': user_ids}).order_by().values(user_field)
+    return dict(rows.annotate(n=Count('pk')).values_list(user_field, 'n'))
+
+
+def rebuild(user_ids):
+    """Recalcule de zéro les compteurs de ces utilisateurs (une requête par compteur)"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    counts = {
+        'articles': _counts(Article.objects.all(), 'author_id', user_ids),
+        'comments': _counts(Comment.objects.all(), 'author_id', user_ids),
+        'polls': _counts(Question.objects.all(), 'author_id', user_ids),
+        'votes_received': Counter(_counts(Vote.objects.all(), 'question__author_id', user_ids))
+        + Counter(_counts(Ballot.objects.all(), 'question__author_id', user_ids)),
+    }
+    now = timezone.now()
+    rows = [
+        UserActivity(user_id=user_id, updated_at=now, **{field: counts[field].get(user_id, 0) for field in FIELDS})
+        for user_id in user_ids
+    ]
+    # Pas d'upsert ``update_conflicts`` : MySQL ne sait pas le cibler sur ``unique_fields``
+    existing = set(UserActivity.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    UserActivity.objects.bulk_update(
+        [row for row in rows if row.user_id in existing], [*FIELDS, 'updated_at'], batch_size=500
+    )
+    # Ligne créée entre-temps par une autre requête : conservée, le prochain rebuild la corrigera
+    UserActivity.objects.bulk_create([row for row in rows if row.user_id not in existing], ignore_conflicts=True)
+
+
+def rebuild_all(batch_size=1000):
+    """Recalcule tous les utilisateurs, par lots ; retourne leur nombre"""
+    from django.contrib.auth.models import User
+
+    total = 0
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while True:
+        batch = list(user_ids.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return total
+        rebuild(batch)
+        total += len(batch)
+        last = batch[-1]
+
+
+def for_user(user):
+    """Ligne d'activité de l'utilisateur, calculée si elle n'existe pas encore"""
+    try:
+        return UserActivity.objects.get(user=user)
+    except UserActivity.DoesNotExist:
+        rebuild([user.pk])
+        return UserActivity.objects.get(user=user)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PageView, DailyVisits
+from .models import PageView, DailyVisits, UserActivity
 
 # Register your models here.
 
@@ -24,3 +24,15 @@ class DailyVisitsAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # No permitir agregar manualmente
         return False
+
+
+@admin.register(UserActivity)
+class UserActivityAdmin(admin.ModelAdmin):
+    list_display = ['user', 'articles', 'comments', 'polls', 'votes_received', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'articles', 'comments', 'polls', 'votes_received', 'updated_at']
+    ordering = ['-votes_received']
+
+    def has_add_permission(self, request):
+        # Filas mantenidas por señales (accounts.activity)
+        return False
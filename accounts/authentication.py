@@ -0,0 +1,136 @@
+"""Authentification JWT de l'API sans requête ``auth_user`` à chaque appel.
+
+``JWTAuthentication`` recharge l'utilisateur depuis la base pour chaque requête.
+``CachedJWTAuthentication`` le cherche d'abord dans un LRU borné et à durée de
+vie limitée, propre au processus, puis (``JWT_USER_CACHE_SHARED``) dans le
+cache partagé, et seulement ensuite en base. Les signaux de ``accounts.signals``
+vident les deux niveaux dès qu'un utilisateur est modifié (profil, admin,
+groupes, permissions) ; les autres processus gardent au plus
+``JWT_USER_CACHE_TTL`` secondes leur copie locale.
+
+Avec ``JWT_STATELESS_READS``, les requêtes de lecture (GET, HEAD, OPTIONS)
+n'utilisent que les claims du jeton : ``request.user`` est un ``TokenUser``
+(id, pas de nom ni de droits) et ni le cache ni la base ne sont consultés.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_SIZE = getattr(settings, 'JWT_USER_CACHE_SIZE', 5000)
+USER_CACHE_TTL = getattr(settings, 'JWT_USER_CACHE_TTL', 60)
+USER_CACHE_SHARED = getattr(settings, 'JWT_USER_CACHE_SHARED', False)
+STATELESS_READS = getattr(settings, 'JWT_STATELESS_READS', False)
+
+
+class UserCache:
+    """LRU ``user_id -> (expiration, user)`` du processus, avec un niveau partagé optionnel"""
+
+    def __init__(self, maxsize, ttl, shared=False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def shared_key(self, user_id):
+        return f"accounts:jwt-user:{user_id}"
+
+    def get(self, user_id, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._users.move_to_end(user_id)
+                    return entry[1]
+                del self._users[user_id]
+        if self.shared:
+            user = cache.get(self.shared_key(user_id))
+            if user is not None:
+                self._store(user_id, user, now)
+                return user
+        return None
+
+    def set(self, user_id, user, now=None):
+        now = time.monotonic() if now is None else now
+        if self.shared:
+            cache.set(self.shared_key(user_id), user, self.ttl)
+        self._store(user_id, user, now)
+
+    def _store(self, user_id, user, now):
+        with self._lock:
+            self._users[user_id] = (now + self.ttl, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._users.pop(user_id, None)
+        if self.shared:
+            cache.delete_many([self.shared_key(user_id) for user_id in user_ids])
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def __len__(self):
+        return len(self._users)
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL, USER_CACHE_SHARED)
+
+
+def invalidate_user(*user_ids):
+    """Retire ces utilisateurs du cache (clés normalisées comme le claim ``user_id``)"""
+    user_cache.invalidate(*{str(user_id) for user_id in user_ids})
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` avec cache des utilisateurs, et lectures sans état en option"""
+
+    stateless_reads = STATELESS_READS
+
+    def authenticate(self, request):
+        self.stateless = self.stateless_reads and request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if getattr(self, 'stateless', False):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            # Utilisateur absent ou inactif : l'exception part avant la mise en cache
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        # Copie par requête : les caches de permissions posés sur l'objet ne fuient pas
+        return copy.copy(user)
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Même schéma OpenAPI (Bearer JWT) que ``JWTAuthentication``"""
+
+    target_class = CachedJWTAuthentication
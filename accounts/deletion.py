@@ -0,0 +1,149 @@
+"""Suppression par lots des sondages, articles et comptes utilisateurs.
+
+Le collector de Django charge en mémoire toutes les lignes liées avant de les
+supprimer. Ici les tables feuilles sans signal utile (votes, bulletins, choix,
+commentaires, index de recherche, articles liés) sont vidées de bas en haut,
+par tranches de clés primaires, avec un DELETE direct : l'équivalent d'un
+``ON DELETE CASCADE`` en base, que Django 5.2 ne sait pas déclarer. Les parents
+(articles, questions, utilisateur) sont ensuite supprimés par lots avec
+``QuerySet.delete()`` pour garder leurs signaux (flux, autocomplétion, cache
+des résultats) ; le collector n'a alors plus d'enfants à charger.
+
+Un compte dont la suppression dépasse ``DELETION_ASYNC_THRESHOLD`` lignes est
+désactivé tout de suite, puis supprimé dans un thread après la réponse.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from blog.models import Article, ArticleSearchTerm, ArticleSimilarityState, Comment, RelatedArticle
+from polls.models import Ballot, Choice, Question, Vote
+from .authentication import invalidate_user
+from . import activity
+from .models import PageView
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'DELETION_BATCH_SIZE', 1000)
+ASYNC_THRESHOLD = getattr(settings, 'DELETION_ASYNC_THRESHOLD', 20000)
+
+
+def pk_ranges(queryset, batch_size=BATCH_SIZE):
+    """Bornes ``(première, dernière)`` de tranches de ``batch_size`` clés primaires"""
+    last = None
+    while True:
+        page = queryset.order_by('pk')
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        pks = list(page.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last = pks[-1]
+
+
+def raw_delete(queryset, batch_size=BATCH_SIZE):
+    """DELETE direct par tranches, sans collector ni signaux : nombre de lignes supprimées"""
+    deleted = 0
+    for first, last in pk_ranges(queryset, batch_size):
+        with transaction.atomic():
+            deleted += queryset.filter(pk__gte=first, pk__lte=last)._raw_delete(queryset.db)
+    return deleted
+
+
+def batch_delete(queryset, batch_size=BATCH_SIZE):
+    """``QuerySet.delete()`` par tranches : signaux conservés, mémoire bornée"""
+    deleted = 0
+    for first, last in pk_ranges(queryset, batch_size):
+        with transaction.atomic():
+            deleted += queryset.filter(pk__gte=first, pk__lte=last).delete()[0]
+    return deleted
+
+
+def nullify(queryset, field, batch_size=BATCH_SIZE):
+    """``SET NULL`` par tranches (votes, visites...) au lieu d'une mise à jour par objet"""
+    updated = 0
+    for first, last in pk_ranges(queryset, batch_size):
+        updated += queryset.filter(pk__gte=first, pk__lte=last).update(**{field: None})
+    return updated
+
+
+def delete_questions(questions, batch_size=BATCH_SIZE):
+    """Supprime les questions et leurs votes, bulletins et choix, de bas en haut"""
+    votes = Vote.objects.filter(question__in=questions)
+    ballots = Ballot.objects.filter(question__in=questions)
+    # Le DELETE direct ne passe pas par les signaux : compteurs d'activité d'abord
+    activity.subtract(votes, 'question__author_id', 'votes_received')
+    activity.subtract(ballots, 'question__author_id', 'votes_received')
+    raw_delete(votes, batch_size)
+    raw_delete(ballots, batch_size)
+    raw_delete(Choice.objects.filter(question__in=questions), batch_size)
+    return batch_delete(questions, batch_size)
+
+
+def delete_articles(articles, batch_size=BATCH_SIZE):
+    """Supprime les articles, leurs commentaires et leurs index, de bas en haut"""
+    raw_delete(RelatedArticle.objects.filter(Q(article__in=articles) | Q(related__in=articles)), batch_size)
+    raw_delete(ArticleSimilarityState.objects.filter(article__in=articles), batch_size)
+    raw_delete(ArticleSearchTerm.objects.filter(article__in=articles), batch_size)
+    comments = Comment.objects.filter(article__in=articles)
+    activity.subtract(comments, 'author_id', 'comments')
+    raw_delete(comments, batch_size)
+    return batch_delete(articles, batch_size)
+
+
+def delete_user(user_id, batch_size=BATCH_SIZE):
+    """Supprime un compte et tout son contenu ; ses votes et visites restent, anonymisés"""
+    delete_articles(Article.objects.filter(author_id=user_id), batch_size)
+    delete_questions(Question.objects.filter(author_id=user_id), batch_size)
+    raw_delete(Comment.objects.filter(author_id=user_id), batch_size)
+    nullify(Vote.objects.filter(user_id=user_id), 'user', batch_size)
+    nullify(Ballot.objects.filter(user_id=user_id), 'user', batch_size)
+    nullify(PageView.objects.filter(user_id=user_id), 'user', batch_size)
+    # Restent les groupes, permissions et entrées du journal d'admin : peu de lignes
+    User.objects.filter(pk=user_id).delete()
+
+
+def deletion_size(user_id):
+    """Estimation du nombre de lignes à supprimer pour ce compte"""
+    return (
+        Article.objects.filter(author_id=user_id).count()
+        + Comment.objects.filter(Q(author_id=user_id) | Q(article__author_id=user_id)).count()
+        + Choice.objects.filter(question__author_id=user_id).count()
+        + Vote.objects.filter(question__author_id=user_id).count()
+        + Ballot.objects.filter(question__author_id=user_id).count()
+    )
+
+
+def _delete_in_background(user_id):
+    def run():
+        try:
+            delete_user(user_id)
+        except Exception:
+            logger.exception(
+                "Suppression du compte %s interrompue : relancer manage.py delete_users %s", user_id, user_id
+            )
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name=f'delete-user-{user_id}', daemon=True).start()
+
+
+def remove_account(user):
+    """Supprime le compte : tout de suite s'il est petit, sinon en arrière-plan.
+
+    Retourne True si la suppression continue en arrière-plan.
+    """
+    if deletion_size(user.pk) < ASYNC_THRESHOLD:
+        delete_user(user.pk)
+        return False
+    # Le compte est fermé tout de suite, les données suivent après la réponse
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    # update() ne déclenche pas post_save : l'API ne doit plus accepter ses jetons
+    invalidate_user(user.pk)
+    user_id = user.pk
+    transaction.on_commit(lambda: _delete_in_background(user_id))
+    return True
@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+PATHS = ['/', '/polls/']
+
+
+class Command(BaseCommand):
+    help = 'Compara las consultas por petición de cada backend de sesión, anónimo y conectado (todo se revierte al final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Peticiones medidas por backend y tipo de visitante')
+        parser.add_argument(
+            '--backends', nargs='+', default=list(settings.SESSION_ENGINES),
+            choices=list(settings.SESSION_ENGINES), help='Backends comparados',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'backend':<16} {'visitante':<10} {'consultas/pet.':>15} {'sesión/pet.':>12} {'ms (mediana)':>13}"
+        )
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark_sessions_user')
+            for backend in options['backends']:
+                # 'testserver' para el cliente de pruebas ; otra IP que INTERNAL_IPS, sin debug toolbar
+                with override_settings(
+                    SESSION_ENGINE=settings.SESSION_ENGINES[backend],
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    for label, logged_in in (('anónimo', False), ('conectado', True)):
+                        client = Client(REMOTE_ADDR='10.0.0.1')
+                        if logged_in:
+                            client.force_login(user)
+                        queries, session_queries, ms = self._measure(client, options['requests'])
+                        self.stdout.write(
+                            f"{backend:<16} {label:<10} {queries:>15.2f} {session_queries:>12.2f} {ms:>13.2f}"
+                        )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('✓ Datos de prueba revertidos'))
+
+    def _measure(self, client, count):
+        # Primera página: cookies de visita y sesión ya puestas, como un visitante que navega
+        for path in PATHS:
+            client.get(path)
+        timings = []
+        with CaptureQueriesContext(connection) as ctx:
+            for index in range(count):
+                started = time.perf_counter()
+                client.get(PATHS[index % len(PATHS)])
+                timings.append((time.perf_counter() - started) * 1000)
+        session_queries = sum('django_session' in query['sql'] for query in ctx.captured_queries)
+        # Mediana: insensible a las pausas aisladas (GC, DNS de la debug toolbar)
+        return len(ctx.captured_queries) / count, session_queries / count, sorted(timings)[count // 2]
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from accounts.deletion import raw_delete
 from accounts.models import PageView, DailyVisits
 
 
@@ -26,9 +27,9 @@ class Command(BaseCommand):
         pageviews_count = PageView.objects.count()
         daily_count = DailyVisits.objects.count()
 
-        # Eliminar todos los registros
-        PageView.objects.all().delete()
-        DailyVisits.objects.all().delete()
+        # Eliminar todos los registros, por lotes y sin cargarlos en memoria
+        raw_delete(PageView.objects.all())
+        raw_delete(DailyVisits.objects.all())
 
         self.stdout.write(
             self.style.SUCCESS(
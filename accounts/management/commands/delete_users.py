@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from accounts.deletion import delete_user
+
+
+class Command(BaseCommand):
+    help = 'Elimina usuarios y todo su contenido por lotes (o termina una eliminación interrumpida)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='+', help='IDs o nombres de usuario')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for value in options['users']:
+            lookup = {'pk': int(value)} if value.isdigit() else {'username': value}
+            user_id = User.objects.filter(**lookup).values_list('pk', flat=True).first()
+            if user_id is None:
+                raise CommandError(f'Usuario no encontrado: {value}')
+            delete_user(user_id, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Usuario {value} eliminado'))
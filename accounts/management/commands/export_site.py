@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from accounts.site_data import SITE_MODELS, export_site
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta usuarios, artículos, comentarios, sondeos y visitas en NDJSON comprimido '
+        '(un fichero por modelo, lectura por chunks)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directorio de destino')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Número de filas leídas por consulta',
+        )
+
+    def handle(self, *args, **options):
+        manifest = export_site(
+            options['directory'],
+            chunk_size=options['chunk_size'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {sum(manifest.values())} objetos exportados ({len(SITE_MODELS)} modelos) '
+                f'en {options["directory"]}\n'
+                f'✓ En producción ejecuta: python manage.py import_site {options["directory"]}'
+            )
+        )
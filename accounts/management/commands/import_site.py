@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts import activity
+from accounts.site_data import MANIFEST_FILE, SiteImporter
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa un export de export_site con bulk_create por lotes. '
+        'Si se interrumpe, vuelve a ejecutarlo: retoma desde el último lote validado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directorio generado por export_site')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Número de objetos insertados por transacción',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            raise CommandError(f'{directory} no contiene un export válido ({MANIFEST_FILE} no encontrado)')
+
+        skipped = SiteImporter(directory, batch_size=options['batch_size'], log=self.stdout.write).run()
+        for label, count in skipped.items():
+            self.stdout.write(self.style.WARNING(f'⚠ {label}: {count} filas rechazadas por la base de datos'))
+        # bulk_create no envía señales: contadores de actividad recalculados al final
+        activity.rebuild_all(options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS('✓ Importación terminada'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from accounts import activity
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de actividad (UserActivity) de todos los usuarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Usuarios recalculados por lote')
+
+    def handle(self, *args, **options):
+        total = activity.rebuild_all(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Actividad recalculada para {total} usuarios'))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.utils import timezone
 from django.db.models import F
@@ -20,13 +21,8 @@ class PageViewMiddleware(MiddlewareMixin):
     """Middleware para trackear todas las visitas a páginas"""
     
     def process_request(self, request):
-        # Obtener información de la request
         url = request.get_full_path()
-        ip_address = get_client_ip(request)
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        user = request.user if request.user.is_authenticated else None
-        session_key = request.session.session_key or ''
-        
+
         # Excluir URLs administrativas y estáticas
         excluded_urls = [
             '/admin/',
@@ -35,11 +31,24 @@ class PageViewMiddleware(MiddlewareMixin):
             '/favicon.ico',
             '/api/',
             '/__debug__/',
+            '/feeds/',
+            '/sitemap.xml',
         ]
         
         # No trackear si es una URL excluida
         if any(url.startswith(excluded) for excluded in excluded_urls):
             return None
+
+        # Obtener información de la request (después del filtro: ni sesión ni usuario para las URLs excluidas)
+        ip_address = get_client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        # Sin cookie de sesión no hay usuario: ni request.user ni request.session se cargan
+        if settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_authenticated:
+            user = request.user
+            session_key = request.session.session_key or ''
+        else:
+            user = None
+            session_key = ''
             
         # Sistema de tracking mejorado
         try:
@@ -30,3 +30,19 @@ class DailyVisits(models.Model):
         
     def __str__(self):
         return f"{self.date} - {self.total_visits} visitas"
+
+
+class UserActivity(models.Model):
+    """Contadores por usuario, mantenidos por señales (accounts.activity)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='activity')
+    articles = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    polls = models.PositiveIntegerField(default=0)
+    votes_received = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'user activities'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.articles} artículos, {self.polls} encuestas"
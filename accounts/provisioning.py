@@ -0,0 +1,135 @@
+"""Création en masse de comptes depuis un CSV ou un NDJSON.
+
+Le hachage PBKDF2 d'un mot de passe coûte volontairement cher (plusieurs
+dizaines de millisecondes) : pour des milliers de comptes, c'est lui qui domine,
+pas la base. Les mots de passe d'un lot sont donc hachés en parallèle par un
+pool de processus, puis le lot est inséré en un ``bulk_create``. Les usernames
+déjà pris sont écartés avant le hachage, par une seule requête par lot.
+"""
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_records(path):
+    """Lignes du fichier en dicts : CSV avec en-tête, ou NDJSON (``.ndjson``, ``.jsonl``)"""
+    name = path[:-3] if path.endswith('.gz') else path
+    with _open(path) as source:
+        if name.endswith(('.ndjson', '.jsonl')):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(source)
+
+
+def iter_batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker():
+    # Avec ``spawn`` (macOS, Windows) le processus fils doit charger les settings
+    django.setup()
+
+
+def _hash(password):
+    # Sans mot de passe : compte inutilisable jusqu'à la réinitialisation
+    return make_password(password or None)
+
+
+class Provisioner:
+    """Crée les comptes lot par lot ; ``stats`` cumule les compteurs et les durées"""
+
+    def __init__(self, batch_size=500, workers=None, log=None):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.log = log or (lambda message: None)
+        self.stats = {'created': 0, 'existing': 0, 'invalid': 0, 'hashing': 0.0, 'inserting': 0.0}
+
+    def run(self, records):
+        started = time.perf_counter()
+        if self.workers == 1:
+            self._run(records, map)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+                self._run(records, lambda hash_, passwords: pool.map(
+                    hash_, passwords, chunksize=max(1, len(passwords) // (self.workers * 4))
+                ))
+        self.stats['elapsed'] = time.perf_counter() - started
+        return self.stats
+
+    def _run(self, records, hash_map):
+        seen = set()
+        for batch in iter_batches(records, self.batch_size):
+            batch = self._clean(batch, seen)
+            if not batch:
+                continue
+            existing = set(
+                User.objects.filter(username__in=[record['username'] for record in batch])
+                .values_list('username', flat=True)
+            )
+            batch = [record for record in batch if record['username'] not in existing]
+            self.stats['existing'] += len(existing)
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            passwords = [record.get('password') or '' for record in batch]
+            hashes = list(hash_map(_hash, passwords))
+            self.stats['hashing'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            users = [self._user(record, hashed) for record, hashed in zip(batch, hashes)]
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            self.stats['inserting'] += time.perf_counter() - started
+            self.stats['created'] += len(users)
+            self.log(f"{self.stats['created']} comptes créés")
+
+    def _user(self, record, hashed):
+        # Mêmes normalisations que ``create_user``
+        values = {field: (record.get(field) or '').strip() for field in FIELDS}
+        values['email'] = User.objects.normalize_email(values['email'])
+        return User(password=hashed, **values)
+
+    def _clean(self, batch, seen):
+        """Usernames valides et uniques dans le fichier ; les autres sont comptés invalides"""
+        field = User._meta.get_field('username')
+        valid = []
+        for record in batch:
+            username = User.normalize_username((record.get('username') or '').strip())
+            try:
+                field.clean(username, None)
+            except ValidationError:
+                self.stats['invalid'] += 1
+                continue
+            if username in seen:
+                self.stats['invalid'] += 1
+                continue
+            seen.add(username)
+            valid.append({**record, 'username': username})
+        return valid
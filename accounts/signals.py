@@ -0,0 +1,82 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from blog.models import Article, Comment
+from polls.models import Ballot, Choice, Question, Vote
+from .authentication import invalidate_user
+from . import activity
+
+
+def _invalidate(*user_ids):
+    # Tout de suite, puis après le commit : une requête API concurrente a pu remettre
+    # en cache l'utilisateur d'avant la transaction
+    invalidate_user(*user_ids)
+    transaction.on_commit(lambda: invalidate_user(*user_ids), robust=True)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Profil (edit_profile_view), mot de passe, admin, désactivation ou suppression
+    _invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_rights_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            _invalidate(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        # Côté groupe ou permission : les membres ajoutés ou retirés
+        _invalidate(*pk_set)
+    elif action == 'pre_clear':
+        # Le clear côté groupe ne donne pas les membres : on les lit avant
+        _invalidate(*instance.user_set.values_list('pk', flat=True))
+
+
+# Compteurs d'activité (accounts.activity) : même transaction que l'écriture
+COUNTERS = {Article: 'articles', Comment: 'comments', Question: 'polls'}
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Question)
+def content_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        activity.bump(instance.author_id, **{COUNTERS[sender]: 1})
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Question)
+def content_deleted(sender, instance, **kwargs):
+    activity.bump(instance.author_id, **{COUNTERS[sender]: -1})
+
+
+@receiver(pre_delete, sender=Question)
+def question_votes_deleted(sender, instance, **kwargs):
+    # Les votes partent en cascade sans signal : on les retire avant, une requête
+    ledger = Ballot if instance.is_ranked else Vote
+    activity.bump(instance.author_id, votes_received=-ledger.objects.filter(question_id=instance.pk).count())
+
+
+@receiver(pre_delete, sender=Choice)
+def choice_votes_deleted(sender, instance, origin=None, **kwargs):
+    # Choix supprimé seul (reconcile_choices, API) : ses votes partent aussi en cascade.
+    # Depuis sa question, question_votes_deleted les a déjà retirés
+    if isinstance(origin, Question) or getattr(origin, 'model', None) is Question:
+        return
+    author = Question.objects.filter(pk=instance.question_id).values('author_id')
+    activity.bump(Subquery(author), votes_received=-Vote.objects.filter(choice_id=instance.pk).count())
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_save, sender=Ballot)
+def vote_received(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        # Un seul UPDATE : l'auteur est lu par sous-requête
+        author = Question.objects.filter(pk=instance.question_id).values('author_id')
+        activity.bump(Subquery(author), votes_received=1)
@@ -0,0 +1,268 @@
+"""Export / import du site en NDJSON compressé, modèle par modèle.
+
+Chaque modèle est écrit dans ``<app_label>.<model>.ndjson.gz`` (une ligne JSON
+par objet, valeurs des champs concrets par ``attname``) en lisant la base par
+chunks, donc la mémoire reste bornée quelle que soit la taille du site. Tous
+les modèles sont lus dans une même transaction REPEATABLE READ : les écritures
+concurrentes n'apparaissent pas en cours d'export (pas de FK orphelines).
+
+À l'import, les clés primaires sont décalées de l'``offset`` (pk max existant
+au début de l'import du modèle) : le remapping des FK est donc arithmétique et
+déterministe, ce qui rend l'import reprenable sans table de correspondance.
+Seuls les utilisateurs déjà présents (même username) ont une correspondance
+explicite. Les lignes refusées par la base (conflit d'unicité, ou FK absente
+avec ``INSERT IGNORE`` sur MySQL) sont comptées et signalées, pas perdues en silence.
+"""
+import datetime
+import gzip
+import json
+import os
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max
+
+# Ordre d'export / import : les parents avant les enfants
+SITE_MODELS = [
+    'auth.User',
+    'blog.Article',
+    'blog.Comment',
+    'polls.Question',
+    'polls.Choice',
+    'polls.Vote',
+    'accounts.PageView',
+    'accounts.DailyVisits',
+]
+
+STATE_FILE = 'import_state.json'
+MANIFEST_FILE = 'manifest.json'
+
+
+class SiteJSONEncoder(DjangoJSONEncoder):
+    """Comme DjangoJSONEncoder mais sans tronquer les microsecondes"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def data_filename(label):
+    return f"{label.lower()}.ndjson.gz"
+
+
+def export_model(model, directory, chunk_size=2000):
+    """Écrit toutes les lignes du modèle et retourne le nombre d'objets exportés"""
+    fields = model._meta.concrete_fields
+    attnames = [field.attname for field in fields]
+    path = os.path.join(directory, data_filename(model._meta.label))
+
+    count = 0
+    queryset = model._base_manager.order_by('pk').values_list(*attnames)
+    with gzip.open(path, 'wt', encoding='utf-8') as output:
+        for row in queryset.iterator(chunk_size=chunk_size):
+            record = {
+                field.attname: field.get_prep_value(value) if value is not None else None
+                for field, value in zip(fields, row)
+            }
+            output.write(json.dumps(record, cls=SiteJSONEncoder, ensure_ascii=False))
+            output.write('\n')
+            count += 1
+    return count
+
+
+@contextmanager
+def snapshot():
+    """Transaction dont toutes les lectures voient la base au même instant"""
+    starts_transaction = not connection.in_atomic_block
+    with transaction.atomic():
+        # Django ouvre MySQL en READ COMMITTED : chaque requête verrait les derniers commits.
+        # Première instruction de la transaction, donc autorisée (SQLite : déjà isolé).
+        if starts_transaction and connection.vendor in ('mysql', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+def export_site(directory, chunk_size=2000, log=None):
+    os.makedirs(directory, exist_ok=True)
+    manifest = {}
+    with snapshot():
+        for label in SITE_MODELS:
+            manifest[label] = export_model(apps.get_model(label), directory, chunk_size)
+            if log:
+                log(f"{label}: {manifest[label]} objets")
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as output:
+        json.dump(manifest, output, indent=2)
+    return manifest
+
+
+def iter_batches(path, batch_size, skip=0):
+    """Lit le fichier NDJSON par lots, en sautant les ``skip`` premières lignes"""
+    batch = []
+    with gzip.open(path, 'rt', encoding='utf-8') as source:
+        for index, line in enumerate(source):
+            if index < skip:
+                continue
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def preserve_auto_dates(model):
+    """Désactive auto_now/auto_now_add pour garder les dates exportées"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SiteImporter:
+    """Import reprenable : l'état est sauvegardé après chaque lot validé"""
+
+    def __init__(self, directory, batch_size=1000, log=None):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as source:
+                return json.load(source)
+        return {'offsets': {}, 'done': {}, 'completed': [], 'pk_map': {}, 'skipped': {}}
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as output:
+            json.dump(self.state, output)
+        os.replace(tmp_path, self.state_path)
+
+    def map_pk(self, label, old_pk):
+        if old_pk is None:
+            return None
+        explicit = self.state['pk_map'].get(label, {}).get(str(old_pk))
+        if explicit is not None:
+            return explicit
+        return old_pk + self.state['offsets'].get(label, 0)
+
+    def map_voter_id(self, voter_id):
+        """``user:<pk>`` désigne l'ancien utilisateur : remappé comme la FK ``user``"""
+        kind, _, old_pk = voter_id.partition(':')
+        if kind != 'user' or not old_pk.isdigit():
+            return voter_id
+        return f"user:{self.map_pk('auth.User', int(old_pk))}"
+
+    def run(self):
+        """Importe tous les modèles ; retourne ``{label: lignes refusées}``"""
+        for label in SITE_MODELS:
+            if label in self.state['completed']:
+                self.log(f"{label}: déjà importé")
+                continue
+            path = os.path.join(self.directory, data_filename(label))
+            if not os.path.exists(path):
+                continue
+            imported = self.import_model(apps.get_model(label), path)
+            self.state['completed'].append(label)
+            self._save_state()
+            self.log(f"{label}: {imported} objets importés")
+        self._reset_sequences()
+        os.remove(self.state_path)
+        return {label: count for label, count in self.state.get('skipped', {}).items() if count}
+
+    def import_model(self, model, path):
+        label = model._meta.label
+        if label not in self.state['offsets']:
+            max_pk = model._base_manager.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+            self.state['offsets'][label] = max_pk
+            self._save_state()
+
+        imported = 0
+        skip = self.state['done'].get(label, 0)
+        for batch in iter_batches(path, self.batch_size, skip=skip):
+            with transaction.atomic():
+                imported += self._import_batch(model, batch)
+            self.state['done'][label] = skip = skip + len(batch)
+            self._save_state()
+        return imported
+
+    def _import_batch(self, model, batch):
+        label = model._meta.label
+        if label == 'auth.User':
+            batch = self._match_existing_users(batch)
+
+        objects = []
+        for record in batch:
+            values = {}
+            for field in model._meta.concrete_fields:
+                value = record.get(field.attname)
+                if field.primary_key:
+                    value = self.map_pk(label, value)
+                elif field.is_relation and field.related_model._meta.label in SITE_MODELS:
+                    value = self.map_pk(field.related_model._meta.label, value)
+                values[field.attname] = field.to_python(value) if value is not None else None
+            if label == 'polls.Vote':
+                values['voter_id'] = self.map_voter_id(values['voter_id'])
+            objects.append(model(**values))
+
+        # Idempotence : un lot déjà validé avant une interruption n'est pas réinséré
+        existing = set(
+            model._base_manager.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True)
+        )
+        objects = [obj for obj in objects if obj.pk not in existing]
+        ignore_conflicts = any(field.unique and not field.primary_key for field in model._meta.concrete_fields)
+        with preserve_auto_dates(model):
+            model._base_manager.bulk_create(objects, batch_size=self.batch_size, ignore_conflicts=ignore_conflicts)
+        if not ignore_conflicts:
+            return len(objects)
+
+        # Lignes ignorées par la base : relues pour être signalées
+        inserted = set(
+            model._base_manager.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True)
+        )
+        skipped = len(objects) - len(inserted)
+        if skipped:
+            skipped_state = self.state.setdefault('skipped', {})
+            skipped_state[label] = skipped_state.get(label, 0) + skipped
+            self.log(f"{label}: {skipped} lignes refusées (conflit d'unicité ou clé étrangère absente)")
+        return len(inserted)
+
+    def _match_existing_users(self, batch):
+        """Les usernames déjà présents sont réutilisés au lieu d'être recréés"""
+        User = apps.get_model('auth.User')
+        existing = dict(
+            User.objects.filter(username__in=[record['username'] for record in batch])
+            .values_list('username', 'pk')
+        )
+        pk_map = self.state['pk_map'].setdefault('auth.User', {})
+        remaining = []
+        for record in batch:
+            if record['username'] in existing:
+                pk_map[str(record['id'])] = existing[record['username']]
+            else:
+                remaining.append(record)
+        return remaining
+
+    def _reset_sequences(self):
+        models = [apps.get_model(label) for label in SITE_MODELS]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
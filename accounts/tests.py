@@ -592,3 +592,661 @@ class AccountsIntegrationTest(TestCase):
         })
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'form')
+
+
+class SiteExportImportTest(TestCase):
+    """Tests pour les commandes export_site / import_site"""
+
+    def setUp(self):
+        import tempfile
+        from blog.models import Article, Comment
+        from polls.models import Question, Choice
+
+        self.directory = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username='exportuser', password='testpass123')
+        self.article = Article.objects.create(title='Exported', content='Content', author=self.user)
+        self.comment = Comment.objects.create(article=self.article, author=self.user, content='Nice')
+        self.question = Question.objects.create(question_text='Exported?', author=self.user)
+        Choice.objects.create(question=self.question, choice_text='Yes', votes=3)
+
+    def _export(self):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('export_site', self.directory, chunk_size=1, stdout=StringIO())
+
+    def test_export_import_remaps_foreign_keys(self):
+        """Test que l'import remappe les FK et réutilise les utilisateurs existants"""
+        from io import StringIO
+        from django.core.management import call_command
+        from blog.models import Article, Comment
+        from polls.models import Choice
+
+        self._export()
+        call_command('import_site', self.directory, batch_size=1, stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(username='exportuser').count(), 1)
+        self.assertEqual(Article.objects.filter(title='Exported').count(), 2)
+        imported = Article.objects.filter(title='Exported').exclude(pk=self.article.pk).get()
+        self.assertEqual(imported.author, self.user)
+        self.assertEqual(imported.created_at, self.article.created_at)
+        self.assertEqual(Comment.objects.get(article=imported).content, 'Nice')
+        self.assertEqual(Choice.objects.exclude(question=self.question).get().votes, 3)
+
+    def test_imported_votes_keep_their_voter(self):
+        """Test que ``user:<pk>`` suit le remappage des utilisateurs : pas de second vote après import"""
+        from io import StringIO
+        from django.core.management import call_command
+        from polls.models import Question, Vote
+
+        voter = User.objects.create_user(username='voter', password='testpass123')
+        self.client.force_login(voter)
+        self.client.post(reverse('polls:vote', args=[self.question.id]), {'choice': self.question.choice_set.get().id})
+        self._export()
+        # L'utilisateur importé ne correspond à aucun existant : nouvelle clé (décalée)
+        User.objects.filter(pk=voter.pk).update(username='voter-old')
+        call_command('import_site', self.directory, stdout=StringIO())
+
+        imported_voter = User.objects.get(username='voter')
+        self.assertNotEqual(imported_voter.pk, voter.pk)
+        imported = Question.objects.exclude(pk=self.question.pk).get()
+        vote = Vote.objects.get(question=imported)
+        self.assertEqual((vote.user, vote.voter_id), (imported_voter, f'user:{imported_voter.pk}'))
+
+        self.client.force_login(imported_voter)
+        response = self.client.post(reverse('polls:vote', args=[imported.id]), {'choice': imported.choice_set.get().id})
+        self.assertContains(response, 'Vous avez déjà voté')
+        self.assertEqual(Vote.objects.filter(question=imported).count(), 1)
+
+    def test_import_resumes_after_failure(self):
+        """Test qu'un import interrompu reprend sans doublons"""
+        from io import StringIO
+        from django.core.management import call_command
+        from accounts.site_data import SiteImporter
+        from blog.models import Comment
+
+        self._export()
+        original = SiteImporter._import_batch
+        calls = []
+
+        def failing_batch(importer, model, batch):
+            if model._meta.label == 'blog.Comment':
+                raise RuntimeError('coupure')
+            calls.append(model._meta.label)
+            return original(importer, model, batch)
+
+        with patch.object(SiteImporter, '_import_batch', failing_batch):
+            with self.assertRaises(RuntimeError):
+                call_command('import_site', self.directory, stdout=StringIO())
+
+        call_command('import_site', self.directory, stdout=StringIO())
+
+        self.assertIn('blog.Article', calls)
+        self.assertEqual(Comment.objects.count(), 2)
+        from blog.models import Article
+        self.assertEqual(Article.objects.count(), 2)
+
+    def test_import_reports_rejected_rows(self):
+        """Test que les lignes refusées par la base sont comptées et signalées"""
+        import datetime
+        from io import StringIO
+        from django.core.management import call_command
+        from accounts.models import DailyVisits
+
+        DailyVisits.objects.create(date=datetime.date(2026, 1, 1), total_visits=5)
+        DailyVisits.objects.create(date=datetime.date(2026, 1, 2), total_visits=7)
+        self._export()
+        DailyVisits.objects.filter(date=datetime.date(2026, 1, 2)).delete()
+
+        output = StringIO()
+        call_command('import_site', self.directory, stdout=output)
+
+        self.assertIn('accounts.DailyVisits: 1 filas rechazadas', output.getvalue())
+        self.assertEqual(DailyVisits.objects.count(), 2)
+
+    def test_export_reads_a_single_snapshot(self):
+        """Test que l'export lit tous les modèles dans une transaction REPEATABLE READ"""
+        from contextlib import nullcontext
+        from unittest import mock
+        from accounts import site_data
+
+        connection = mock.MagicMock(in_atomic_block=False, vendor='mysql')
+        with mock.patch.object(site_data, 'connection', connection), \
+                mock.patch.object(site_data.transaction, 'atomic', return_value=nullcontext()) as atomic, \
+                mock.patch.object(site_data, 'export_model', return_value=0):
+            site_data.export_site(self.directory)
+
+        atomic.assert_called_once_with()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+
+
+class BatchedDeletionTest(TestCase):
+    """Tests de la suppression par lots (accounts.deletion)"""
+
+    def setUp(self):
+        from blog.models import Article, Comment
+        from polls.models import Choice, Question, Vote
+
+        self.user = User.objects.create_user(username='leaving', password='testpass123')
+        self.other = User.objects.create_user(username='staying', password='testpass123')
+        self.article = Article.objects.create(title='Adieu', content='Contenu', author=self.user)
+        self.other_article = Article.objects.create(title='Reste', content='Contenu', author=self.other)
+        Comment.objects.create(article=self.article, author=self.other, content='Sur mon article')
+        Comment.objects.create(article=self.other_article, author=self.user, content='Ailleurs')
+        self.question = Question.objects.create(question_text='Partir ?', author=self.user)
+        choices = [Choice.objects.create(question=self.question, choice_text=str(i)) for i in range(5)]
+        for i in range(7):
+            Vote.objects.create(question=self.question, choice=choices[i % 5], voter_id=f'visitor:{i}')
+        self.other_question = Question.objects.create(question_text='Rester ?', author=self.other)
+        other_choice = Choice.objects.create(question=self.other_question, choice_text='Oui')
+        self.user_vote = Vote.objects.create(
+            question=self.other_question, choice=other_choice, user=self.user, voter_id=f'user:{self.user.pk}'
+        )
+
+    def test_delete_user_bottom_up_in_ranges(self):
+        """Test de la suppression d'un compte : contenu supprimé, votes ailleurs anonymisés"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.deletion import delete_user
+        from blog.models import Article, Comment
+        from polls.models import Choice, Question, Vote
+
+        with CaptureQueriesContext(connection) as ctx:
+            delete_user(self.user.pk, batch_size=3)
+
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(list(Article.objects.values_list('title', flat=True)), ['Reste'])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(list(Question.objects.all()), [self.other_question])
+        self.assertEqual(Choice.objects.count(), 1)
+        self.user_vote.refresh_from_db()
+        self.assertIsNone(self.user_vote.user)
+        self.assertEqual(Vote.objects.count(), 1)
+
+        # 7 votes par tranches de 3 : trois DELETE sur des plages de clés
+        vote_deletes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('DELETE FROM "polls_vote"') and '"polls_vote"."id" >=' in q['sql']
+        ]
+        self.assertEqual(len(vote_deletes), 3)
+
+    def test_delete_poll_view_keeps_signals(self):
+        """Test de la vue de suppression : votes supprimés, cache des résultats invalidé"""
+        from django.core.cache import cache
+        from polls import results
+        from polls.models import Choice, Vote
+
+        results.get_results(self.question.pk)
+        self.client.login(username='leaving', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('polls:delete_poll', args=[self.question.pk]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Vote.objects.filter(question_id=self.question.pk).exists())
+        self.assertFalse(Choice.objects.filter(question_id=self.question.pk).exists())
+        self.assertIsNone(cache.get(results.cache_key(self.question.pk)))
+
+    def test_large_account_finishes_in_background(self):
+        """Test du compte volumineux : désactivé tout de suite, supprimé après la réponse"""
+        from blog.models import Article
+
+        started = []
+
+        class InlineThread:
+            def __init__(self, target, **kwargs):
+                self.target = target
+
+            def start(self):
+                started.append(True)
+                self.target()
+
+        self.client.login(username='leaving', password='testpass123')
+        with patch('accounts.deletion.ASYNC_THRESHOLD', 5), \
+                patch('accounts.deletion.threading.Thread', InlineThread), \
+                patch('accounts.deletion.connection.close'):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(reverse('accounts:delete_account'))
+            self.assertRedirects(response, reverse('accounts:login'))
+            self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+            self.assertTrue(Article.objects.filter(author=self.user).exists())
+
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(started, [True])
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    """Tests de l'authentification JWT avec cache des utilisateurs"""
+
+    def setUp(self):
+        from accounts.authentication import user_cache
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user(username='jwtuser', password='testpass123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def _user_queries(self, method='get', path='/polls/api/questions/', **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(path, **kwargs)
+        queries = [q['sql'] for q in ctx.captured_queries if '"auth_user"' in q['sql'] and 'WHERE' in q['sql']]
+        return response, queries
+
+    def test_user_resolved_from_cache(self):
+        """Test de la deuxième requête : l'utilisateur vient du cache, pas de la base"""
+        response, queries = self._user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self._user_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+        response = self.client.post('/polls/api/questions/', {'question_text': 'Cache ?'})
+        self.assertEqual(response.status_code, 201)
+        from polls.models import Question
+        self.assertEqual(Question.objects.get().author, self.user)
+
+    def test_lru_bounds_and_ttl(self):
+        """Test du LRU : taille bornée, entrées expirées après la durée de vie"""
+        from accounts.authentication import UserCache
+
+        users = UserCache(maxsize=2, ttl=10)
+        users.set('1', 'a', now=0)
+        users.set('2', 'b', now=0)
+        self.assertEqual(users.get('1', now=1), 'a')
+        users.set('3', 'c', now=1)
+        # '2' était le moins récemment utilisé
+        self.assertIsNone(users.get('2', now=1))
+        self.assertEqual(users.get('1', now=1), 'a')
+        self.assertIsNone(users.get('1', now=11))
+        self.assertEqual(len(users), 1)
+
+    def test_shared_tier(self):
+        """Test du niveau partagé : un autre processus retrouve l'utilisateur sans la base"""
+        from django.core.cache import cache
+        from accounts.authentication import UserCache
+
+        cache.clear()
+        first, second = UserCache(10, 60, shared=True), UserCache(10, 60, shared=True)
+        first.set(str(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(second.get(str(self.user.pk)), self.user)
+        first.invalidate(str(self.user.pk))
+        self.assertIsNone(cache.get(first.shared_key(self.user.pk)))
+
+    def test_profile_edit_invalidates(self):
+        """Test de edit_profile_view : le changement est visible tout de suite dans l'API"""
+        from accounts.authentication import user_cache
+
+        self._user_queries()
+        self.assertEqual(len(user_cache), 1)
+
+        web = Client()
+        web.login(username='jwtuser', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            web.post(reverse('accounts:edit_profile'), {
+                'username': 'jwtuser', 'email': 'new@test.com', 'first_name': 'Nouveau', 'last_name': '',
+            })
+        self.assertEqual(len(user_cache), 0)
+        response, queries = self._user_queries()
+        self.assertEqual(len(queries), 1)
+
+    def test_deactivated_user_rejected(self):
+        """Test de la désactivation (admin) : les jetons en cours sont refusés"""
+        self._user_queries()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/polls/api/questions/', {'question_text': 'Refusé'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_group_change_invalidates(self):
+        """Test des groupes : ajout d'un membre, côté utilisateur ou côté groupe"""
+        from django.contrib.auth.models import Group
+        from accounts.authentication import user_cache
+
+        group = Group.objects.create(name='editeurs')
+        self._user_queries()
+        self.user.groups.add(group)
+        self.assertEqual(len(user_cache), 0)
+
+        self._user_queries()
+        group.user_set.clear()
+        self.assertEqual(len(user_cache), 0)
+
+    def test_stateless_reads(self):
+        """Test du mode sans état : lecture sur les claims, écriture avec l'utilisateur réel"""
+        from rest_framework_simplejwt.models import TokenUser
+
+        with patch('accounts.authentication.CachedJWTAuthentication.stateless_reads', True):
+            response, queries = self._user_queries()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(queries, [])
+            self.assertIsInstance(response.wsgi_request.user, TokenUser)
+            self.assertEqual(response.wsgi_request.user.pk, self.user.pk)
+
+            response = self.client.post('/polls/api/questions/', {'question_text': 'Écriture'})
+            self.assertEqual(response.status_code, 201)
+
+
+class SessionOverheadTest(TestCase):
+    """Tests du suivi des visites sans session pour les anonymes, et des backends de session"""
+
+    def _request(self, **cookies):
+        from django.contrib.auth import get_user
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+        from django.utils.functional import SimpleLazyObject
+
+        request = RequestFactory().get('/polls/')
+        request.COOKIES.update(cookies)
+        request.session = SessionStore(cookies.get('sessionid'))
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        return request
+
+    def test_anonymous_visit_skips_session(self):
+        """Test du visiteur anonyme : ni la session ni l'utilisateur ne sont chargés"""
+        from accounts.middleware import PageViewMiddleware
+        from accounts.models import PageView
+        from django.utils.functional import empty
+
+        request = self._request()
+        PageViewMiddleware(lambda r: None).process_request(request)
+
+        self.assertFalse(request.session.accessed)
+        self.assertIs(request.user._wrapped, empty)
+        self.assertEqual(PageView.objects.get().session_key, '')
+
+    def test_logged_in_visit_keeps_session_key(self):
+        """Test du visiteur connecté : l'utilisateur et la clé de session sont enregistrés"""
+        from accounts.middleware import PageViewMiddleware
+        from accounts.models import PageView
+
+        user = User.objects.create_user(username='tracked', password='testpass123')
+        client = Client()
+        client.force_login(user)
+        session_key = client.cookies['sessionid'].value
+        PageViewMiddleware(lambda r: None).process_request(self._request(sessionid=session_key))
+
+        view = PageView.objects.get()
+        self.assertEqual(view.user, user)
+        self.assertEqual(view.session_key, session_key)
+
+    def test_signed_cookie_sessions(self):
+        """Test du backend signed_cookies : connexion sans aucune requête sur django_session"""
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        from tp_django import settings as project_settings
+
+        User.objects.create_user(username='cookie', password='testpass123')
+        with override_settings(SESSION_ENGINE=project_settings.SESSION_ENGINES['signed_cookies']):
+            client = Client()
+            with CaptureQueriesContext(connection) as ctx:
+                client.post(reverse('accounts:login'), {'username': 'cookie', 'password': 'testpass123'})
+                response = client.get(reverse('accounts:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.username, 'cookie')
+        self.assertFalse(any('django_session' in q['sql'] for q in ctx.captured_queries))
+
+
+class UserActivityTest(TestCase):
+    """Tests des compteurs d'activité par utilisateur"""
+
+    def setUp(self):
+        from accounts import activity
+
+        self.user = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        activity.rebuild([self.user.pk, self.reader.pk])
+
+    def _counts(self, user):
+        from accounts.models import UserActivity
+
+        row = UserActivity.objects.get(user=user)
+        return row.articles, row.comments, row.polls, row.votes_received
+
+    def _poll(self, choices=2):
+        from polls.models import Choice, Question
+
+        question = Question.objects.create(question_text='Question ?', author=self.user)
+        Choice.objects.bulk_create([Choice(question=question, choice_text=f'Choix {i}') for i in range(choices)])
+        return question
+
+    def test_signals_keep_counters(self):
+        """Test des signaux : création et suppression d'articles, commentaires, sondages et votes"""
+        from accounts import activity
+        from blog.models import Article, Comment
+        from polls.ranked import cast_ballot
+        from polls.vote_buffer import record_vote
+
+        article = Article.objects.create(title='Article', content='Contenu', author=self.user)
+        comment = Comment.objects.create(article=article, author=self.reader, content='Bravo')
+        question = self._poll()
+        record_vote(question.choice_set.first(), 'voter-1', self.reader)
+        record_vote(question.choice_set.last(), 'voter-2')
+        ranked = self._poll()
+        ranked.kind = ranked.RANKED
+        ranked.save()
+        cast_ballot(ranked, [ranked.choice_set.first().pk], 'voter-1')
+
+        self.assertEqual(self._counts(self.user), (1, 0, 2, 3))
+        self.assertEqual(self._counts(self.reader), (0, 1, 0, 0))
+
+        comment.delete()
+        question.delete()
+        self.assertEqual(self._counts(self.user), (1, 0, 1, 1))
+        self.assertEqual(self._counts(self.reader), (0, 0, 0, 0))
+
+        # Le recalcul complet retrouve les mêmes valeurs
+        activity.rebuild([self.user.pk, self.reader.pk])
+        self.assertEqual(self._counts(self.user), (1, 0, 1, 1))
+
+    def test_choice_deletion_keeps_counters(self):
+        """Test que les votes supprimés avec leur choix sont retirés, une seule fois avec la question"""
+        from polls.choices import reconcile_choices
+        from polls.vote_buffer import record_vote
+
+        question = self._poll(choices=3)
+        first, second, third = question.choice_set.order_by('pk')
+        for index, choice in enumerate([first, second, second, third]):
+            record_vote(choice, f'voter-{index}')
+        self.assertEqual(self._counts(self.user), (0, 0, 1, 4))
+
+        reconcile_choices(question, [(first.pk, first.choice_text), (third.pk, third.choice_text)])
+        self.assertEqual(self._counts(self.user), (0, 0, 1, 2))
+        third.delete()
+        self.assertEqual(self._counts(self.user), (0, 0, 1, 1))
+        question.delete()
+        self.assertEqual(self._counts(self.user), (0, 0, 0, 0))
+
+    def test_bump_clamps_at_zero(self):
+        """Test qu'un retrait trop grand laisse 0 sans calculer de valeur négative"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts import activity
+
+        activity.bump(self.user.pk, articles=2)
+        with CaptureQueriesContext(connection) as queries:
+            activity.bump(self.user.pk, articles=-5, comments=1)
+
+        self.assertEqual(self._counts(self.user), (0, 1, 0, 0))
+        self.assertIn('CASE WHEN', queries[0]['sql'])
+        self.assertNotIn('MAX(', queries[0]['sql'].upper())
+
+    def test_bulk_comments_api_keeps_counters(self):
+        """Test que les commentaires créés par l'endpoint groupé sont comptés"""
+        from rest_framework.test import APIClient
+        from blog.models import Article
+
+        article = Article.objects.create(title='Article', content='Contenu', author=self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.reader)
+        response = client.post('/api/comments/bulk/', [
+            {'article': article.id, 'content': 'Un'},
+            {'article': article.id, 'content': 'Deux'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._counts(self.reader), (0, 2, 0, 0))
+
+    def test_batched_paths_keep_counters(self):
+        """Test des chemins sans signaux : flush du tampon de votes, suppression par lots"""
+        from accounts.deletion import delete_articles, delete_questions
+        from blog.models import Article, Comment
+        from polls.models import Question, Vote
+        from polls.vote_buffer import VoteBuffer
+
+        question = self._poll()
+        buffer = VoteBuffer(flush_interval=None)
+        for voter in ('a', 'b', 'c'):
+            buffer.add(Vote(question=question, choice=question.choice_set.first(), voter_id=voter))
+        buffer.flush()
+        article = Article.objects.create(title='Article', content='Contenu', author=self.user)
+        Comment.objects.create(article=article, author=self.reader, content='Un')
+        Comment.objects.create(article=article, author=self.reader, content='Deux')
+        self.assertEqual(self._counts(self.user), (1, 0, 1, 3))
+        self.assertEqual(self._counts(self.reader), (0, 2, 0, 0))
+
+        delete_questions(Question.objects.filter(pk=question.pk), batch_size=2)
+        delete_articles(Article.objects.filter(pk=article.pk), batch_size=2)
+        self.assertEqual(self._counts(self.user), (0, 0, 0, 0))
+        self.assertEqual(self._counts(self.reader), (0, 0, 0, 0))
+
+    def test_missing_row_computed_on_read(self):
+        """Test d'un utilisateur sans ligne : calculée à la lecture du dashboard"""
+        from accounts.models import UserActivity
+        from blog.models import Article
+
+        UserActivity.objects.filter(user=self.user).delete()
+        Article.objects.create(title='Article', content='Contenu', author=self.user)
+        self.assertFalse(UserActivity.objects.filter(user=self.user).exists())
+
+        self.client.login(username='author', password='testpass123')
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertEqual(response.context['activity'].articles, 1)
+        self.assertContains(response, 'Votes reçus')
+
+    def test_rebuild_without_targeted_upsert(self):
+        """Test du recalcul sur une base sans ON CONFLICT (...) DO UPDATE ciblé, comme MySQL"""
+        from unittest import mock
+        from django.db import connection
+        from accounts import activity
+        from accounts.models import UserActivity
+        from blog.models import Article
+
+        UserActivity.objects.filter(user=self.user).delete()
+        Article.objects.create(title='Article', content='Contenu', author=self.user)
+        UserActivity.objects.filter(user=self.reader).update(comments=9)
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            activity.rebuild([self.user.pk, self.reader.pk])
+            self.client.login(username='author', password='testpass123')
+            response = self.client.get(reverse('accounts:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counts(self.user), (1, 0, 0, 0))
+        self.assertEqual(self._counts(self.reader), (0, 0, 0, 0))
+
+    def test_list_pages_use_fixed_queries(self):
+        """Test de my_polls et my_articles : même nombre de requêtes pour 1 ou 5 lignes"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from blog.models import Article, Comment
+
+        def page_queries(name):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            return [q['sql'] for q in ctx.captured_queries if '"polls_' in q['sql'] or '"blog_' in q['sql']]
+
+        def add_content(count, choices):
+            for _ in range(count):
+                article = Article.objects.create(title='Article', content='Contenu', author=self.user)
+                Comment.objects.create(article=article, author=self.reader, content='Bravo')
+                self._poll(choices)
+
+        self.client.login(username='author', password='testpass123')
+        add_content(1, choices=2)
+        few = page_queries('accounts:my_polls'), page_queries('accounts:my_articles')
+
+        add_content(4, choices=3)
+        many = page_queries('accounts:my_polls'), page_queries('accounts:my_articles')
+
+        self.assertEqual([len(queries) for queries in few], [1, 1])
+        self.assertEqual([len(queries) for queries in many], [1, 1])
+        response = self.client.get(reverse('accounts:my_polls'))
+        self.assertContains(response, '3 choix')
+        response = self.client.get(reverse('accounts:my_articles'))
+        self.assertContains(response, '1 commentaire')
+
+
+class ProvisionUsersTest(TestCase):
+    """Tests de la création de comptes en masse (provision_users)"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        User.objects.create_user(username='taken', password='testpass123')
+
+    def _write(self, name, content):
+        import os
+
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def test_csv_with_process_pool(self):
+        """Test du CSV : mots de passe hachés par le pool, existants et invalides écartés"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        path = self._write('cohorte.csv', (
+            'username,email,first_name,last_name,password\n'
+            'alice,alice@EXAMPLE.com,Alice,,secret-alice\n'
+            'bob,,Bob,Martin,secret-bob\n'
+            'taken,,,,whatever\n'
+            'pas valide!,,,,x\n'
+            'alice,,,,doublon\n'
+            'carol,,,,\n'
+        ))
+        out = StringIO()
+        call_command('provision_users', path, workers=2, batch_size=2, stdout=out)
+
+        alice = User.objects.get(username='alice')
+        self.assertTrue(alice.check_password('secret-alice'))
+        self.assertEqual(alice.email, 'alice@example.com')
+        self.assertTrue(User.objects.get(username='bob').check_password('secret-bob'))
+        self.assertFalse(User.objects.get(username='carol').has_usable_password())
+        self.assertTrue(User.objects.get(username='taken').check_password('testpass123'))
+        self.assertIn('3 cuentas creadas', out.getvalue())
+        self.assertIn('1 ya existentes, 2 inválidas', out.getvalue())
+
+    def test_ndjson_one_lookup_per_batch(self):
+        """Test du NDJSON : une recherche des usernames et un INSERT par lot"""
+        import json
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from accounts.provisioning import Provisioner, read_records
+
+        path = self._write('cohorte.ndjson', ''.join(
+            json.dumps({'username': f'user{i}', 'password': f'pw{i}'}) + '\n' for i in range(5)
+        ))
+        with CaptureQueriesContext(connection) as ctx:
+            stats = Provisioner(batch_size=2, workers=1).run(read_records(path))
+
+        statements = [q['sql'].split()[0] for q in ctx.captured_queries if '"auth_user"' in q['sql']]
+        self.assertEqual(statements, ['SELECT', 'INSERT'] * 3)
+        self.assertEqual(stats['created'], 5)
+        self.assertTrue(User.objects.get(username='user4').check_password('pw4'))
@@ -15,6 +15,7 @@ urlpatterns = [
     path("edit-profile/", views.edit_profile_view, name="edit_profile"),
     path("my-articles/", views.my_articles_view, name="my_articles"),
     path("my-polls/", views.my_polls_view, name="my_polls"),
+    path("delete-account/", views.delete_account_view, name="delete_account"),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/register/', RegisterView.as_view(), name='register'),
@@ -21,8 +21,15 @@ except ImportError:
     Question = None
 
 from .models import PageView, DailyVisits
+from .deletion import remove_account
+from . import activity
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
+from tp_django.cache import tiered
+
+DASHBOARD_CACHE_TIMEOUT = 60
 
 # Create your views here.
 def signup_view(request):
@@ -51,41 +58,32 @@ def logout_view(request):
     logout(request)
     return redirect("accounts:login")
 
+def _staff_stats():
+    today = timezone.now().date()
+    # Visitantes únicos (últimos 30 días) - ahora por visitor_id
+    thirty_days_ago = today - timedelta(days=30)
+    return {
+        'total_users': User.objects.count(),
+        'total_posts': Article.objects.count() if Article else 0,
+        'total_polls': Question.objects.count() if Question else 0,
+        'total_visits': PageView.objects.count(),
+        'today_visits': PageView.objects.filter(timestamp__date=today).count(),
+        'unique_visitors': PageView.objects.filter(
+            timestamp__date__gte=thirty_days_ago
+        ).values('visitor_id').distinct().count(),
+    }
+
 @login_required
 def dashboard_view(request):
     # Obtener estadísticas si el usuario es staff
     context = {}
     if request.user.is_staff:
-        # Contar usuarios
-        total_users = User.objects.count()
-        
-        # Contar artículos del blog
-        total_posts = Article.objects.count() if Article else 0
-        
-        # Contar sondages (questions)
-        total_polls = Question.objects.count() if Question else 0
-        
-        # Estadísticas de visitas reales
-        total_visits = PageView.objects.count()
-        
-        # Visitas de hoy
-        today = timezone.now().date()
-        today_visits = PageView.objects.filter(timestamp__date=today).count()
-        
-        # Visitantes únicos (últimos 30 días) - ahora por visitor_id
-        thirty_days_ago = today - timedelta(days=30)
-        unique_visitors = PageView.objects.filter(
-            timestamp__date__gte=thirty_days_ago
-        ).values('visitor_id').distinct().count()
-        
-        context.update({
-            'total_users': total_users,
-            'total_posts': total_posts,
-            'total_polls': total_polls,
-            'total_visits': total_visits,
-            'today_visits': today_visits,
-            'unique_visitors': unique_visitors,
-        })
+        # Cifras globales: recalculadas como mucho una vez por minuto, por un solo worker
+        context.update(tiered.get_or_compute('accounts:dashboard:staff', _staff_stats, DASHBOARD_CACHE_TIMEOUT))
+        context['cache_stats'] = tiered.stats()
+    else:
+        # Totales del autor: una sola fila, mantenida por señales
+        context['activity'] = activity.for_user(request.user)
     return render(request, "accounts/dashboard.html", context)
 
 class RegisterSerializer(ModelSerializer):
@@ -147,7 +145,10 @@ def edit_profile_view(request):
 def my_articles_view(request):
     """Vue pour afficher les articles de l'utilisateur connecté"""
     if Article:
-        user_articles = Article.objects.filter(author=request.user).prefetch_related('comments').order_by('-created_at')
+        # Un COUNT por fila en la misma consulta, en lugar de article.comments.count por artículo
+        user_articles = Article.objects.filter(author=request.user).defer('content').annotate(
+            comment_count=Count('comments')
+        ).order_by('-created_at')
     else:
         user_articles = []
     
@@ -161,7 +162,10 @@ def my_articles_view(request):
 def my_polls_view(request):
     """Vue pour afficher les sondages de l'utilisateur connecté"""
     if Question:
-        user_polls = Question.objects.filter(author=request.user).order_by('-pub_date')
+        user_polls = Question.objects.filter(author=request.user).annotate(
+            choice_count=Count('choice'),
+            total_votes=Coalesce(Sum('choice__votes'), 0),
+        ).order_by('-pub_date')
     else:
         user_polls = []
         
@@ -169,4 +173,18 @@ def my_polls_view(request):
         'polls': user_polls,
         'title': 'Mes Sondages'
     }
-    return render(request, 'accounts/my_polls.html', context)
\ No newline at end of file
+    return render(request, 'accounts/my_polls.html', context)
+
+
+@login_required
+def delete_account_view(request):
+    """Supprimer son compte et tout son contenu"""
+    if request.method == "POST":
+        user = request.user
+        logout(request)
+        if remove_account(user):
+            messages.info(request, "Votre compte est fermé ; vos contenus seront supprimés dans quelques instants.")
+        else:
+            messages.success(request, "Votre compte a été supprimé.")
+        return redirect("accounts:login")
+    return render(request, "accounts/delete_account.html")
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Article, Comment
+from . import search
 
 # Register your models here.
 class CommentInline(admin.TabularInline):
@@ -11,6 +12,11 @@ class ArticleAdmin(admin.ModelAdmin):
     search_fields = ('title', 'content')
     list_filter = ['created_at']
     inlines = [CommentInline]
-    search_fields = ['title']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Index FULLTEXT (ou index inversé) au lieu d'un icontains sur toute la table
+        if not search.query_terms(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_articles(queryset, search_term), False
 
 admin.site.register(Article, ArticleAdmin)
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""Autocomplétion par préfixe sur les titres d'articles et les questions de sondage.
+
+L'index vit en mémoire, un par processus : un tableau trié de clés normalisées
+(minuscules, sans accents) interrogé par ``bisect``. Chaque mot d'un titre
+ouvre une clé (« tarte aux pommes », « aux pommes », « pommes »), ce qui permet
+de compléter à partir de n'importe quel mot. L'index est chargé par un thread
+de fond lancé au premier appel (les réponses restent vides jusque-là), tenu à
+jour par les signaux save/delete du processus courant, et rechargé par ce même
+thread toutes les ``AUTOCOMPLETE_MAX_AGE`` secondes pour rattraper les écritures
+des autres workers. Aucune requête HTTP ne lit la base : elles consultent
+l'ancien tableau jusqu'à ce que le nouveau le remplace.
+"""
+import functools
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.urls import reverse
+from polls.models import Question
+from .models import Article
+
+MAX_RESULTS = 10
+MAX_WORDS = 8
+URL_PLACEHOLDER = 987654321
+
+logger = logging.getLogger(__name__)
+
+# Source de chaque type d'entrée : modèle, champ indexé et nom d'URL de détail
+SOURCES = {
+    'article': (Article, 'title', 'blog:article_detail'),
+    'poll': (Question, 'question_text', 'polls:detail'),
+}
+
+
+@functools.cache
+def _url_parts(kind):
+    # reverse() coûte des dizaines de µs : on le résout une fois par type
+    return reverse(SOURCES[kind][2], args=[URL_PLACEHOLDER]).split(str(URL_PLACEHOLDER))
+
+
+def detail_url(kind, pk):
+    prefix, suffix = _url_parts(kind)
+    return f"{prefix}{pk}{suffix}"
+
+
+def normalize(text):
+    """Minuscules et accents retirés : « Éte » -> « ete »"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def prefix_keys(label):
+    """Une clé par début de mot (limitée à MAX_WORDS mots)"""
+    words = normalize(label).split()
+    return {' '.join(words[index:]) for index in range(min(len(words), MAX_WORDS))}
+
+
+class PrefixIndex:
+    """Tableau trié de ``(clé, type, pk)`` ; les écritures recopient le tableau"""
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._keys = []
+        self._entries = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def build(self):
+        keys, entries = [], {}
+        for kind, (model, field, _) in SOURCES.items():
+            for pk, label in model._default_manager.values_list('pk', field).iterator():
+                entries[(kind, pk)] = label
+                keys.extend((key, kind, pk) for key in prefix_keys(label))
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries = keys, entries
+            self._built_at = time.monotonic()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.max_age is None and self._built_at is not None:
+            return  # Sans rechargement périodique : un seul chargement
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='autocomplete-index', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            close_old_connections()
+            try:
+                self.build()
+            except Exception:
+                logger.exception("Échec du chargement de l'index d'autocomplétion, ancien index conservé")
+            if self.max_age is None:
+                connection.close()
+                return
+            time.sleep(self.max_age)
+
+    def add(self, kind, pk, label):
+        if self._built_at is None:
+            return  # Pas encore chargé : le premier appel lira la base
+        with self._lock:
+            keys = [item for item in self._keys if item[1:] != (kind, pk)] if (kind, pk) in self._entries \
+                else list(self._keys)
+            for key in prefix_keys(label):
+                insort(keys, (key, kind, pk))
+            self._entries = {**self._entries, (kind, pk): label}
+            self._keys = keys
+
+    def remove(self, kind, pk):
+        if (kind, pk) not in self._entries:
+            return
+        with self._lock:
+            self._keys = [item for item in self._keys if item[1:] != (kind, pk)]
+            self._entries = {key: label for key, label in self._entries.items() if key != (kind, pk)}
+
+    def lookup(self, prefix, limit=MAX_RESULTS):
+        """Entrées dont un mot commence par ``prefix``, dans l'ordre alphabétique des clés"""
+        prefix = ' '.join(normalize(prefix).split())
+        if not prefix:
+            return []
+        self._ensure_thread()
+        keys, entries = self._keys, self._entries
+        results, seen = [], set()
+        for position in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, kind, pk = keys[position]
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            label = entries.get((kind, pk))
+            if label is None or (kind, pk) in seen:
+                continue
+            seen.add((kind, pk))
+            results.append({'type': kind, 'id': pk, 'label': label, 'url': detail_url(kind, pk)})
+        return results
+
+
+index = PrefixIndex(max_age=getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 300))
@@ -0,0 +1,272 @@
+"""Flux RSS/Atom (articles, sondages) et sitemap pré-générés en fichiers statiques.
+
+Chaque entrée est rendue une seule fois en fragment XML (``entries/``) lors de
+sa publication ou modification. Les fichiers servis sont ensuite assemblés en
+concaténant les fragments existants : seules les entrées modifiées sont
+re-rendues, et aucune requête HTTP ne touche à la base.
+
+Les flux ne reprennent que les ``FEED_ITEMS`` dernières entrées et sont
+réassemblés à chaque écriture. Le sitemap, lui, liste toutes les entrées : une
+écriture le marque périmé (``sitemap.dirty``) et il n'est réassemblé, à partir
+des seuls fragments sur disque, qu'au plus une fois par ``FEEDS_SITEMAP_INTERVAL``
+secondes. Une marque restée en place est reprise par ``build_feeds --sitemap``
+(tâche périodique) ; d'ici là, l'ancien sitemap reste servi.
+"""
+import hashlib
+import os
+import threading
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.xmlutils import SimplerXMLGenerator
+from polls.models import Question
+from .models import Article
+
+FEED_ITEMS = getattr(settings, 'FEED_ITEMS', 20)
+SITE_URL = getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/')
+SITEMAP_INTERVAL = getattr(settings, 'FEEDS_SITEMAP_INTERVAL', 300)
+
+FEED_CLASSES = {
+    'rss': feedgenerator.Rss201rev2Feed,
+    'atom': feedgenerator.Atom1Feed,
+}
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'xml': 'application/xml; charset=utf-8',
+}
+SITEMAP_HEADER = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+)
+SITEMAP_FOOTER = '</urlset>\n'
+
+
+# Description de chaque flux : modèle, champ de date, URL et contenu d'une entrée
+KINDS = {
+    'articles': {
+        'model': Article,
+        'date_field': 'created_at',
+        'lastmod_field': 'updated_at',
+        'title': 'TP-Django : articles',
+        'link': lambda obj: reverse('blog:article_detail', args=[obj.pk]),
+        'item_title': lambda obj: obj.title,
+        'description': lambda obj: obj.summary,
+        'author': lambda obj: obj.author.username,
+        'fields': {'title', 'content', 'excerpt', 'created_at', 'author'},
+    },
+    'polls': {
+        'model': Question,
+        'date_field': 'pub_date',
+        'title': 'TP-Django : sondages',
+        'link': lambda obj: reverse('polls:detail', args=[obj.pk]),
+        'item_title': lambda obj: obj.question_text,
+        'description': lambda obj: obj.question_text,
+        'author': lambda obj: obj.author.username,
+        'fields': {'question_text', 'pub_date', 'author'},
+    },
+}
+
+
+def feeds_root():
+    return getattr(settings, 'FEEDS_ROOT', os.path.join(settings.BASE_DIR, 'feeds'))
+
+
+def feed_filename(kind, fmt):
+    return f"{kind}.{fmt}.xml"
+
+
+def _entry_path(kind, pk, fmt):
+    return os.path.join(feeds_root(), 'entries', kind, f"{pk}.{fmt}.xml")
+
+
+def _write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Fichier temporaire propre à l'écrivain : deux assemblages simultanés ne se gênent pas
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as output:
+        output.write(content)
+    os.replace(tmp_path, path)
+
+
+def _new_feed(kind, fmt):
+    spec = KINDS[kind]
+    return FEED_CLASSES[fmt](
+        title=spec['title'],
+        link=SITE_URL + '/',
+        description=spec['title'],
+        feed_url=SITE_URL + reverse('blog:feed', args=[feed_filename(kind, fmt)]),
+        language=settings.LANGUAGE_CODE,
+    )
+
+
+def render_entry(kind, obj):
+    """Rend les fragments RSS, Atom et sitemap d'un objet"""
+    spec = KINDS[kind]
+    link = SITE_URL + spec['link'](obj)
+    date = getattr(obj, spec['date_field'])
+    # Sans date de modification (sondages), la date de publication
+    lastmod = getattr(obj, spec.get('lastmod_field', spec['date_field']))
+    fragments = {}
+    for fmt in FEED_CLASSES:
+        feed = _new_feed(kind, fmt)
+        feed.add_item(
+            title=spec['item_title'](obj),
+            link=link,
+            description=spec['description'](obj),
+            unique_id=link,
+            author_name=spec['author'](obj),
+            pubdate=date,
+            updateddate=lastmod,
+        )
+        output = StringIO()
+        feed.write_items(SimplerXMLGenerator(output, 'utf-8', short_empty_elements=True))
+        fragments[fmt] = output.getvalue()
+    fragments['sitemap'] = f"<url><loc>{link}</loc><lastmod>{lastmod.date().isoformat()}</lastmod></url>"
+    return fragments
+
+
+def write_entry(kind, obj):
+    for fmt, fragment in render_entry(kind, obj).items():
+        _write_atomic(_entry_path(kind, obj.pk, fmt), fragment)
+
+
+def delete_entry(kind, pk):
+    for fmt in (*FEED_CLASSES, 'sitemap'):
+        try:
+            os.remove(_entry_path(kind, pk, fmt))
+        except FileNotFoundError:
+            pass
+
+
+def _read_fragment(kind, pk, fmt):
+    """Lit un fragment, en le rendant à la volée s'il n'existe pas encore"""
+    path = _entry_path(kind, pk, fmt)
+    if not os.path.exists(path):
+        obj = KINDS[kind]['model'].objects.select_related('author').get(pk=pk)
+        write_entry(kind, obj)
+    with open(path, encoding='utf-8') as source:
+        return source.read()
+
+
+def _ordered_pks(kind, limit):
+    spec = KINDS[kind]
+    return list(spec['model'].objects.order_by(f"-{spec['date_field']}").values_list('pk', flat=True)[:limit])
+
+
+def assemble_feed(kind):
+    """Réécrit les fichiers RSS et Atom d'un flux à partir des fragments"""
+    pks = _ordered_pks(kind, FEED_ITEMS)
+    for fmt in FEED_CLASSES:
+        output = StringIO()
+        _new_feed(kind, fmt).write(output, 'utf-8')
+        document = output.getvalue()
+        closing = '</channel>' if fmt == 'rss' else '</feed>'
+        head, _, tail = document.rpartition(closing)
+        items = ''.join(_read_fragment(kind, pk, fmt) for pk in pks)
+        _write_atomic(os.path.join(feeds_root(), feed_filename(kind, fmt)), head + items + closing + tail)
+
+
+def sitemap_path():
+    return os.path.join(feeds_root(), 'sitemap.xml')
+
+
+def _dirty_path():
+    return os.path.join(feeds_root(), 'sitemap.dirty')
+
+
+def mark_sitemap_dirty():
+    _write_atomic(_dirty_path(), '')
+
+
+def sitemap_is_stale():
+    return os.path.exists(_dirty_path()) or not os.path.exists(sitemap_path())
+
+
+def _sitemap_fragments(kind):
+    """Fragments sitemap présents sur disque, les plus récents (pk) d'abord, sans requête"""
+    directory = os.path.join(feeds_root(), 'entries', kind)
+    suffix = '.sitemap.xml'
+    try:
+        names = [entry.name for entry in os.scandir(directory) if entry.name.endswith(suffix)]
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (os.path.join(directory, name) for name in names),
+        key=lambda path: int(os.path.basename(path)[:-len(suffix)]), reverse=True,
+    )
+
+
+def assemble_sitemap():
+    """Concatène les fragments sitemap écrits par ``write_entry`` (aucune requête)"""
+    # Marque retirée avant la lecture : une écriture pendant l'assemblage la repose
+    try:
+        os.remove(_dirty_path())
+    except FileNotFoundError:
+        pass
+    parts = [SITEMAP_HEADER, f"<url><loc>{SITE_URL}/</loc></url>"]
+    for kind in KINDS:
+        for path in _sitemap_fragments(kind):
+            try:
+                with open(path, encoding='utf-8') as source:
+                    parts.append(source.read())
+            except FileNotFoundError:
+                # Entrée supprimée pendant l'assemblage
+                pass
+    parts.append(SITEMAP_FOOTER)
+    _write_atomic(sitemap_path(), ''.join(parts))
+
+
+def assemble_sitemap_if_due(now=None):
+    """Réassemble le sitemap périmé, au plus une fois par ``SITEMAP_INTERVAL`` secondes"""
+    if not sitemap_is_stale():
+        return False
+    now = time.time() if now is None else now
+    try:
+        if now - os.path.getmtime(sitemap_path()) < SITEMAP_INTERVAL:
+            return False
+    except FileNotFoundError:
+        pass
+    assemble_sitemap()
+    return True
+
+
+def refresh_entry(kind, obj):
+    """Publication ou modification : re-rend l'entrée, réassemble le flux et, si dû, le sitemap"""
+    write_entry(kind, obj)
+    assemble_feed(kind)
+    mark_sitemap_dirty()
+    assemble_sitemap_if_due()
+
+
+def remove_entry(kind, pk):
+    delete_entry(kind, pk)
+    assemble_feed(kind)
+    mark_sitemap_dirty()
+    assemble_sitemap_if_due()
+
+
+def rebuild_all():
+    """Reconstruit tous les fragments et fichiers (commande build_feeds)"""
+    for kind, spec in KINDS.items():
+        for obj in spec['model'].objects.select_related('author').iterator():
+            write_entry(kind, obj)
+        assemble_feed(kind)
+    assemble_sitemap()
+
+
+def served_files():
+    names = {'sitemap.xml': CONTENT_TYPES['xml']}
+    for kind in KINDS:
+        for fmt in FEED_CLASSES:
+            names[feed_filename(kind, fmt)] = CONTENT_TYPES[fmt]
+    return names
+
+
+def file_etag(path):
+    """ETag dérivé de la taille et de la date de modification (pas de lecture du fichier)"""
+    stat = os.stat(path)
+    return '"%s"' % hashlib.md5(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest()
@@ -0,0 +1,117 @@
+"""Déclinaisons responsive des images d'articles.
+
+Chaque image est redimensionnée une seule fois (à l'upload ou via la commande
+``build_article_renditions``) en plusieurs largeurs fixes, en WebP et en JPEG.
+Les fichiers passent par le storage par défaut et leurs noms sont gardés dans
+``Article.image_renditions`` pour construire les ``srcset`` sans accès au storage.
+"""
+import logging
+from io import BytesIO
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Largeurs générées (px) : la carte de la home fait ~400px, x2 pour les écrans HiDPI
+RENDITION_WIDTHS = getattr(settings, 'BLOG_IMAGE_RENDITION_WIDTHS', (320, 640, 960))
+RENDITION_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+RENDITIONS_DIR = 'articles/renditions'
+
+logger = logging.getLogger(__name__)
+
+
+def render_variants(data, widths=RENDITION_WIDTHS):
+    """Redimensionne l'image ``data`` et retourne ``[(fmt, width, bytes), ...]``.
+
+    Fonction pure (sans ORM ni storage) pour pouvoir tourner dans un process pool.
+    """
+    with Image.open(BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'L'):
+            source = source.convert('RGB')
+
+        variants = []
+        for width in sorted(set(widths)):
+            # Ne jamais agrandir : on plafonne à la largeur de l'original
+            target_width = min(width, source.width)
+            target_height = max(1, round(source.height * target_width / source.width))
+            resized = source.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            for fmt, options in RENDITION_FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, **options)
+                variants.append((fmt, target_width, buffer.getvalue()))
+            if target_width < width:
+                break
+    return variants
+
+
+def load_source(article):
+    """Télécharge l'original de l'image de l'article"""
+    with urlopen(article.image.url, timeout=30) as response:
+        return response.read()
+
+
+def delete_renditions(article):
+    """Supprime du storage les déclinaisons connues de l'article"""
+    for names in (article.image_renditions or {}).values():
+        for name in names.values():
+            default_storage.delete(name)
+
+
+def store_renditions(article, variants):
+    """Enregistre les variantes dans le storage et met à jour l'article"""
+    delete_renditions(article)
+    renditions = {}
+    for fmt, width, data in variants:
+        name = f"{RENDITIONS_DIR}/{article.pk}/{width}w.{fmt}"
+        renditions.setdefault(fmt, {})[str(width)] = default_storage.save(name, ContentFile(data))
+    article.image_renditions = renditions
+    article.save(update_fields=['image_renditions'])
+    return renditions
+
+
+def generate_renditions(article, source=None):
+    """Génère et enregistre les déclinaisons de l'image de l'article.
+
+    ``source`` peut être un fichier uploadé ou des bytes ; sinon l'original est téléchargé.
+    """
+    if not article.image:
+        if article.image_renditions:
+            delete_renditions(article)
+            article.image_renditions = {}
+            article.save(update_fields=['image_renditions'])
+        return {}
+
+    if source is None:
+        data = load_source(article)
+    elif isinstance(source, bytes):
+        data = source
+    else:
+        source.seek(0)
+        data = source.read()
+    return store_renditions(article, render_variants(data))
+
+
+def refresh_renditions(article, upload):
+    """Régénère les déclinaisons après un upload, sans faire échouer la requête"""
+    if not upload:
+        return
+    try:
+        generate_renditions(article, upload)
+    except OSError:
+        # Image illisible ou storage indisponible : la commande de backfill reprendra
+        logger.exception("Impossible de générer les déclinaisons de l'article %s", article.pk)
+
+
+def build_srcset(renditions, fmt):
+    """Construit l'attribut ``srcset`` pour un format donné"""
+    names = renditions.get(fmt, {})
+    return ', '.join(
+        f"{default_storage.url(name)} {width}w"
+        for width, name in sorted(names.items(), key=lambda item: int(item[0]))
+    )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from blog.models import Article, make_excerpt
+
+
+class Command(BaseCommand):
+    help = 'Calcula el extracto almacenado de los artículos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula también los artículos que ya tienen extracto',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Número de artículos actualizados por consulta',
+        )
+
+    def handle(self, *args, **options):
+        articles = Article.objects.order_by('pk').only('pk', 'content', 'excerpt')
+        if not options['all']:
+            articles = articles.filter(excerpt='')
+
+        batch_size = max(1, options['batch_size'])
+        updated = 0
+        batch = []
+        for article in articles.iterator(chunk_size=batch_size):
+            excerpt = make_excerpt(article.content)
+            if excerpt != article.excerpt:
+                article.excerpt = excerpt
+                batch.append(article)
+            if len(batch) == batch_size:
+                Article.objects.bulk_update(batch, ['excerpt'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Article.objects.bulk_update(batch, ['excerpt'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {updated} extractos actualizados'))
@@ -0,0 +1,73 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from blog import search
+from blog.models import Article
+
+PAGE_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = 'Compara la búsqueda clasificada con icontains sobre artículos sintéticos (todo se revierte al final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000, help='Número de artículos generados')
+        parser.add_argument('--words', type=int, default=80, help='Palabras por artículo')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por consulta')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            vocabulary = self._populate(options['articles'], options['words'])
+            queries = [vocabulary[5], vocabulary[len(vocabulary) // 2], f"{vocabulary[50]} {vocabulary[-1]}"]
+            self.stdout.write(f"{'consulta':<30} {'icontains (ms)':>15} {'clasificada (ms)':>17} {'resultados':>11}")
+            for query in queries:
+                slow = self._time(lambda: self._icontains(query), options['repeat'])
+                fast = self._time(lambda: self._ranked(query), options['repeat'])
+                self.stdout.write(f"{query:<30} {slow[0]:>15.1f} {fast[0]:>17.1f} {fast[1]:>11}")
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('✓ Datos de prueba revertidos'))
+
+    def _populate(self, count, words):
+        rng = random.Random(42)
+        vocabulary = [f"mot{index:05d}" for index in range(5000)]
+        # Distribution de Zipf : quelques termes très fréquents, beaucoup de rares
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        author = User.objects.create_user(username='benchmark_search_user')
+        started = time.perf_counter()
+        batch = []
+        for index in range(count):
+            text = ' '.join(rng.choices(vocabulary, weights, k=words))
+            batch.append(Article(title=f"Article {index}", content=text, author=author))
+            if len(batch) == 2000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+        if not search.uses_fulltext():
+            search.rebuild_index()
+        self.stdout.write(f"{count} artículos generados en {time.perf_counter() - started:.1f} s")
+        return vocabulary
+
+    def _time(self, run, repeat):
+        timings, result = [], None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2], result
+
+    def _icontains(self, query):
+        condition = Q()
+        for term in query.split():
+            condition |= Q(title__icontains=term) | Q(content__icontains=term)
+        queryset = Article.objects.filter(condition).order_by('-created_at')
+        list(queryset.values_list('pk', flat=True)[:PAGE_SIZE])
+        return queryset.count()
+
+    def _ranked(self, query):
+        rows = search.ranked_rows(query)
+        search.load_results(rows[:PAGE_SIZE], query)
+        return rows.count()
@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from blog.images import load_source, render_variants, store_renditions
+from blog.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Genera las declinaciones responsive (WebP/JPEG) de las imágenes de artículos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenera también los artículos que ya tienen declinaciones',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Número de procesos para redimensionar (1 = sin pool)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Número de artículos procesados por lote',
+        )
+
+    def handle(self, *args, **options):
+        articles = Article.objects.exclude(image__isnull=True).exclude(image='')
+        if not options['force']:
+            articles = articles.filter(image_renditions={})
+        articles = articles.order_by('pk').only('pk', 'image', 'image_renditions')
+
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        done = failed = 0
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            batch = []
+            for article in articles.iterator(chunk_size=batch_size):
+                batch.append(article)
+                if len(batch) == batch_size:
+                    ok, ko = self._process_batch(batch, pool)
+                    done, failed = done + ok, failed + ko
+                    batch = []
+            if batch:
+                ok, ko = self._process_batch(batch, pool)
+                done, failed = done + ok, failed + ko
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {done} artículos procesados, {failed} errores')
+        )
+
+    def _process_batch(self, batch, pool):
+        """Descarga los originales y reparte el redimensionado entre los procesos"""
+        sources = {}
+        failed = 0
+        for article in batch:
+            try:
+                sources[article.pk] = load_source(article)
+            except OSError as e:
+                failed += 1
+                self.stderr.write(f'Artículo {article.pk}: descarga imposible ({e})')
+
+        pending = [article for article in batch if article.pk in sources]
+        if pool:
+            futures = [pool.submit(render_variants, sources[article.pk]) for article in pending]
+            results = [future.exception() or future.result() for future in futures]
+        else:
+            results = []
+            for article in pending:
+                try:
+                    results.append(render_variants(sources[article.pk]))
+                except OSError as e:
+                    results.append(e)
+
+        done = 0
+        for article, variants in zip(pending, results):
+            if isinstance(variants, Exception):
+                failed += 1
+                self.stderr.write(f'Artículo {article.pk}: imagen ilegible ({variants})')
+                continue
+            store_renditions(article, variants)
+            done += 1
+        return done, failed
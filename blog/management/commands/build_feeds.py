@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from blog.feeds import assemble_sitemap, feeds_root, rebuild_all, sitemap_is_stale
+
+
+class Command(BaseCommand):
+    help = 'Regenera todos los flujos RSS/Atom y el sitemap estáticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sitemap', action='store_true',
+            help='Solo reensambla el sitemap si está marcado como obsoleto (tarea periódica)',
+        )
+
+    def handle(self, *args, **options):
+        if options['sitemap']:
+            if not sitemap_is_stale():
+                self.stdout.write(self.style.SUCCESS('✓ Sitemap al día'))
+                return
+            assemble_sitemap()
+            self.stdout.write(self.style.SUCCESS(f'✓ Sitemap reensamblado en {feeds_root()}'))
+            return
+        rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'✓ Flujos y sitemap generados en {feeds_root()}'))
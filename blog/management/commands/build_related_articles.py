@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from blog.related import BLOCK_SIZE, TOP_K, build_related
+
+
+class Command(BaseCommand):
+    help = 'Calcula los artículos similares (TF-IDF) de los artículos nuevos o modificados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recalcula todos los artículos en lugar de solo los modificados',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help='Número de artículos similares por artículo',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=BLOCK_SIZE,
+            help='Número de filas de la matriz multiplicadas a la vez',
+        )
+
+    def handle(self, *args, **options):
+        stats = build_related(
+            full=options['full'],
+            k=max(1, options['top_k']),
+            block_size=max(1, options['block_size']),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {stats["articles"]} artículos vectorizados\n'
+                f'✓ {stats["recomputed"]} listas recalculadas, {stats["merged"]} listas actualizadas por fusión'
+            )
+        )
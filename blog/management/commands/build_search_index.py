@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog import search
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de los artículos (índice invertido si la base no tiene FULLTEXT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Número de artículos indexados por lote',
+        )
+
+    def handle(self, *args, **options):
+        if search.uses_fulltext():
+            self.stdout.write(self.style.SUCCESS('✓ MySQL mantiene el índice FULLTEXT, nada que hacer'))
+            return
+        with transaction.atomic():
+            indexed = search.rebuild_index(max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f'✓ {indexed} artículos indexados'))
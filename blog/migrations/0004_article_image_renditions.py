@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_alter_article_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
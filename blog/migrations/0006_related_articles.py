@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_article_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSimilarityState',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity_state', serialize=False, to='blog.article')),
+                ('signature', models.CharField(max_length=40)),
+                ('neighbor_count', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.article')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.article')),
+            ],
+            options={
+                'ordering': ['article', 'rank'],
+                'indexes': [models.Index(fields=['article', 'rank'], name='related_article_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('article', 'related'), name='unique_related_article')],
+            },
+        ),
+    ]
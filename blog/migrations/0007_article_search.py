@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Seul MySQL a un index FULLTEXT ; les autres bases utilisent ArticleSearchTerm
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE FULLTEXT INDEX blog_article_fulltext_idx ON blog_article (title, content)')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX blog_article_fulltext_idx ON blog_article')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_related_articles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='blog.article')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'article'), name='unique_article_search_term')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
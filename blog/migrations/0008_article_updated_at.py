@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    # Articles existants : jamais modifiés à notre connaissance
+    Article = apps.get_model('blog', 'Article')
+    Article.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_article_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,29 @@
 from django.db import models
 from django.contrib.auth.models import User
 from cloudinary.models import CloudinaryField
+from .images import build_srcset
+
+EXCERPT_LENGTH = 150
+
+
+def make_excerpt(content):
+    """Résumé affiché dans les listes (150 premiers caractères du contenu)"""
+    return content[:EXCERPT_LENGTH] + "..." if len(content) > EXCERPT_LENGTH else content
+
 
 # Create your models here.
 class Article(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Copie persistée du résumé pour que les listes puissent faire .defer('content')
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 3, blank=True, default='', editable=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Dernière modification : <lastmod> du sitemap
+    updated_at = models.DateTimeField(auto_now=True)
     image = CloudinaryField('image', folder='articles', blank=True, null=True)
+    # Déclinaisons pré-calculées de l'image : {"webp": {"320": "nom"}, "jpeg": {...}}
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -16,7 +31,28 @@ class Article(models.Model):
     @property
     def summary(self):
         """Retourne un résumé de l'article basé sur le contenu"""
-        return self.content[:150] + "..." if len(self.content) > 150 else self.content
+        # Articles pas encore backfillés : on retombe sur le contenu, s'il est chargé
+        # (avec .defer('content'), le lire coûterait une requête par article)
+        if self.excerpt or 'content' in self.get_deferred_fields():
+            return self.excerpt
+        return make_excerpt(self.content)
+
+    def save(self, *args, **kwargs):
+        # L'extrait n'est recalculé que si le contenu est chargé (pas de .defer('content'))
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+    @property
+    def image_srcset_webp(self):
+        return build_srcset(self.image_renditions or {}, 'webp')
+
+    @property
+    def image_srcset_jpeg(self):
+        return build_srcset(self.image_renditions or {}, 'jpeg')
     
 class Comment(models.Model):
     article = models.ForeignKey(Article, related_name='comments', on_delete=models.CASCADE)
@@ -25,4 +61,45 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Commentaire par {self.author.username} sur {self.article.title}"
\ No newline at end of file
+        return f"Commentaire par {self.author.username} sur {self.article.title}"
+
+class RelatedArticle(models.Model):
+    """Voisins pré-calculés (similarité TF-IDF) lus par article_detail"""
+    article = models.ForeignKey(Article, related_name='related_links', on_delete=models.CASCADE)
+    related = models.ForeignKey(Article, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['article', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'related'], name='unique_related_article'),
+        ]
+        indexes = [
+            models.Index(fields=['article', 'rank'], name='related_article_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class ArticleSimilarityState(models.Model):
+    """Empreinte du texte au dernier calcul, pour les reconstructions incrémentales"""
+    article = models.OneToOneField(Article, primary_key=True, related_name='similarity_state', on_delete=models.CASCADE)
+    signature = models.CharField(max_length=40)
+    neighbor_count = models.PositiveSmallIntegerField(default=0)
+
+
+class ArticleSearchTerm(models.Model):
+    """Index inversé (terme -> article) utilisé quand la base n'a pas de FULLTEXT (SQLite)"""
+    term = models.CharField(max_length=64)
+    article = models.ForeignKey(Article, related_name='search_terms', on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'article'], name='unique_article_search_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.article_id} ({self.count})"
@@ -0,0 +1,215 @@
+"""Calcul par lots des « articles similaires » (TF-IDF + similarité cosinus).
+
+Les titres et contenus sont vectorisés dans une matrice creuse SciPy (CSR),
+puis les k plus proches voisins sont calculés par blocs de lignes
+(``X[bloc] @ X.T``) pour borner la mémoire. Le résultat est stocké dans
+``RelatedArticle`` ; la vue de détail n'a plus qu'une requête indexée à faire.
+
+En mode incrémental, seuls les articles nouveaux ou modifiés (empreinte du
+texte différente) sont recalculés, et leurs scores sont fusionnés dans les
+listes des autres articles.
+"""
+import hashlib
+import re
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.db.models import Count
+from .models import Article, ArticleSimilarityState, RelatedArticle
+
+TOP_K = 5
+BLOCK_SIZE = 256
+MIN_SCORE = 0.05
+# Au-delà de ce nombre d'articles, les termes présents dans plus de MAX_DF des
+# documents sont ignorés : ils ne discriminent rien et densifient les produits
+MAX_DF = 0.5
+MAX_DF_MIN_DOCS = 50
+TITLE_WEIGHT = 2
+
+TOKEN_RE = re.compile(r"[^\W\d_]{3,}")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def signature(title, content):
+    return hashlib.sha1(f"{title}\0{content}".encode('utf-8')).hexdigest()
+
+
+def build_matrix(documents):
+    """Matrice TF-IDF normalisée (une ligne par document, CSR float32)"""
+    vocabulary = {}
+    indptr, indices, counts = [0], [], []
+    for title, content in documents:
+        terms = {}
+        for token in tokenize(title) * TITLE_WEIGHT + tokenize(content):
+            column = vocabulary.setdefault(token, len(vocabulary))
+            terms[column] = terms.get(column, 0) + 1
+        indices.extend(terms)
+        counts.extend(terms.values())
+        indptr.append(len(indices))
+
+    n_docs = len(documents)
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(n_docs, max(len(vocabulary), 1)),
+    )
+    # tf sous-linéaire et idf lissé (mêmes formules que scikit-learn)
+    matrix.data = 1 + np.log(matrix.data)
+    df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+    if n_docs >= MAX_DF_MIN_DOCS:
+        idf[df > MAX_DF * n_docs] = 0
+    matrix = matrix @ sparse.diags(idf)
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix, dtype=np.float32)
+
+
+def _top_k(columns, scores, k):
+    keep = scores >= MIN_SCORE
+    columns, scores = columns[keep], scores[keep]
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[best], scores[best]
+    order = np.argsort(-scores, kind='stable')
+    return list(zip(columns[order].tolist(), scores[order].tolist()))
+
+
+def top_k_neighbors(matrix, rows, k=TOP_K, block_size=BLOCK_SIZE):
+    """Génère ``(ligne, [(colonne, score), ...])`` pour chaque ligne demandée"""
+    rows = list(rows)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        similarities = (matrix[block] @ matrix.T).tocsr()
+        for position, row in enumerate(block):
+            begin, end = similarities.indptr[position], similarities.indptr[position + 1]
+            columns = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            others = columns != row
+            yield row, _top_k(columns[others], scores[others], k)
+
+
+def _merge_changed(matrix, changed, other_rows, stored, k, block_size):
+    """Fusionne les scores des lignes modifiées dans les listes des autres lignes"""
+    changed_matrix = matrix[changed]
+    changed = np.asarray(changed)
+    for start in range(0, len(other_rows), block_size):
+        block = other_rows[start:start + block_size]
+        similarities = (matrix[block] @ changed_matrix.T).tocsr()
+        for position, row in enumerate(block):
+            begin, end = similarities.indptr[position], similarities.indptr[position + 1]
+            if begin == end:
+                continue
+            candidates = dict(stored.get(row, []))
+            candidates.update(zip(changed[similarities.indices[begin:end]].tolist(),
+                                  similarities.data[begin:end].tolist()))
+            candidates.pop(row, None)
+            merged = _top_k(
+                np.fromiter(candidates, dtype=np.int64, count=len(candidates)),
+                np.fromiter(candidates.values(), dtype=np.float64, count=len(candidates)),
+                k,
+            )
+            if merged != stored.get(row, []):
+                yield row, merged
+
+
+def _save(pks, items, signatures=None, batch_size=BLOCK_SIZE):
+    """Enregistre ``(ligne, voisins)`` par lots ; retourne le nombre de lignes écrites"""
+    saved, batch = 0, {}
+    for row, neighbors in items:
+        batch[row] = neighbors
+        if len(batch) == batch_size:
+            _save_batch(pks, batch, signatures)
+            saved, batch = saved + len(batch), {}
+    if batch:
+        _save_batch(pks, batch, signatures)
+        saved += len(batch)
+    return saved
+
+
+def _save_batch(pks, results, signatures):
+    """Remplace les voisins des lignes calculées (et leur état si ``signatures``)"""
+    article_ids = [pks[row] for row in results]
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=article_ids).delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(article_id=pks[row], related_id=pks[column], score=score, rank=rank)
+            for row, neighbors in results.items()
+            for rank, (column, score) in enumerate(neighbors)
+        ])
+        # Sans signatures, celles déjà enregistrées sont conservées
+        kept = {} if signatures else dict(
+            ArticleSimilarityState.objects.filter(article_id__in=article_ids).values_list('article_id', 'signature')
+        )
+        # Supprimer puis réinsérer : upsert portable (MySQL ne cible pas ``unique_fields``)
+        ArticleSimilarityState.objects.filter(article_id__in=article_ids).delete()
+        ArticleSimilarityState.objects.bulk_create([
+            ArticleSimilarityState(
+                article_id=pks[row],
+                signature=signatures[row] if signatures else kept.get(pks[row], ''),
+                neighbor_count=len(neighbors),
+            )
+            for row, neighbors in results.items()
+        ])
+
+
+def build_related(full=False, k=TOP_K, block_size=BLOCK_SIZE):
+    """Reconstruit la table ``RelatedArticle`` (incrémental par défaut)"""
+    pks, documents, signatures = [], [], []
+    for pk, title, content in Article.objects.order_by('pk').values_list('pk', 'title', 'content').iterator():
+        pks.append(pk)
+        documents.append((title, content))
+        signatures.append(signature(title, content))
+    if not pks:
+        return {'articles': 0, 'recomputed': 0, 'merged': 0}
+
+    row_of = {pk: row for row, pk in enumerate(pks)}
+    states = dict(
+        (article_id, (sig, count))
+        for article_id, sig, count in ArticleSimilarityState.objects.values_list('article_id', 'signature', 'neighbor_count')
+    )
+    current_counts = dict(
+        RelatedArticle.objects.values('article_id').annotate(n=Count('id')).values_list('article_id', 'n')
+    )
+
+    if full:
+        changed = list(range(len(pks)))
+    else:
+        changed = [row for row, pk in enumerate(pks) if states.get(pk, (None,))[0] != signatures[row]]
+    changed_ids = [pks[row] for row in changed]
+
+    recompute = set(changed)
+    # Listes amputées par une suppression, ou contenant un article modifié dont le score a pu baisser
+    recompute.update(
+        row_of[pk] for pk, (sig, count) in states.items()
+        if pk in row_of and current_counts.get(pk, 0) < count
+    )
+    if not full:
+        recompute.update(
+            row_of[pk] for pk in RelatedArticle.objects.filter(related_id__in=changed_ids)
+            .values_list('article_id', flat=True).distinct() if pk in row_of
+        )
+
+    matrix = build_matrix(documents)
+    recomputed = _save(pks, top_k_neighbors(matrix, sorted(recompute), k, block_size), signatures, block_size)
+
+    merged = 0
+    other_rows = [row for row in range(len(pks)) if row not in recompute]
+    if changed and other_rows:
+        stored = {}
+        for article_id, related_id, score in RelatedArticle.objects.filter(
+            article_id__in=[pks[row] for row in other_rows]
+        ).values_list('article_id', 'related_id', 'score'):
+            if related_id in row_of:
+                stored.setdefault(row_of[article_id], []).append((row_of[related_id], score))
+        for neighbors in stored.values():
+            neighbors.sort(key=lambda item: -item[1])
+        merged = _save(pks, _merge_changed(matrix, changed, other_rows, stored, k, block_size),
+                       batch_size=block_size)
+
+    return {'articles': len(pks), 'recomputed': recomputed, 'merged': merged}
@@ -0,0 +1,155 @@
+"""Recherche plein texte classée sur les articles (titre + contenu).
+
+Sur MySQL, l'index FULLTEXT ``blog_article_fulltext_idx`` est interrogé par
+``MATCH (title, content) AGAINST (... IN NATURAL LANGUAGE MODE)``. Les autres
+bases (SQLite en tests) utilisent l'index inversé ``ArticleSearchTerm``,
+maintenu à l'enregistrement de l'article, avec le même principe de score
+(tf × idf², comme InnoDB) et la même sémantique « au moins un des termes ».
+
+Dans les deux cas, ``ranked_rows`` renvoie un queryset de dicts
+``{'article_id', 'score'}`` triés par pertinence, paginable tel quel ;
+``load_results`` charge ensuite uniquement les articles de la page.
+"""
+import math
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+from .models import Article, ArticleSearchTerm
+
+# Même longueur minimale que innodb_ft_min_token_size
+TOKEN_RE = re.compile(r"\w{3,}")
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 10
+SNIPPET_LENGTH = 200
+INDEXED_FIELDS = {'title', 'content'}
+
+MATCH_SQL = "MATCH (blog_article.title, blog_article.content) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+
+
+def uses_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower())]
+
+
+def query_terms(query):
+    """Termes distincts de la requête, dans l'ordre de saisie"""
+    return list(dict.fromkeys(tokenize(query or '')))[:MAX_QUERY_TERMS]
+
+
+def _index_rows(article):
+    counts = {}
+    for token in tokenize(f"{article.title} {article.content}"):
+        counts[token] = counts.get(token, 0) + 1
+    return [ArticleSearchTerm(term=term, article_id=article.pk, count=count) for term, count in counts.items()]
+
+
+def index_article(article):
+    """(Ré)indexe un article dans ArticleSearchTerm (bases sans FULLTEXT)"""
+    with transaction.atomic():
+        ArticleSearchTerm.objects.filter(article_id=article.pk).delete()
+        ArticleSearchTerm.objects.bulk_create(_index_rows(article))
+
+
+def rebuild_index(batch_size=500):
+    """Reconstruit tout l'index inversé ; retourne le nombre d'articles indexés"""
+    indexed = 0
+    ArticleSearchTerm.objects.all().delete()
+    articles = Article.objects.order_by('pk').only('pk', 'title', 'content')
+    batch = []
+    for article in articles.iterator(chunk_size=batch_size):
+        batch.extend(_index_rows(article))
+        indexed += 1
+        if indexed % batch_size == 0:
+            ArticleSearchTerm.objects.bulk_create(batch, batch_size=2000)
+            batch = []
+    ArticleSearchTerm.objects.bulk_create(batch, batch_size=2000)
+    return indexed
+
+
+def ranked_rows(query):
+    """Queryset ``{'article_id', 'score'}`` trié par pertinence décroissante"""
+    terms = query_terms(query)
+    if not terms:
+        return ArticleSearchTerm.objects.none().values('article_id')
+
+    if uses_fulltext():
+        return Article.objects.annotate(
+            score=RawSQL(MATCH_SQL, [' '.join(terms)], output_field=FloatField())
+        ).filter(score__gt=0).order_by('-score', '-pk').values('score', article_id=F('pk'))
+
+    # idf calculé une fois par terme : log10(1 + N / df), toujours positif
+    total = Article.objects.count()
+    frequencies = dict(
+        ArticleSearchTerm.objects.filter(term__in=terms).values_list('term').annotate(df=Count('id'))
+    )
+    if not frequencies:
+        return ArticleSearchTerm.objects.none().values('article_id')
+    weights = {term: math.log10(1 + total / df) ** 2 for term, df in frequencies.items()}
+    score = Sum(
+        Case(
+            *(When(term=term, then=F('count') * Value(weight)) for term, weight in weights.items()),
+            output_field=FloatField(),
+        )
+    )
+    return ArticleSearchTerm.objects.filter(term__in=list(weights)).values('article_id').annotate(
+        score=score
+    ).order_by('-score', '-article_id')
+
+
+def filter_articles(queryset, query):
+    """Restreint un queryset d'articles à ceux qui correspondent à la requête (admin).
+
+    Sur MySQL, ``MATCH`` est posé sur le queryset lui-même : dans une sous-requête
+    ``pk__in``, Django renomme la table (``U0``) et ``MATCH_SQL`` ne la trouverait plus.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    if uses_fulltext():
+        return queryset.alias(
+            score=RawSQL(MATCH_SQL, [' '.join(terms)], output_field=FloatField())
+        ).filter(score__gt=0)
+    return queryset.filter(pk__in=ranked_rows(query).values('article_id'))
+
+
+def highlight(text, terms, length=SNIPPET_LENGTH):
+    """Extrait autour de la première occurrence, termes entourés de ``<mark>``"""
+    if not terms:
+        return escape(text[:length])
+    pattern = re.compile(r"\b(%s)\b" % '|'.join(map(re.escape, terms)), re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - length // 4) if match else 0
+    fragment = text[start:start + length]
+
+    parts, position = [], 0
+    for found in pattern.finditer(fragment):
+        parts.append(escape(fragment[position:found.start()]))
+        parts.append(format_html('<mark>{}</mark>', found.group()))
+        position = found.end()
+    parts.append(escape(fragment[position:]))
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if start + length < len(text) else ''
+    return mark_safe(prefix + ''.join(parts) + suffix)
+
+
+def load_results(rows, query):
+    """Charge les articles d'une page de ``ranked_rows`` avec score et extrait surligné"""
+    rows = list(rows)
+    terms = query_terms(query)
+    articles = Article.objects.select_related('author').in_bulk([row['article_id'] for row in rows])
+    results = []
+    for row in rows:
+        article = articles.get(row['article_id'])
+        if article is None:
+            continue
+        article.search_score = row['score']
+        article.snippet = highlight(article.content, terms)
+        results.append(article)
+    return results
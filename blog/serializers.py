@@ -1,19 +1,34 @@
 from rest_framework import serializers
 from .models import Article, Comment
 from django.contrib.auth.models import User
+from tp_django.api import SparseFieldsetsSerializerMixin
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     class Meta:
         model = Comment
         fields = ['id', 'article', 'author', 'author_username', 'content', 'created_at']
         read_only_fields = ['author', 'created_at']
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     comments = CommentSerializer(many=True, read_only=True)
     image = serializers.ImageField(required=False, allow_null=True)
     class Meta:
         model = Article
-        fields = ['id', 'title', 'content', 'author', 'author_username', 'created_at', 'image', 'comments']
-        read_only_fields = ['author', 'created_at']
\ No newline at end of file
+        fields = ['id', 'title', 'content', 'excerpt', 'author', 'author_username', 'created_at', 'image', 'comments']
+        read_only_fields = ['author', 'created_at', 'excerpt']
+
+class ArticleListSerializer(ArticleSerializer):
+    """Version liste : l'extrait stocké remplace le contenu complet"""
+    class Meta(ArticleSerializer.Meta):
+        fields = ['id', 'title', 'excerpt', 'author', 'author_username', 'created_at', 'image', 'comments']
+        read_only_fields = ['author', 'created_at', 'excerpt']
+
+class ArticleSearchResultSerializer(ArticleListSerializer):
+    """Résultat de recherche : score de pertinence et extrait surligné (HTML)"""
+    score = serializers.FloatField(source='search_score', read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(ArticleListSerializer.Meta):
+        fields = ['id', 'title', 'excerpt', 'author', 'author_username', 'created_at', 'image', 'score', 'snippet']
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from polls.models import Question
+from tp_django.cache import tiered
+from .feeds import KINDS, refresh_entry, remove_entry
+from .models import Article
+from . import autocomplete, search
+
+
+def _schedule_refresh(kind, instance, update_fields):
+    # Un save partiel qui ne touche pas au contenu du flux (ex. image_renditions) est ignoré
+    if update_fields is not None and not set(update_fields) & KINDS[kind]['fields']:
+        return
+    transaction.on_commit(lambda: refresh_entry(kind, instance), robust=True)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, update_fields=None, **kwargs):
+    _schedule_refresh('articles', instance, update_fields)
+
+
+@receiver(post_save, sender=Article)
+def article_search_index(sender, instance, update_fields=None, **kwargs):
+    # L'index FULLTEXT de MySQL se maintient seul ; ailleurs on met à jour l'index inversé
+    if search.uses_fulltext():
+        return
+    if update_fields is not None and not set(update_fields) & search.INDEXED_FIELDS:
+        return
+    search.index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_entry('articles', pk), robust=True)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, update_fields=None, **kwargs):
+    _schedule_refresh('polls', instance, update_fields)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_entry('polls', pk), robust=True)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Question)
+def autocomplete_saved(sender, instance, update_fields=None, **kwargs):
+    kind = 'article' if sender is Article else 'poll'
+    model, field, _ = autocomplete.SOURCES[kind]
+    if update_fields is not None and field not in update_fields:
+        return
+    transaction.on_commit(lambda: autocomplete.index.add(kind, instance.pk, getattr(instance, field)), robust=True)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Question)
+def autocomplete_deleted(sender, instance, **kwargs):
+    kind, pk = ('article' if sender is Article else 'poll'), instance.pk
+    transaction.on_commit(lambda: autocomplete.index.remove(kind, pk), robust=True)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def home_changed(sender, **kwargs):
+    # Tout de suite, puis après le commit : un autre worker a pu recalculer
+    # l'accueil avec l'état d'avant la transaction
+    tiered.bump('blog:home')
+    transaction.on_commit(lambda: tiered.bump('blog:home'), robust=True)
@@ -652,3 +652,656 @@ class BlogAPITestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.article.refresh_from_db()
         self.assertEqual(self.article.title, 'Fully Updated Title')
+
+
+class ArticleImageRenditionsTest(TestCase):
+    """Tests pour les déclinaisons responsive des images"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = Article.objects.create(
+            title='Article with Image',
+            content='Content',
+            author=self.user,
+            image='articles/sample'
+        )
+
+    def _image_bytes(self, width=1200, height=800):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), color='blue').save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def test_render_variants_does_not_upscale(self):
+        """Les largeurs supérieures à l'original ne sont pas générées"""
+        from blog.images import render_variants
+
+        variants = render_variants(self._image_bytes(width=500, height=250), widths=(320, 640, 960))
+
+        self.assertEqual(
+            sorted((fmt, width) for fmt, width, _ in variants),
+            [('jpeg', 320), ('jpeg', 500), ('webp', 320), ('webp', 500)]
+        )
+        fmt, width, data = variants[0]
+        self.assertEqual(Image.open(BytesIO(data)).size, (320, 160))
+
+    def test_generate_renditions_stores_files_and_srcset(self):
+        """Test génération, stockage et srcset"""
+        from django.test import override_settings
+        from blog.images import generate_renditions
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            generate_renditions(self.article, self._image_bytes())
+
+            self.article.refresh_from_db()
+            self.assertEqual(set(self.article.image_renditions), {'webp', 'jpeg'})
+            self.assertEqual(set(self.article.image_renditions['webp']), {'320', '640', '960'})
+            self.assertIn('320w', self.article.image_srcset_webp)
+            self.assertIn('.jpeg 960w', self.article.image_srcset_jpeg)
+
+            response = self.client.get(reverse('blog:home'))
+            self.assertContains(response, 'type="image/webp"')
+
+    def test_build_renditions_command_backfill(self):
+        """Test commande de backfill sans pool"""
+        from io import StringIO
+        from unittest.mock import patch
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('blog.management.commands.build_article_renditions.load_source',
+                      return_value=self._image_bytes()):
+            call_command('build_article_renditions', workers=1, stdout=StringIO())
+
+        self.article.refresh_from_db()
+        self.assertIn('jpeg', self.article.image_renditions)
+
+
+class ArticleExcerptTest(TestCase):
+    """Tests pour l'extrait stocké et le chargement différé du contenu"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = Article.objects.create(title='Long', content='x' * 500, author=self.user)
+
+    def test_excerpt_maintained_on_save(self):
+        """Test que l'extrait suit le contenu"""
+        self.assertEqual(self.article.excerpt, 'x' * 150 + '...')
+
+        self.article.content = 'Court'
+        self.article.save(update_fields=['content'])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.excerpt, 'Court')
+        self.assertEqual(self.article.summary, 'Court')
+
+    def test_summary_never_loads_deferred_content(self):
+        """Test qu'un article sans extrait, contenu différé, ne déclenche pas de requête"""
+        Article.objects.filter(pk=self.article.pk).update(excerpt='')
+
+        deferred = Article.objects.defer('content').get(pk=self.article.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(deferred.summary, '')
+        self.assertEqual(Article.objects.get(pk=self.article.pk).summary, 'x' * 150 + '...')
+
+    def test_home_defers_content(self):
+        """Test que la home ne charge pas la colonne content"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:home'))
+
+        self.assertContains(response, 'x' * 20)
+        article_queries = [q['sql'] for q in queries if 'FROM "blog_article"' in q['sql']]
+        self.assertEqual(len(article_queries), 1)
+        self.assertNotIn('"blog_article"."content"', article_queries[0])
+
+    def test_api_list_returns_excerpt(self):
+        """Test que la liste API expose l'extrait au lieu du contenu"""
+        response = self.client.get('/api/articles/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('content', response.data[0])
+        self.assertEqual(response.data[0]['excerpt'], 'x' * 150 + '...')
+
+    def test_backfill_excerpts_command(self):
+        """Test de la commande de backfill"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        Article.objects.filter(pk=self.article.pk).update(excerpt='')
+        call_command('backfill_excerpts', stdout=StringIO())
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.excerpt, 'x' * 150 + '...')
+
+
+class SparseFieldsetsBlogAPITest(TestCase):
+    """Tests pour ?fields= sur l'API blog"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = Article.objects.create(title='Sparse', content='Body', author=self.user)
+        Comment.objects.create(article=self.article, author=self.user, content='First')
+        self.client = APIClient()
+
+    def test_fields_with_nested_comments(self):
+        """Test que les colonnes et relations suivent les champs demandés"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/articles/?fields=title,author_username,comments.content')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0], {
+            'title': 'Sparse',
+            'author_username': 'testuser',
+            'comments': [{'content': 'First'}],
+        })
+        blog_queries = [q['sql'] for q in queries if '"blog_' in q['sql']]
+        self.assertEqual(len(blog_queries), 2)
+        self.assertNotIn('"blog_article"."excerpt"', blog_queries[0])
+
+
+    def test_full_list_eager_loads_comment_authors(self):
+        """Test que les auteurs des commentaires sont joints au prefetch, pas chargés un par un"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(3):
+            other = User.objects.create_user(username=f'reader{i}', password='testpass123')
+            Comment.objects.create(article=self.article, author=other, content=f'Reply {i}')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/articles/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data[0]['comments']), 4)
+        blog_queries = [q['sql'] for q in queries if '"blog_' in q['sql'] or '"auth_user"' in q['sql']]
+        self.assertEqual(len(blog_queries), 2)
+        self.assertIn('"auth_user"', blog_queries[1])
+
+class BulkBlogAPITest(TestCase):
+    """Tests pour les endpoints groupés de l'API blog"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = Article.objects.create(title='First', content='Body', author=self.user)
+        self.other = Article.objects.create(title='Second', content='Body', author=self.user)
+        self.client = APIClient()
+
+    def test_bulk_create_comments_with_item_errors(self):
+        """Test création groupée avec erreurs par élément"""
+        self.client.force_authenticate(user=self.user)
+
+        data = [
+            {'article': self.article.id, 'content': 'One'},
+            {'article': 9999, 'content': 'Orphan'},
+            {'article': self.other.id, 'content': 'Two'},
+            {'article': self.article.id},
+        ]
+        response = self.client.post('/api/comments/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([item['index'] for item in response.data['created']], [0, 2])
+        self.assertEqual([item['index'] for item in response.data['errors']], [1, 3])
+        self.assertIn('article', response.data['errors'][0]['errors'])
+        self.assertEqual(Comment.objects.filter(author=self.user).count(), 2)
+
+    def test_bulk_create_comments_size_limit(self):
+        """Test de la limite de taille"""
+        from blog.views_api import CommentViewSet
+        self.client.force_authenticate(user=self.user)
+
+        data = [{'article': self.article.id, 'content': 'x'}] * (CommentViewSet.bulk_max_items + 1)
+        response = self.client.post('/api/comments/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_bulk_create_comments_charges_one_token_per_item(self):
+        """Test que la limitation de débit compte chaque commentaire du lot"""
+        from unittest import mock
+        from tp_django import throttling
+        self.client.force_authenticate(user=self.user)
+
+        data = [{'article': self.article.id, 'content': 'x'}] * 2
+        with mock.patch.dict(throttling._buckets, {'comment': throttling.TokenBucket('comment', '3/min')}):
+            self.assertEqual(self.client.post('/api/comments/bulk/', data, format='json').status_code, 201)
+            response = self.client.post('/api/comments/bulk/', data, format='json')
+            self.assertEqual(response.status_code, 429)
+            # Le jeton restant suffit à un commentaire seul
+            self.assertEqual(self.client.post('/api/comments/', data[0], format='json').status_code, 201)
+
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_bulk_create_comments_larger_than_bucket_is_rejected(self):
+        """Test qu'un lot plus grand que la capacité du seau est refusé (400), pas mis en attente (429)"""
+        from unittest import mock
+        from tp_django import throttling
+        self.client.force_authenticate(user=self.user)
+
+        data = [{'article': self.article.id, 'content': 'x'}] * 4
+        with mock.patch.dict(throttling._buckets, {'comment': throttling.TokenBucket('comment', '3/min')}):
+            response = self.client.post('/api/comments/bulk/', data, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Maximum 3', response.data['error'])
+            # Aucun jeton dépensé : un lot à la capacité passe encore
+            self.assertEqual(self.client.post('/api/comments/bulk/', data[:3], format='json').status_code, 201)
+
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_bulk_create_requires_authentication(self):
+        """Test création groupée sans authentification"""
+        response = self.client.post('/api/comments/bulk/', [{'article': self.article.id, 'content': 'x'}], format='json')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_bulk_retrieve_articles(self):
+        """Test GET /api/articles/bulk/?ids="""
+        response = self.client.get(f'/api/articles/bulk/?ids={self.other.id},{self.article.id},9999,abc')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['title'] for a in response.data['results']], ['Second', 'First'])
+        self.assertEqual(
+            response.data['errors'],
+            [{'id': 'abc', 'error': 'Identifiant invalide.'}, {'id': 9999, 'error': 'Introuvable.'}]
+        )
+
+
+class PrerenderedFeedsTest(TestCase):
+    """Tests pour les flux RSS/Atom et le sitemap pré-générés"""
+
+    def setUp(self):
+        self.feeds_root = tempfile.mkdtemp()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_publish_writes_entry_and_feeds(self):
+        """Test que la publication écrit le fragment et les fichiers"""
+        import os
+        from django.test import override_settings
+
+        with override_settings(FEEDS_ROOT=self.feeds_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                article = Article.objects.create(title='Feed me', content='Body', author=self.user)
+
+            self.assertTrue(os.path.exists(os.path.join(self.feeds_root, 'entries', 'articles', f'{article.pk}.rss.xml')))
+            with open(os.path.join(self.feeds_root, 'articles.atom.xml')) as source:
+                self.assertIn('Feed me', source.read())
+            # Pas encore de sitemap : assemblé tout de suite
+            response = self.client.get(reverse('blog:sitemap'))
+            self.assertIn(f'/article/{article.pk}/', b''.join(response.streaming_content).decode())
+            self.assertFalse(os.path.exists(os.path.join(self.feeds_root, 'sitemap.dirty')))
+
+    def test_save_does_not_reassemble_sitemap(self):
+        """Test qu'une écriture ne relit pas tout le sitemap, et que lastmod suit la modification"""
+        import datetime
+        import os
+        from io import StringIO
+        from django.core.management import call_command
+        from unittest.mock import patch
+        from django.test import override_settings
+        from django.utils import timezone
+
+        with override_settings(FEEDS_ROOT=self.feeds_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                article = Article.objects.create(title='Ancien', content='Body', author=self.user)
+            Article.objects.filter(pk=article.pk).update(created_at=timezone.now() - datetime.timedelta(days=30))
+            article.refresh_from_db()
+
+            # Moins de FEEDS_SITEMAP_INTERVAL après l'assemblage : l'ancien sitemap reste servi
+            article.title = 'Modifié'
+            with patch('blog.feeds.assemble_sitemap') as assemble, self.captureOnCommitCallbacks(execute=True):
+                article.save()
+            assemble.assert_not_called()
+            self.assertTrue(os.path.exists(os.path.join(self.feeds_root, 'sitemap.dirty')))
+
+            call_command('build_feeds', '--sitemap', stdout=StringIO())
+            body = b''.join(self.client.get(reverse('blog:sitemap')).streaming_content).decode()
+            self.assertIn(f'<lastmod>{article.updated_at.date().isoformat()}</lastmod>', body)
+            self.assertNotIn(f'<lastmod>{article.created_at.date().isoformat()}</lastmod>', body)
+
+    def test_sitemap_assembled_from_fragments_at_most_once_per_interval(self):
+        """Test du sitemap : assemblé sans requête, pas plus d'une fois par FEEDS_SITEMAP_INTERVAL"""
+        import os
+        import time
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        from blog import feeds
+
+        with override_settings(FEEDS_ROOT=self.feeds_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                first = Article.objects.create(title='Premier', content='Body', author=self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                second = Article.objects.create(title='Second', content='Body', author=self.user)
+            with open(feeds.sitemap_path()) as source:
+                self.assertNotIn(f'/article/{second.pk}/', source.read())
+
+            later = os.path.getmtime(feeds.sitemap_path()) + feeds.SITEMAP_INTERVAL
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(feeds.assemble_sitemap_if_due(now=later))
+            self.assertEqual(len(queries), 0)
+            self.assertFalse(feeds.assemble_sitemap_if_due(now=time.time() + 2 * feeds.SITEMAP_INTERVAL))
+            with open(feeds.sitemap_path()) as source:
+                body = source.read()
+            self.assertLess(body.index(f'/article/{second.pk}/'), body.index(f'/article/{first.pk}/'))
+
+    def test_tests_write_feeds_outside_repository(self):
+        """Test que le lanceur de tests redirige FEEDS_ROOT hors du dépôt"""
+        import os
+        from django.conf import settings
+
+        self.assertNotEqual(os.path.realpath(settings.FEEDS_ROOT), os.path.realpath(settings.BASE_DIR / 'feeds'))
+
+    def test_only_changed_entry_is_rerendered(self):
+        """Test qu'une modification ne re-rend que l'entrée concernée"""
+        from unittest.mock import patch
+        from django.test import override_settings
+        from blog import feeds
+
+        with override_settings(FEEDS_ROOT=self.feeds_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                first = Article.objects.create(title='First', content='Body', author=self.user)
+                Article.objects.create(title='Second', content='Body', author=self.user)
+
+            first.title = 'First edited'
+            with patch('blog.feeds.render_entry', wraps=feeds.render_entry) as render:
+                with self.captureOnCommitCallbacks(execute=True):
+                    first.save()
+
+            self.assertEqual(render.call_count, 1)
+            response = self.client.get(reverse('blog:feed', args=['articles.rss.xml']))
+            body = b''.join(response.streaming_content).decode()
+            self.assertIn('First edited', body)
+            self.assertIn('Second', body)
+
+    def test_feed_view_etag_and_cache_headers(self):
+        """Test des en-têtes ETag / Cache-Control et du 304"""
+        from io import StringIO
+        from unittest.mock import patch
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        with override_settings(FEEDS_ROOT=self.feeds_root):
+            Article.objects.create(title='Cached', content='Body', author=self.user)
+            # Rien d'assemblé (on_commit non exécuté) : la vue ne génère pas le fichier
+            with patch('blog.feeds.assemble_sitemap') as assemble:
+                response = self.client.get(reverse('blog:sitemap'))
+            assemble.assert_not_called()
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response)
+
+            call_command('build_feeds', stdout=StringIO())
+            response = self.client.get(reverse('blog:sitemap'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/xml; charset=utf-8')
+            self.assertIn('max-age=', response['Cache-Control'])
+
+            response = self.client.get(reverse('blog:sitemap'), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_unknown_feed_returns_404(self):
+        """Test d'un flux inexistant"""
+        response = self.client.get(reverse('blog:feed', args=['secret.xml']))
+        self.assertEqual(response.status_code, 404)
+
+
+class RelatedArticlesTest(TestCase):
+    """Tests pour les articles similaires pré-calculés"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.django = Article.objects.create(
+            title='Django ORM', content='Les requêtes Django ORM et les querysets Django', author=self.user
+        )
+        self.querysets = Article.objects.create(
+            title='Querysets avancés', content='Optimiser les querysets du ORM Django', author=self.user
+        )
+        self.cuisine = Article.objects.create(
+            title='Recette de tarte', content='Une tarte aux pommes et cannelle', author=self.user
+        )
+
+    def test_build_related_and_detail_view(self):
+        """Test du calcul et de l'affichage dans article_detail"""
+        from blog.models import RelatedArticle
+        from blog.related import build_related
+
+        stats = build_related()
+
+        self.assertEqual(stats['recomputed'], 3)
+        related = RelatedArticle.objects.filter(article=self.django)
+        self.assertEqual([link.related for link in related], [self.querysets])
+
+        response = self.client.get(reverse('blog:article_detail', args=[self.django.id]))
+        self.assertContains(response, 'Articles similaires')
+        self.assertContains(response, 'Querysets avancés')
+
+    def test_incremental_rebuild_only_recomputes_changes(self):
+        """Test que seuls les articles nouveaux ou modifiés sont recalculés"""
+        from blog.models import RelatedArticle
+        from blog.related import build_related
+
+        build_related()
+        self.assertEqual(build_related()['recomputed'], 0)
+
+        tarts = Article.objects.create(
+            title='Tarte aux pommes', content='Recette de tarte aux pommes', author=self.user
+        )
+        stats = build_related()
+
+        self.assertEqual(stats['recomputed'], 1)
+        self.assertEqual(stats['merged'], 1)
+        self.assertEqual(RelatedArticle.objects.get(article=self.cuisine).related, tarts)
+        self.assertFalse(RelatedArticle.objects.filter(article=self.django, related=tarts).exists())
+
+    def test_incremental_rebuild_without_targeted_upsert(self):
+        """Test sans ON CONFLICT ciblé (MySQL) : les signatures non recalculées sont conservées"""
+        from unittest import mock
+        from django.db import connection
+        from blog.models import ArticleSimilarityState
+        from blog.related import build_related
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            build_related()
+            signature = ArticleSimilarityState.objects.get(article=self.cuisine).signature
+            Article.objects.create(title='Tarte aux pommes', content='Recette de tarte aux pommes', author=self.user)
+            stats = build_related()
+
+        self.assertEqual(stats['merged'], 1)
+        state = ArticleSimilarityState.objects.get(article=self.cuisine)
+        self.assertEqual(state.signature, signature)
+        self.assertEqual(state.neighbor_count, 1)
+        self.assertEqual(build_related()['recomputed'], 0)
+
+    def test_build_related_articles_command(self):
+        """Test de la commande"""
+        from io import StringIO
+        from django.core.management import call_command
+
+        output = StringIO()
+        call_command('build_related_articles', '--full', stdout=output)
+        self.assertIn('3 artículos vectorizados', output.getvalue())
+
+
+class ArticleSearchTest(TestCase):
+    """Tests pour la recherche plein texte (index inversé sur SQLite)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.orm = Article.objects.create(
+            title='Django ORM', content='Les querysets Django et les requêtes ORM, encore Django', author=self.user
+        )
+        self.templates = Article.objects.create(
+            title='Templates', content='Les templates Django et le <b>HTML</b>', author=self.user
+        )
+        self.cuisine = Article.objects.create(
+            title='Recette de tarte', content='Une tarte aux pommes', author=self.user
+        )
+
+    def test_index_maintained_on_save(self):
+        """Test que l'index suit les modifications et suppressions"""
+        from blog.models import ArticleSearchTerm
+
+        self.assertTrue(ArticleSearchTerm.objects.filter(article=self.cuisine, term='pommes').exists())
+        self.cuisine.content = 'Une tarte aux poires'
+        self.cuisine.save()
+        self.assertFalse(ArticleSearchTerm.objects.filter(article=self.cuisine, term='pommes').exists())
+        self.assertEqual(ArticleSearchTerm.objects.get(article=self.cuisine, term='tarte').count, 2)
+
+        self.cuisine.delete()
+        self.assertFalse(ArticleSearchTerm.objects.filter(term='tarte').exists())
+
+    def test_ranked_results_and_highlight(self):
+        """Test du classement par pertinence et de l'extrait surligné"""
+        from blog.search import load_results, ranked_rows
+
+        rows = ranked_rows('django querysets')
+        self.assertEqual([row['article_id'] for row in rows], [self.orm.id, self.templates.id])
+
+        results = load_results(rows, 'django')
+        self.assertIn('<mark>Django</mark>', results[1].snippet)
+        self.assertIn('&lt;b&gt;HTML', results[1].snippet)
+        self.assertFalse(ranked_rows('introuvable').exists())
+        self.assertFalse(ranked_rows('a b').exists())
+
+    def test_search_view_paginates(self):
+        """Test de la vue de recherche paginée"""
+        for index in range(12):
+            Article.objects.create(title=f'Tarte {index}', content='Tarte du jour', author=self.user)
+
+        response = self.client.get(reverse('blog:search'), {'q': 'tarte'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'].paginator.count, 13)
+        self.assertEqual(len(response.context['results']), 10)
+        self.assertContains(response, '<mark>Tarte</mark>')
+
+        response = self.client.get(reverse('blog:search'), {'q': 'tarte', 'page': 2})
+        self.assertEqual(len(response.context['results']), 3)
+
+    def test_search_api(self):
+        """Test de l'endpoint API de recherche"""
+        response = self.client.get('/api/articles/search/', {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][0]['id'], self.orm.id)
+        self.assertIn('score', response.data['results'][0])
+        self.assertIn('<mark>', response.data['results'][0]['snippet'])
+
+    def test_admin_search_uses_index(self):
+        """Test que la recherche de l'admin passe par l'index"""
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        model_admin = site._registry[Article]
+        request = RequestFactory().get('/admin/blog/article/')
+        queryset, _ = model_admin.get_search_results(request, Article.objects.all(), 'pommes')
+        self.assertEqual(list(queryset), [self.cuisine])
+
+    def test_admin_search_fulltext_sql(self):
+        """Test que le MATCH de MySQL porte sur la table de la requête, pas sur une sous-requête aliasée"""
+        from unittest import mock
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        model_admin = site._registry[Article]
+        request = RequestFactory().get('/admin/blog/article/')
+        with mock.patch('blog.search.uses_fulltext', return_value=True):
+            queryset, _ = model_admin.get_search_results(request, Article.objects.all(), 'tarte pommes')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('MATCH (blog_article.title, blog_article.content) AGAINST (%s IN NATURAL LANGUAGE MODE)', sql)
+        self.assertIn('FROM "blog_article" WHERE', sql)
+        self.assertNotIn('U0', sql)
+        self.assertEqual(params[0], 'tarte pommes')
+
+
+class AutocompleteTest(TestCase):
+    """Tests pour l'autocomplétion en mémoire"""
+
+    def setUp(self):
+        from unittest import mock
+        from blog import autocomplete
+        from polls.models import Question
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = Article.objects.create(title='Été à Paris', content='Contenu', author=self.user)
+        self.question = Question.objects.create(question_text='Paris ou Lyon ?', author=self.user)
+        # Index neuf par test, chargé ici : le thread de fond ne verrait pas la transaction du test
+        self.index = autocomplete.PrefixIndex()
+        self.index.build()
+        patcher = mock.patch.object(autocomplete, 'index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookup_by_word_prefix_without_queries(self):
+        """Test de la recherche par début de mot, sans requête SQL une fois chargé"""
+        self.assertEqual(len(self.index.lookup('par')), 2)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('blog:autocomplete'), {'q': 'ete a'})
+        self.assertEqual(response.json()['results'], [{
+            'type': 'article', 'id': self.article.id, 'label': 'Été à Paris',
+            'url': reverse('blog:article_detail', args=[self.article.id]),
+        }])
+        self.assertEqual(self.index.lookup('lyo')[0]['type'], 'poll')
+        self.assertEqual(self.index.lookup('   '), [])
+
+    def test_limit_is_clamped(self):
+        """Test que limit reste entre 1 et MAX_RESULTS, même nul ou négatif"""
+        url = reverse('blog:autocomplete')
+        self.assertEqual(len(self.client.get(url, {'q': 'par', 'limit': 0}).json()['results']), 1)
+        self.assertEqual(len(self.client.get(url, {'q': 'par', 'limit': -5}).json()['results']), 1)
+        self.assertEqual(len(self.client.get(url, {'q': 'par', 'limit': 'x'}).json()['results']), 2)
+        self.assertEqual(self.index.lookup('par', limit=-1), [])
+
+    def test_index_loaded_in_background_thread(self):
+        """Test que la requête ne charge jamais l'index : un thread de fond s'en charge"""
+        from unittest import mock
+        from blog import autocomplete
+
+        index = autocomplete.PrefixIndex(max_age=60)
+        with mock.patch.object(autocomplete.threading, 'Thread') as thread, self.assertNumQueries(0):
+            self.assertEqual(index.lookup('par'), [])
+        thread.assert_called_once_with(target=index._run, name='autocomplete-index', daemon=True)
+        thread.return_value.start.assert_called_once_with()
+
+    def test_failed_reload_keeps_old_index(self):
+        """Test qu'un rechargement en échec laisse servir l'ancien index"""
+        from unittest import mock
+        from django.db import DatabaseError
+
+        self.index.max_age = 60
+        with mock.patch.object(self.index, 'build', side_effect=DatabaseError), \
+                mock.patch('blog.autocomplete.close_old_connections'), \
+                mock.patch('blog.autocomplete.time.sleep', side_effect=KeyboardInterrupt), \
+                self.assertLogs('blog.autocomplete', 'ERROR'):
+            with self.assertRaises(KeyboardInterrupt):
+                self.index._run()
+        self.index.max_age = None
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.index.lookup('par')), 2)
+
+    def test_signals_keep_index_current(self):
+        """Test que les créations, modifications et suppressions sont répercutées"""
+        with self.captureOnCommitCallbacks(execute=True):
+            created = Article.objects.create(title='Django avancé', content='Contenu', author=self.user)
+        self.assertEqual([item['id'] for item in self.index.lookup('avance')], [created.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'Hiver à Lyon'
+            self.article.save()
+        self.assertEqual([item['type'] for item in self.index.lookup('paris')], ['poll'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.delete()
+        self.assertEqual(self.index.lookup('paris'), [])
+        self.assertEqual(len(self.index.lookup('lyon')), 1)
@@ -11,8 +11,12 @@ app_name = "blog"
 urlpatterns = [
     path('', views.home, name='home'),
     path('article/<int:article_id>/', views.article_detail, name='article_detail'),
+    path('search/', views.search_articles, name='search'),
     path('post/', views.post_article, name='post_article'),
     path('comment/<int:article_id>/', views.post_comment, name='post_comment'),
     path('article/<int:article_id>/edit/', views.edit_article, name='edit_article'),
+    path('feeds/<str:filename>', views.feed, name='feed'),
+    path('sitemap.xml', views.feed, {'filename': 'sitemap.xml'}, name='sitemap'),
+    path('api/autocomplete/', views.autocomplete_titles, name='autocomplete'),
     path('api/', include(router.urls)),
 ]
\ No newline at end of file
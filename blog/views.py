@@ -1,23 +1,61 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Article, Comment
+from .models import Article, Comment, RelatedArticle
 from django.contrib.auth.decorators import login_required
 from .forms import ArticleForm, CommentForm
-from django.http import HttpResponseForbidden
+from .images import refresh_renditions
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.core.paginator import Paginator
+from django.conf import settings
+from tp_django.cache import tiered
+from tp_django.throttling import throttle
+from . import autocomplete, feeds, search
+import os
+
+RELATED_ARTICLES_LIMIT = 5
+SEARCH_PAGE_SIZE = 10
+HOME_CACHE_TIMEOUT = 60
 
 
 # Create your views here.
 def home(request):
-    articles = Article.objects.order_by('-created_at')
+    # Liste partagée entre visiteurs ; la version 'blog:home' change à chaque article écrit ou supprimé
+    articles = tiered.get_or_compute('articles', lambda: list(
+        Article.objects.defer('content').select_related('author').order_by('-created_at')
+    ), HOME_CACHE_TIMEOUT, namespace='blog:home')
     return render(request, "blog/home.html", {"articles": articles})
 
 def article_detail(request, article_id):
     article = get_object_or_404(Article, id=article_id)
     comments = Comment.objects.filter(article=article).order_by('-created_at')
+    # Voisins pré-calculés par build_related_articles : une seule requête indexée
+    related_articles = RelatedArticle.objects.filter(article=article).select_related('related').only(
+        'rank', 'related__id', 'related__title', 'related__excerpt', 'related__created_at'
+    ).order_by('rank')[:RELATED_ARTICLES_LIMIT]
     return render(request, "blog/article_detail.html", {
         "article": article,
-        "comments": comments
+        "comments": comments,
+        "related_articles": related_articles,
+    })
+
+def search_articles(request):
+    """Recherche classée par pertinence, seuls les articles de la page sont chargés"""
+    query = request.GET.get('q', '').strip()
+    page = Paginator(search.ranked_rows(query), SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, "blog/search.html", {
+        "query": query,
+        "page": page,
+        "results": search.load_results(page.object_list, query),
     })
 
+def autocomplete_titles(request):
+    """Suggestions pour la saisie au fil de l'eau : index mémoire, aucune requête SQL"""
+    try:
+        limit = max(1, min(int(request.GET.get('limit', autocomplete.MAX_RESULTS)), autocomplete.MAX_RESULTS))
+    except ValueError:
+        limit = autocomplete.MAX_RESULTS
+    return JsonResponse({'results': autocomplete.index.lookup(request.GET.get('q', ''), limit)})
+
 @login_required
 def post_article(request):
     if request.method == "POST":
@@ -26,12 +64,14 @@ def post_article(request):
             article = form.save(commit=False)
             article.author = request.user
             article.save()
+            refresh_renditions(article, request.FILES.get('image'))
             return redirect('blog:article_detail', article_id=article.id)
     else:
         form = ArticleForm()
     return render(request, "blog/post_article.html", {"form": form})
 
 @login_required
+@throttle('comment')
 def post_comment(request, article_id):
     article = get_object_or_404(Article, id=article_id)
     if request.method == "POST":
@@ -57,8 +97,32 @@ def edit_article(request, article_id):
         form = ArticleForm(request.POST, request.FILES, instance=article)
         if form.is_valid():
             form.save()
+            refresh_renditions(article, request.FILES.get('image'))
             return redirect('blog:article_detail', article_id=article.id)
     else:
         form = ArticleForm(instance=article)
 
     return render(request, "blog/edit_article.html", {"form": form, "article": article})
+
+
+def feed(request, filename):
+    """Sert un flux ou le sitemap pré-générés, avec ETag et cache long"""
+    content_type = feeds.served_files().get(filename)
+    if content_type is None:
+        raise Http404("Flux inconnu")
+
+    # Fichiers assemblés après les écritures ou par build_feeds : jamais ici
+    path = os.path.join(feeds.feeds_root(), filename)
+    try:
+        etag = feeds.file_etag(path)
+    except FileNotFoundError:
+        response = HttpResponse("Flux pas encore généré.", status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = '60'
+        return response
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'FEEDS_CACHE_MAX_AGE', 3600))
+    return response
@@ -1,7 +1,16 @@
-from drf_spectacular.utils import extend_schema
+from collections import Counter
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from accounts import activity
+from tp_django.api import BulkCreateMixin, BulkRetrieveMixin, SparseFieldsetsMixin
+from tp_django.throttling import CommentRateThrottle
 from .models import Article, Comment
-from .serializers import ArticleSerializer, CommentSerializer
+from .serializers import ArticleSerializer, ArticleListSerializer, ArticleSearchResultSerializer, CommentSerializer
+from .images import refresh_renditions
+from . import search
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -9,18 +18,61 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return True
         return obj.author == request.user
 
-class CommentViewSet(viewsets.ModelViewSet):
+class SearchPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+class CommentViewSet(SparseFieldsetsMixin, BulkCreateMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all().order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    throttle_classes = [CommentRateThrottle]
+    bulk_preload_fields = ('article',)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class ArticleViewSet(viewsets.ModelViewSet):
+    def get_bulk_save_kwargs(self):
+        return {'author': self.request.user}
+
+    def after_bulk_create(self, objects):
+        # Pas de post_save : les compteurs d'activité sont mis à jour ici, une fois par auteur
+        for author_id, count in Counter(comment.author_id for comment in objects).items():
+            activity.bump(author_id, comments=count)
+
+class ArticleViewSet(SparseFieldsetsMixin, BulkRetrieveMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all().order_by('-created_at')
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # La liste n'expose que l'extrait : inutile de transférer le contenu complet
+        if self.action == 'list':
+            queryset = queryset.defer('content')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ArticleListSerializer
+        if self.action == 'search':
+            return ArticleSearchResultSerializer
+        return super().get_serializer_class()
+
+    @extend_schema(parameters=[
+        OpenApiParameter('q', str, description='Termes recherchés dans le titre et le contenu'),
+        OpenApiParameter('page', int),
+    ])
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Recherche plein texte classée par pertinence, paginée"""
+        query = request.query_params.get('q', '')
+        paginator = SearchPagination()
+        rows = paginator.paginate_queryset(search.ranked_rows(query), request, view=self)
+        serializer = self.get_serializer(search.load_results(rows, query), many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @extend_schema(
         request={'multipart/form-data': ArticleSerializer}
     )
@@ -33,7 +85,12 @@ class ArticleViewSet(viewsets.ModelViewSet):
     )
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        article = serializer.save(author=self.request.user)
+        refresh_renditions(article, self.request.FILES.get('image'))
+
+    def perform_update(self, serializer):
+        article = serializer.save()
+        refresh_renditions(article, self.request.FILES.get('image'))
 
     @extend_schema(
         request={'multipart/form-data': ArticleSerializer}
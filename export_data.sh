@@ -2,10 +2,7 @@
 # Script para exportar datos de desarrollo a producción
 
 echo "Exportando datos de desarrollo..."
-python manage.py dumpdata --natural-foreign --natural-primary \
-    --exclude=contenttypes --exclude=auth.permission \
-    --exclude=sessions.session --exclude=admin.logentry \
-    > production_data.json
+python manage.py export_site production_data
 
-echo "Datos exportados a production_data.json"
-echo "En producción ejecuta: python manage.py loaddata production_data.json"
\ No newline at end of file
+echo "Datos exportados en production_data/ (NDJSON comprimido, un fichero por modelo)"
+echo "En producción ejecuta: python manage.py import_site production_data"
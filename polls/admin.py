@@ -11,11 +11,11 @@ class QuestionAdmin(admin.ModelAdmin):
         (None, {"fields": ["question_text"]}),
         ("Date information", {"fields": ["pub_date"], "classes": ["collapse"]}),
         ("Author information", {"fields": ["author"]}),
-        ("Status", {"fields": ["is_active"]}),
+        ("Status", {"fields": ["is_active", "kind"]}),
     ]
     inlines = [ChoiceInline]
-    list_display = ["question_text", "pub_date", "author", "is_active", "was_published_recently"]
-    list_filter = ["pub_date", "is_active", "author"]
+    list_display = ["question_text", "pub_date", "author", "is_active", "kind", "was_published_recently"]
+    list_filter = ["pub_date", "is_active", "kind", "author"]
     search_fields = ["question_text"]
     date_hierarchy = "pub_date"
 
@@ -0,0 +1,65 @@
+"""Enregistrement des choix d'un sondage par différence avec l'existant.
+
+Chaque option soumise est rapprochée d'un choix existant (par son id, sinon
+par son texte) : les choix rapprochés gardent leurs votes et ne sont mis à
+jour que si leur texte change, les nouvelles options sont insérées en un
+``bulk_create`` et les choix absents supprimés en une seule requête. Le tout
+tient en un nombre constant de requêtes, quel que soit le nombre d'options.
+"""
+from django.db import transaction
+from .models import Choice
+from . import ranked, results
+
+
+def submitted_choices(data):
+    """Options du formulaire : liste de ``(id ou None, texte)``, options vides ignorées"""
+    texts = data.getlist('choice_text')
+    ids = data.getlist('choice_id')
+    if len(ids) != len(texts):
+        # Formulaire sans ids (création, ancien formulaire) : rapprochement par texte
+        ids = [''] * len(texts)
+    return [
+        (int(choice_id) if choice_id.isdigit() else None, text.strip())
+        for choice_id, text in zip(ids, texts)
+        if text.strip()
+    ]
+
+
+def reconcile_choices(question, submitted):
+    """Aligne les choix de ``question`` sur ``submitted`` ; retourne (créés, modifiés, supprimés)"""
+    with transaction.atomic():
+        existing = {choice.pk: choice for choice in Choice.objects.filter(question=question)}
+        by_text = {}
+        for choice in existing.values():
+            by_text.setdefault(choice.choice_text, []).append(choice)
+
+        kept, to_create, to_update = set(), [], []
+        for choice_id, text in submitted:
+            choice = existing.get(choice_id)
+            if choice is None or choice.pk in kept:
+                # Pas d'id connu : premier choix libre portant le même texte
+                choice = next((c for c in by_text.get(text, []) if c.pk not in kept), None)
+            if choice is None:
+                to_create.append(Choice(question=question, choice_text=text))
+                continue
+            kept.add(choice.pk)
+            if choice.choice_text != text:
+                choice.choice_text = text
+                to_update.append(choice)
+
+        removed = [pk for pk in existing if pk not in kept]
+        if to_update:
+            Choice.objects.bulk_update(to_update, ['choice_text'])
+        if to_create:
+            Choice.objects.bulk_create(to_create)
+        if removed:
+            Choice.objects.filter(pk__in=removed).delete()
+
+        # bulk_create / bulk_update n'envoient pas de signaux : invalidation explicite
+        if to_update or to_create:
+            results.invalidate(question.pk)
+            ranked.invalidate(question.pk)
+            transaction.on_commit(
+                lambda: (results.invalidate(question.pk), ranked.invalidate(question.pk)), robust=True
+            )
+    return len(to_create), len(to_update), len(removed)
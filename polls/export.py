@@ -0,0 +1,99 @@
+"""Export CSV des sondages, en flux : la mémoire reste constante quelle que soit leur taille.
+
+Les lignes sont lues par paquets (``.iterator(chunk_size=...)``) et chaque ligne
+est encodée par ``csv.writer`` sur un pseudo-fichier qui renvoie la chaîne au
+lieu de l'écrire : la réponse est un générateur consommé par le serveur.
+"""
+import csv
+
+from django.db.models import F, FloatField, Sum, Value, Window
+from django.db.models.functions import Coalesce, NullIf, Round
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import Ballot, Choice, Vote
+from . import ranked
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-fichier pour ``csv.writer`` : ``write`` renvoie la ligne encodée"""
+
+    def write(self, value):
+        return value
+
+
+def _format(value):
+    if hasattr(value, 'isoformat'):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    return value
+
+
+def stream_rows(header, rows):
+    """Générateur de lignes CSV, BOM UTF-8 en tête pour les tableurs"""
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_format(value) for value in row])
+
+
+def csv_response(filename, header, rows):
+    response = StreamingHttpResponse(stream_rows(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _results_queryset(**filters):
+    total = Window(Sum('votes'), partition_by=[F('question_id')])
+    return Choice.objects.filter(**filters).annotate(
+        percentage=Coalesce(Round(F('votes') * 100.0 / NullIf(total, 0), 2), Value(0.0), output_field=FloatField()),
+    ).order_by('question_id', 'pk').values_list(
+        'question_id', 'question__question_text', 'question__pub_date', 'question__is_active',
+        'pk', 'choice_text', 'votes', 'percentage',
+    )
+
+
+RESULTS_HEADER = ['question_id', 'question', 'publiee_le', 'active', 'choice_id', 'choix', 'votes', 'pourcentage']
+
+
+def question_results(question):
+    """Résultats d'une question : une ligne par choix, ou par choix et par tour (classement)"""
+    if question.is_ranked:
+        texts = dict(question.choice_set.values_list('pk', 'choice_text'))
+        runoff = ranked.get_runoff(question.pk)
+        rows = (
+            (tour['round'], choice_id, texts.get(choice_id, ''), votes, choice_id in tour['eliminated'])
+            for tour in runoff['rounds'] for choice_id, votes in tour['counts'].items()
+        )
+        return csv_response(
+            f'sondage-{question.pk}-resultats.csv', ['tour', 'choice_id', 'choix', 'votes', 'elimine'], rows
+        )
+    rows = _results_queryset(question=question).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return csv_response(f'sondage-{question.pk}-resultats.csv', RESULTS_HEADER, rows)
+
+
+def question_votes(question):
+    """Historique des votes (ou bulletins) d'une question, du plus ancien au plus récent"""
+    if question.is_ranked:
+        texts = dict(question.choice_set.values_list('pk', 'choice_text'))
+        ballots = Ballot.objects.filter(question=question).order_by('created_at', 'pk').values_list(
+            'created_at', 'user__username', 'ranking'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        rows = (
+            (created_at, username or '', ' > '.join(texts.get(pk, '?') for pk in ranked.decode_ranking(data)))
+            for created_at, username, data in ballots
+        )
+        return csv_response(f'sondage-{question.pk}-votes.csv', ['date', 'utilisateur', 'classement'], rows)
+
+    votes = Vote.objects.filter(question=question).order_by('created_at', 'pk').values_list(
+        'created_at', 'user__username', 'choice_id', 'choice__choice_text'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    # Les votants anonymes restent anonymes : pas de cookie ni de session dans l'export
+    rows = ((created_at, username or '', choice_id, text) for created_at, username, choice_id, text in votes)
+    return csv_response(f'sondage-{question.pk}-votes.csv', ['date', 'utilisateur', 'choice_id', 'choix'], rows)
+
+
+def author_results(user):
+    """Résultats de tous les sondages d'un auteur"""
+    rows = _results_queryset(question__author=user).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return csv_response(f'sondages-{user.username}-resultats.csv', RESULTS_HEADER, rows)
@@ -15,6 +15,24 @@ class QuestionForm(forms.ModelForm):
             })
         }
 
+class NewQuestionForm(QuestionForm):
+    """Création : le type de sondage est choisi une fois pour toutes"""
+    class Meta(QuestionForm.Meta):
+        fields = QuestionForm.Meta.fields + ['kind']
+        widgets = {
+            **QuestionForm.Meta.widgets,
+            'kind': forms.Select(attrs={
+                'class': 'form-select'
+            })
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['kind'].required = False
+
+    def clean_kind(self):
+        return self.cleaned_data['kind'] or Question.SINGLE
+
 class ChoiceForm(forms.ModelForm):
     class Meta:
         model = Choice
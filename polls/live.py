@@ -0,0 +1,135 @@
+"""Résultats en direct par Server-Sent Events (ASGI).
+
+Un seul hub par processus : pour chaque question suivie, une tâche lit les
+résultats (``results.get_results``, donc le cache) toutes les
+``LIVE_RESULTS_INTERVAL_MS`` millisecondes et publie un instantané versionné.
+Chaque client n'envoie que les choix qui ont changé depuis son dernier envoi :
+les changements survenus entre deux envois sont fusionnés, et la base n'est
+lue qu'une fois par question et par intervalle, quel que soit le nombre
+d'abonnés. La tâche s'arrête quand le dernier abonné se déconnecte.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .models import Question
+from . import results
+
+INTERVAL = getattr(settings, 'LIVE_RESULTS_INTERVAL_MS', 1000) / 1000
+KEEPALIVE = 15
+RETRY_MS = 3000
+
+
+def load_snapshot(question_id):
+    """Votes et pourcentages par choix, ou None si la question n'existe plus"""
+    try:
+        payload = results.get_results(question_id)
+    except Question.DoesNotExist:
+        return None
+    return {
+        'total_votes': payload['total_votes'],
+        'is_active': payload['question']['is_active'],
+        'choices': {
+            result['choice']['id']: {'votes': result['choice']['votes'], 'percentage': result['percentage']}
+            for result in payload['results']
+        },
+    }
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _Channel:
+    """Instantané courant d'une question et abonnés en attente de changement"""
+
+    def __init__(self, question_id):
+        self.question_id = question_id
+        self.snapshot = None
+        self.version = 0
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def wait_for_change(self, version):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.version != version)
+
+    async def poll(self, interval):
+        while True:
+            snapshot = await sync_to_async(load_snapshot)(self.question_id)
+            if self.version == 0 or snapshot != self.snapshot:
+                async with self._changed:
+                    self.snapshot = snapshot
+                    self.version += 1
+                    self._changed.notify_all()
+            if snapshot is None:
+                return
+            await asyncio.sleep(interval)
+
+
+class ResultsHub:
+    """Diffusion des résultats : une tâche de lecture par question suivie"""
+
+    def __init__(self, interval=INTERVAL, keepalive=KEEPALIVE):
+        self.interval = interval
+        self.keepalive = keepalive
+        self._channels = {}
+
+    def _subscribe(self, question_id):
+        channel = self._channels.get(question_id)
+        if channel is None:
+            channel = self._channels[question_id] = _Channel(question_id)
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(channel.poll(self.interval))
+        channel.subscribers += 1
+        return channel
+
+    def _unsubscribe(self, channel):
+        channel.subscribers -= 1
+        if channel.subscribers == 0:
+            channel.task.cancel()
+            if self._channels.get(channel.question_id) is channel:
+                del self._channels[channel.question_id]
+
+    def subscriber_count(self, question_id):
+        channel = self._channels.get(question_id)
+        return channel.subscribers if channel else 0
+
+    async def stream(self, question_id):
+        """Flux SSE : un événement ``results`` complet, puis uniquement les deltas"""
+        channel = self._subscribe(question_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            version, previous = 0, None
+            while True:
+                try:
+                    await asyncio.wait_for(channel.wait_for_change(version), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                version, snapshot = channel.version, channel.snapshot
+                if snapshot is None:
+                    yield format_event('closed', {'question': question_id})
+                    return
+                sent = previous['choices'] if previous else {}
+                changed = {
+                    choice_id: values for choice_id, values in snapshot['choices'].items()
+                    if sent.get(choice_id) != values
+                }
+                removed = [choice_id for choice_id in sent if choice_id not in snapshot['choices']]
+                if previous is None or changed or removed or previous['is_active'] != snapshot['is_active']:
+                    yield format_event('results', {
+                        'question': question_id,
+                        'total_votes': snapshot['total_votes'],
+                        'is_active': snapshot['is_active'],
+                        'choices': changed,
+                        'removed': removed,
+                    })
+                previous = snapshot
+        finally:
+            self._unsubscribe(channel)
+
+
+hub = ResultsHub()
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_vote_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['is_active', '-pub_date'], name='question_active_pub_idx'),
+        ),
+    ]
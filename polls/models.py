@@ -7,10 +7,24 @@ from django.contrib import admin
 
 # Create your models here.
 class Question(models.Model):
+    SINGLE = 'single'
+    RANKED = 'ranked'
+    KIND_CHOICES = [
+        (SINGLE, 'Choix unique'),
+        (RANKED, 'Classement (vote alternatif)'),
+    ]
+
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField("date published", default=timezone.now)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=SINGLE)
+
+    class Meta:
+        indexes = [
+            # Listado paginado: filtro por estado y orden por fecha de publicación
+            models.Index(fields=['is_active', '-pub_date'], name='question_active_pub_idx'),
+        ]
 
     @admin.display(
         boolean=True,
@@ -29,10 +43,57 @@ class Question(models.Model):
         """Solo se puede votar si está activo"""
         return self.is_active
 
+    @property
+    def is_ranked(self):
+        return self.kind == self.RANKED
+
 class Choice(models.Model):
     question = models.ForeignKey(Question,
     on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
     votes = models.IntegerField(default=0)
     def __str__(self):
-        return self.choice_text
\ No newline at end of file
+        return self.choice_text
+
+class Vote(models.Model):
+    """Registro inmutable de cada voto: un solo voto por votante y por pregunta"""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    # "user:<id>" para los usuarios conectados, "visitor:<uuid>" o "session:<clave>" si no
+    voter_id = models.CharField(max_length=64)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'voter_id'], name='unique_vote_per_voter'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'created_at'], name='vote_question_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.voter_id} -> {self.choice_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Los votos nunca se modifican")
+        super().save(*args, **kwargs)
+
+
+class Ballot(models.Model):
+    """Papeleta de un sondeo por clasificación: ids de opciones en orden de preferencia"""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    voter_id = models.CharField(max_length=64)
+    # Tabla de ancho fijo (polls.ranked.BALLOT_WIDTH enteros de 32 bits), completada con ceros
+    ranking = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'voter_id'], name='unique_ballot_per_voter'),
+        ]
+
+    def __str__(self):
+        return f"{self.voter_id} -> {self.question_id}"
@@ -0,0 +1,151 @@
+"""Sondages à classement : bulletins compacts et dépouillement par vote alternatif (IRV).
+
+Un bulletin est un tableau de largeur fixe (``BALLOT_WIDTH`` entiers 32 bits)
+des ids de choix dans l'ordre de préférence, complété par des zéros. Tous les
+bulletins d'une question sont chargés en une matrice NumPy ; chaque tour
+compte les premières préférences avec ``bincount``, élimine le ou les choix
+les moins soutenus et fait avancer en un seul passage vectorisé les bulletins
+dont le choix courant vient d'être éliminé. Le résultat, tour par tour, est
+mis en cache jusqu'au prochain bulletin ou à la prochaine modification.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from tp_django.cache import tiered
+from .models import Ballot, Choice
+
+BALLOT_WIDTH = 16
+BALLOT_DTYPE = np.dtype('<i4')
+RANKED_CACHE_TIMEOUT = getattr(settings, 'POLL_RESULTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def cache_key(question_id):
+    return f"polls:runoff:{question_id}"
+
+
+def invalidate(*question_ids):
+    tiered.delete(*[cache_key(question_id) for question_id in question_ids])
+
+
+def encode_ranking(choice_ids):
+    """``[3, 1]`` -> 64 octets : ids dans l'ordre de préférence, complétés par des zéros"""
+    ranking = np.zeros(BALLOT_WIDTH, dtype=BALLOT_DTYPE)
+    ranking[:len(choice_ids)] = choice_ids
+    return ranking.tobytes()
+
+
+def decode_ranking(data):
+    return [int(choice_id) for choice_id in np.frombuffer(bytes(data), dtype=BALLOT_DTYPE) if choice_id]
+
+
+def clean_ranking(question, choice_ids):
+    """Ids de choix de la question, sans doublon, dans l'ordre : lève ValueError sinon"""
+    try:
+        ranking = [int(choice_id) for choice_id in choice_ids]
+    except (TypeError, ValueError):
+        raise ValueError("Classement invalide.")
+    if not ranking:
+        raise ValueError("Classez au moins un choix.")
+    if len(ranking) > BALLOT_WIDTH:
+        raise ValueError(f"Au plus {BALLOT_WIDTH} choix peuvent être classés.")
+    if len(set(ranking)) != len(ranking):
+        raise ValueError("Un choix ne peut être classé qu'une fois.")
+    known = set(Choice.objects.filter(question=question).values_list('pk', flat=True))
+    if not known.issuperset(ranking):
+        raise ValueError("Choix inconnu pour ce sondage.")
+    return ranking
+
+
+def cast_ballot(question, ranking, voter_id, user=None):
+    """Enregistre le bulletin ; False si ce votant a déjà voté pour cette question"""
+    try:
+        with transaction.atomic():
+            Ballot.objects.create(
+                question=question, ranking=encode_ranking(ranking), voter_id=voter_id,
+                user=user if user is not None and user.is_authenticated else None,
+            )
+    except IntegrityError:
+        return False
+    invalidate(question.pk)
+    transaction.on_commit(lambda: invalidate(question.pk), robust=True)
+    return True
+
+
+def load_ballots(question_id):
+    """Matrice ``(bulletins, BALLOT_WIDTH)`` des ids de choix"""
+    rows = Ballot.objects.filter(question_id=question_id).values_list('ranking', flat=True)
+    data = b''.join(bytes(row) for row in rows.iterator(chunk_size=10000))
+    return np.frombuffer(data, dtype=BALLOT_DTYPE).reshape(-1, BALLOT_WIDTH)
+
+
+def instant_runoff(ballots, choice_ids):
+    """Dépouillement IRV de la matrice ``ballots`` pour les choix ``choice_ids``.
+
+    Retourne ``(tours, gagnant)`` ; chaque tour donne les voix par choix encore en
+    lice, les choix éliminés et le nombre de bulletins épuisés.
+    """
+    choice_ids = np.asarray(sorted(choice_ids), dtype=BALLOT_DTYPE)
+    n_choices = len(choice_ids)
+    # ids -> indexes 0..n-1 par recherche dichotomique dans les ids triés (mémoire en
+    # O(bulletins), quel que soit l'écart entre les ids) ; n pour les cases vides et
+    # les choix supprimés depuis. Colonne sentinelle en bout de ligne (bulletins épuisés).
+    indexes = np.full((len(ballots), BALLOT_WIDTH + 1), n_choices, dtype=np.int16)
+    if n_choices:
+        positions = np.minimum(np.searchsorted(choice_ids, ballots), n_choices - 1)
+        indexes[:, :BALLOT_WIDTH] = np.where(choice_ids[positions] == ballots, positions, n_choices)
+
+    eliminated = np.zeros(n_choices + 1, dtype=bool)
+    eliminated[n_choices] = True
+    rows = np.arange(len(indexes))
+    cursor = np.zeros(len(indexes), dtype=np.intp)
+
+    def advance(mask):
+        # Avance chaque bulletin concerné jusqu'à son premier choix encore en lice
+        # (ou jusqu'à la sentinelle : bulletin épuisé)
+        todo = np.flatnonzero(mask & (cursor < BALLOT_WIDTH))
+        while len(todo):
+            cursor[todo] += 1
+            position = cursor[todo]
+            todo = todo[(position < BALLOT_WIDTH) & eliminated[indexes[todo, position]]]
+
+    advance(eliminated[indexes[:, 0]])
+
+    rounds, winner = [], None
+    while True:
+        current = indexes[rows, cursor]
+        counts = np.bincount(current, minlength=n_choices + 1)[:n_choices]
+        remaining = np.flatnonzero(~eliminated[:n_choices])
+        active = int(counts[remaining].sum())
+        record = {
+            'round': len(rounds) + 1,
+            'counts': {int(choice_ids[i]): int(counts[i]) for i in remaining},
+            'exhausted': len(current) - active,
+            'eliminated': [],
+        }
+        rounds.append(record)
+        if len(remaining) == 0 or active == 0:
+            break
+        leader = remaining[np.argmax(counts[remaining])]
+        if counts[leader] * 2 > active or len(remaining) == 1:
+            winner = int(choice_ids[leader])
+            break
+        lowest = remaining[counts[remaining] == counts[remaining].min()]
+        if len(lowest) == len(remaining):
+            # Égalité parfaite entre tous les choix restants : pas de gagnant
+            break
+        eliminated[lowest] = True
+        record['eliminated'] = [int(choice_ids[i]) for i in lowest]
+        advance(eliminated[current])
+    return rounds, winner
+
+
+def compute_runoff(question_id):
+    choice_ids = list(Choice.objects.filter(question_id=question_id).values_list('pk', flat=True))
+    ballots = load_ballots(question_id)
+    rounds, winner = instant_runoff(ballots, choice_ids)
+    return {'question': question_id, 'ballots': len(ballots), 'rounds': rounds, 'winner': winner}
+
+
+def get_runoff(question_id):
+    """Résultat IRV en cache, recalculé après chaque nouveau bulletin"""
+    return tiered.get_or_compute(cache_key(question_id), lambda: compute_runoff(question_id), RANKED_CACHE_TIMEOUT)
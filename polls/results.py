@@ -0,0 +1,82 @@
+"""Résultats d'un sondage : une requête annotée, mise en cache par question.
+
+Choix, total (fonction de fenêtre ``SUM() OVER``), pourcentages et auteur de
+la question sont lus en une seule requête, puis le payload de l'action
+``results`` de l'API est mis en cache. Il est invalidé par les votes, la
+bascule actif/inactif et les modifications de la question ou de ses choix.
+"""
+import copy
+
+from django.conf import settings
+from django.db.models import F, FloatField, Sum, Value, Window
+from django.db.models.functions import Coalesce, NullIf, Round
+from tp_django.cache import tiered
+from .models import Choice, Question
+from .serializers import ChoiceSerializer, QuestionSerializer
+from . import vote_buffer
+
+RESULTS_CACHE_TIMEOUT = getattr(settings, 'POLL_RESULTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def cache_key(question_id):
+    return f"polls:results:{question_id}"
+
+
+def invalidate(*question_ids):
+    tiered.delete(*[cache_key(question_id) for question_id in question_ids])
+
+
+def _percentages(payload):
+    """Recalcule total et pourcentages à partir des votes de chaque choix"""
+    total = sum(result['choice']['votes'] for result in payload['results'])
+    payload['total_votes'] = total
+    for result in payload['results']:
+        result['percentage'] = round(result['choice']['votes'] / total * 100, 2) if total else 0
+    return payload
+
+
+def compute_results(question_id):
+    """Payload ``{'question', 'total_votes', 'results'}`` en une requête (deux sans choix)"""
+    total = Window(Sum('votes'), partition_by=[F('question_id')])
+    choices = list(
+        Choice.objects.filter(question_id=question_id).select_related('question__author').annotate(
+            total_votes=total,
+            percentage=Coalesce(
+                Round(F('votes') * 100.0 / NullIf(total, 0), 2), Value(0.0), output_field=FloatField()
+            ),
+        ).order_by('pk')
+    )
+    if choices:
+        question = choices[0].question
+    else:
+        question = Question.objects.select_related('author').get(pk=question_id)
+    # Les choix déjà chargés servent aussi au champ imbriqué ``choices`` du serializer
+    question._prefetched_objects_cache = {'choice_set': choices}
+
+    return {
+        'question': QuestionSerializer(question).data,
+        'total_votes': choices[0].total_votes if choices else 0,
+        'results': [
+            {'choice': ChoiceSerializer(choice).data, 'percentage': choice.percentage}
+            for choice in choices
+        ],
+    }
+
+
+def get_results(question_id):
+    """Payload en cache, complété par les votes en attente du worker"""
+    payload = tiered.get_or_compute(
+        cache_key(question_id), lambda: compute_results(question_id), RESULTS_CACHE_TIMEOUT
+    )
+
+    if vote_buffer.buffering_enabled():
+        choice_ids = [result['choice']['id'] for result in payload['results']]
+        pending = vote_buffer.buffer.pending(choice_ids)
+        if pending:
+            payload = copy.deepcopy(payload)
+            for result in payload['results']:
+                result['choice']['votes'] += pending.get(result['choice']['id'], 0)
+            for choice in payload['question']['choices']:
+                choice['votes'] += pending.get(choice['id'], 0)
+            _percentages(payload)
+    return payload
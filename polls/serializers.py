@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import Question, Choice
 from django.contrib.auth.models import User
+from tp_django.api import SparseFieldsetsSerializerMixin
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     question_author_username = serializers.ReadOnlyField(source='question.author.username')
     
     class Meta:
@@ -10,11 +11,11 @@ class ChoiceSerializer(serializers.ModelSerializer):
         fields = ['id', 'question', 'choice_text', 'votes', 'question_author_username']
         read_only_fields = ['votes']
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SparseFieldsetsSerializerMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     choices = ChoiceSerializer(source='choice_set', many=True, read_only=True)
     
     class Meta:
         model = Question
-        fields = ['id', 'question_text', 'pub_date', 'author', 'author_username', 'is_active', 'choices']
+        fields = ['id', 'question_text', 'pub_date', 'author', 'author_username', 'is_active', 'kind', 'choices']
         read_only_fields = ['author', 'pub_date']
\ No newline at end of file
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Choice, Question
+from . import ranked, results
+
+
+def _invalidate(question_id):
+    # Tout de suite, puis après le commit : une lecture concurrente a pu remettre
+    # en cache l'état d'avant la transaction
+    results.invalidate(question_id)
+    ranked.invalidate(question_id)
+    transaction.on_commit(lambda: (results.invalidate(question_id), ranked.invalidate(question_id)), robust=True)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    # Édition, bascule actif/inactif ou suppression : le payload en cache est périmé
+    _invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    _invalidate(instance.question_id)
@@ -645,3 +645,845 @@ class PollsAPITestCase(TestCase):
         
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.data['choice_text'], 'New choice')
+
+
+class SparseFieldsetsAPITest(TestCase):
+    """Tests pour ?fields= / ?omit= sur l'API polls"""
+
+    def _get(self, url):
+        """GET en ne gardant que les requêtes SQL sur les tables polls"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries if '"polls_' in q['sql']]
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Sparse?', author=self.user)
+        Choice.objects.create(question=self.question, choice_text='A', votes=1)
+        Choice.objects.create(question=self.question, choice_text='B', votes=2)
+        self.client = APIClient()
+
+    def test_fields_prunes_serializer_and_skips_choices(self):
+        """Test que les choix non demandés ne sont ni sérialisés ni chargés"""
+        response, queries = self._get('/polls/api/questions/?fields=id,question_text')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data[0], {'id': self.question.id, 'question_text': 'Sparse?'})
+
+    def test_nested_fields_use_single_prefetch(self):
+        """Test de la notation pointée pour les choix imbriqués"""
+        response, queries = self._get('/polls/api/questions/?fields=id,choices.choice_text,choices.votes')
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            response.data[0]['choices'],
+            [{'choice_text': 'A', 'votes': 1}, {'choice_text': 'B', 'votes': 2}]
+        )
+
+    def test_omit_nested_field(self):
+        """Test de ?omit= sur un champ imbriqué"""
+        response = self.client.get(
+            f'/polls/api/questions/{self.question.id}/?omit=author_username,choices.question_author_username'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('author_username', response.data)
+        self.assertIn('question_text', response.data)
+        self.assertNotIn('question_author_username', response.data['choices'][0])
+        self.assertIn('choice_text', response.data['choices'][0])
+
+
+class BulkPollsAPITest(TestCase):
+    """Tests pour les endpoints groupés de l'API polls"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.question = Question.objects.create(question_text='Mine?', author=self.user)
+        self.foreign = Question.objects.create(question_text='Theirs?', author=self.other_user)
+        self.client = APIClient()
+
+    def test_bulk_create_choices_checks_author(self):
+        """Test que seuls les choix des sondages de l'auteur sont créés"""
+        self.client.force_authenticate(user=self.user)
+
+        data = [
+            {'question': self.question.id, 'choice_text': 'A'},
+            {'question': self.question.id, 'choice_text': 'B'},
+            {'question': self.foreign.id, 'choice_text': 'Hack'},
+        ]
+        response = self.client.post('/polls/api/choices/bulk/', data, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+        self.assertEqual(self.question.choice_set.count(), 2)
+        self.assertFalse(self.foreign.choice_set.exists())
+
+    def test_bulk_create_choices_invalidates_results(self):
+        """Test que les résultats en cache incluent les choix créés en masse"""
+        from django.core.cache import cache
+        from polls.results import get_results
+
+        cache.clear()
+        self.assertEqual(get_results(self.question.id)['results'], [])
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/polls/api/choices/bulk/', [
+                {'question': self.question.id, 'choice_text': 'A'},
+                {'question': self.question.id, 'choice_text': 'B'},
+            ], format='json')
+        self.assertEqual(
+            [result['choice']['choice_text'] for result in get_results(self.question.id)['results']], ['A', 'B']
+        )
+
+    def test_bulk_retrieve_questions(self):
+        """Test GET /polls/api/questions/bulk/?ids="""
+        response = self.client.get(f'/polls/api/questions/bulk/?ids={self.question.id},{self.foreign.id}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q['question_text'] for q in response.data['results']], ['Mine?', 'Theirs?'])
+        self.assertEqual(response.data['errors'], [])
+
+
+class VoteBufferTest(TestCase):
+    """Tests pour le tampon de votes"""
+
+    def setUp(self):
+        from unittest import mock
+        from rest_framework.test import APIClient
+        from polls import vote_buffer
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Buffered?', author=self.user)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='A', votes=3)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='B')
+        # Tampon sans thread : les tests déclenchent le flush eux-mêmes
+        self.buffer = vote_buffer.VoteBuffer()
+        patcher = mock.patch.object(vote_buffer, 'buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+    def test_buffered_votes_visible_before_flush(self):
+        """Test que les résultats incluent les votes en attente"""
+        from rest_framework.test import APIClient
+
+        with self.settings(VOTE_BUFFERING=True):
+            self.client.post(reverse('polls:vote', args=[self.question.id]), {'choice': self.choice1.id})
+            response = self.api.post(
+                f'/polls/api/questions/{self.question.id}/vote/', {'choice_id': self.choice1.id}
+            )
+            self.assertEqual(response.data['choice']['votes'], 5)
+            other = APIClient()
+            other.force_authenticate(user=User.objects.create_user(username='other', password='testpass123'))
+            other.post(f'/polls/api/questions/{self.question.id}/vote/', {'choice_id': self.choice2.id})
+
+            self.choice1.refresh_from_db()
+            self.assertEqual(self.choice1.votes, 3)
+            response = self.api.get(f'/polls/api/questions/{self.question.id}/results/')
+            self.assertEqual(response.data['total_votes'], 6)
+            response = self.client.get(reverse('polls:results', args=[self.question.id]))
+            self.assertContains(response, '5 votes')
+
+    def test_flush_writes_all_deltas_in_one_update(self):
+        """Test que le flush écrit le registre et tous les compteurs en lots"""
+        from polls.models import Vote
+
+        for voter, choice in [('a', self.choice1), ('b', self.choice1), ('c', self.choice2)]:
+            self.buffer.add(Vote(question=self.question, choice=choice, voter_id=voter))
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 3)
+        # Doublons existants, bulk_create du registre, auteurs (votes reçus), UPDATE ... CASE des compteurs
+        statements = [query['sql'].split()[0] for query in queries if '"polls_' in query['sql']]
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'SELECT', 'UPDATE'])
+        self.assertEqual(Vote.objects.count(), 3)
+        self.assertEqual(
+            list(Choice.objects.order_by('pk').values_list('votes', flat=True)), [5, 1]
+        )
+        self.assertEqual(self.buffer.pending(), {})
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_vote_without_buffering_skips_refresh(self):
+        """Test du mode direct : un UPDATE et pas de refresh_from_db"""
+        response = self.api.post(f'/polls/api/questions/{self.question.id}/vote/', {'choice_id': self.choice1.id})
+        self.assertEqual(response.data['choice']['votes'], 4)
+        self.choice1.refresh_from_db()
+        self.assertEqual(self.choice1.votes, 4)
+        self.assertEqual(self.buffer.pending(), {})
+
+
+class VoteLedgerTest(TestCase):
+    """Tests pour le registre des votes"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Ledger?', author=self.user)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='A')
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='B')
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+
+    def test_one_vote_per_voter_per_question(self):
+        """Test qu'un même votant ne peut voter qu'une fois par question"""
+        from polls.models import Vote
+
+        url = f'/polls/api/questions/{self.question.id}/vote/'
+        self.assertEqual(self.api.post(url, {'choice_id': self.choice1.id}).status_code, 200)
+        response = self.api.post(url, {'choice_id': self.choice2.id})
+        self.assertEqual(response.status_code, 409)
+
+        vote = Vote.objects.get()
+        self.assertEqual((vote.choice, vote.user, vote.voter_id), (self.choice1, self.user, f'user:{self.user.id}'))
+        self.assertEqual(list(Choice.objects.order_by('pk').values_list('votes', flat=True)), [1, 0])
+        with self.assertRaises(ValueError):
+            vote.save()
+
+    def test_anonymous_visitor_deduplicated(self):
+        """Test du dédoublonnage des visiteurs anonymes par cookie"""
+        self.client.cookies['visitor_id'] = 'abc'
+        url = reverse('polls:vote', args=[self.question.id])
+        self.assertEqual(self.client.post(url, {'choice': self.choice1.id}).status_code, 302)
+        response = self.client.post(url, {'choice': self.choice1.id})
+        self.assertContains(response, 'déjà voté')
+        self.choice1.refresh_from_db()
+        self.assertEqual(self.choice1.votes, 1)
+
+    def test_timeline_buckets(self):
+        """Test des votes regroupés par minute et par heure"""
+        from polls.models import Vote
+
+        start = timezone.now().replace(minute=10, second=0, microsecond=0) - datetime.timedelta(hours=2)
+        offsets = [(0, self.choice1), (0.5, self.choice2), (1, self.choice1), (61, self.choice1)]
+        for index, (minutes, choice) in enumerate(offsets):
+            Vote.objects.create(question=self.question, choice=choice, voter_id=f'v{index}',
+                                created_at=start + datetime.timedelta(minutes=minutes))
+
+        url = f'/polls/api/questions/{self.question.id}/timeline/'
+        response = self.api.get(url, {'interval': 'minute', 'since': start.isoformat(),
+                                      'until': (start + datetime.timedelta(hours=2)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([bucket['total'] for bucket in response.data['buckets']], [2, 1, 1])
+        self.assertEqual(response.data['buckets'][0]['choices'], {self.choice1.id: 1, self.choice2.id: 1})
+
+        response = self.api.get(url, {'interval': 'hour'})
+        self.assertEqual([bucket['total'] for bucket in response.data['buckets']], [3, 1])
+
+        self.assertEqual(self.api.get(url, {'interval': 'day'}).status_code, 400)
+        self.assertEqual(self.api.get(url, {'interval': 'minute', 'since': 'hier'}).status_code, 400)
+
+
+class CachedResultsTest(TestCase):
+    """Tests pour les résultats calculés en une requête et mis en cache"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Cached?', author=self.user)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='A', votes=1)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='B', votes=3)
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.user)
+        self.url = f'/polls/api/questions/{self.question.id}/results/'
+
+    def _polls_queries(self, callback):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = callback()
+        return response, [query['sql'] for query in queries if '"polls_choice"' in query['sql']]
+
+    def test_results_single_query_then_cached(self):
+        """Test du calcul en une requête puis de la lecture en cache"""
+        response, queries = self._polls_queries(lambda: self.api.get(self.url))
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['total_votes'], 4)
+        self.assertEqual([result['percentage'] for result in response.data['results']], [25.0, 75.0])
+        self.assertEqual(response.data['results'][0]['choice']['question_author_username'], 'testuser')
+
+        response, queries = self._polls_queries(
+            lambda: self.client.get(reverse('polls:results', args=[self.question.id]))
+        )
+        self.assertEqual(queries, [])
+        self.assertContains(response, '3 votes')
+
+    def test_cache_invalidated_on_vote_toggle_and_edit(self):
+        """Test de l'invalidation par un vote, la bascule et l'édition"""
+        self.api.get(self.url)
+        self.api.post(f'/polls/api/questions/{self.question.id}/vote/', {'choice_id': self.choice1.id})
+        self.assertEqual(self.api.get(self.url).data['total_votes'], 5)
+
+        self.api.post(f'/polls/api/questions/{self.question.id}/toggle_status/')
+        self.assertFalse(self.api.get(self.url).data['question']['is_active'])
+
+        self.choice2.choice_text = 'B modifié'
+        self.choice2.save()
+        self.assertEqual(self.api.get(self.url).data['results'][1]['choice']['choice_text'], 'B modifié')
+
+    def test_question_without_choices(self):
+        """Test d'un sondage sans choix"""
+        question = Question.objects.create(question_text='Vide ?', author=self.user)
+        response = self.api.get(f'/polls/api/questions/{question.id}/results/')
+        self.assertEqual(response.data['total_votes'], 0)
+        self.assertEqual(response.data['results'], [])
+
+
+class LiveResultsTest(TestCase):
+    """Tests pour les résultats en direct (SSE)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Live?', author=self.user)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='A', votes=1)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='B', votes=1)
+        self.choice3 = Choice.objects.create(question=self.question, choice_text='C', votes=0)
+
+    async def test_stream_pushes_full_snapshot_then_deltas(self):
+        """Test du premier instantané complet puis des seuls choix modifiés"""
+        import asyncio
+        import json
+        from unittest import mock
+        from asgiref.sync import sync_to_async
+        from polls.live import ResultsHub
+        from polls.vote_buffer import record_vote
+
+        hub = ResultsHub(interval=0.01)
+        with mock.patch('polls.views.hub', hub):
+            response = await self.async_client.get(reverse('polls:results_stream', args=[self.question.id]))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+            event, data = (await anext(stream)).decode().strip().split('\n')
+            self.assertEqual(event, 'event: results')
+            snapshot = json.loads(data.removeprefix('data: '))
+            self.assertEqual(snapshot['total_votes'], 2)
+            self.assertEqual(len(snapshot['choices']), 3)
+
+            await sync_to_async(record_vote)(self.choice1, 'voter')
+            delta = json.loads((await anext(stream)).decode().split('data: ')[1])
+            self.assertEqual(delta['total_votes'], 3)
+            # C reste à 0 vote et 0 % : il n'est pas renvoyé
+            self.assertEqual(set(delta['choices']), {str(self.choice1.id), str(self.choice2.id)})
+            self.assertEqual(delta['choices'][str(self.choice1.id)]['votes'], 2)
+
+            # Déconnexion du client : la lecture en cours est annulée, l'abonné retiré
+            self.assertEqual(hub.subscriber_count(self.question.id), 1)
+            reader = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            reader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await reader
+            self.assertEqual(hub.subscriber_count(self.question.id), 0)
+
+    async def test_stream_unknown_question(self):
+        """Test d'un flux sur un sondage inexistant"""
+        response = await self.async_client.get(reverse('polls:results_stream', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_wsgi_falls_back_to_polling(self):
+        """Test que sous WSGI la page interroge l'API et que le flux n'est pas ouvert"""
+        response = self.client.get(reverse('polls:results', args=[self.question.id]))
+        self.assertNotContains(response, 'new EventSource')
+        self.assertContains(response, f'/polls/api/questions/{self.question.id}/results/')
+
+        response = self.client.get(reverse('polls:results_stream', args=[self.question.id]))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_asgi_page_opens_stream(self):
+        """Test que sous ASGI la page ouvre le flux SSE, sauf si LIVE_RESULTS_STREAM est désactivé"""
+        from django.test import override_settings
+
+        response = await self.async_client.get(reverse('polls:results', args=[self.question.id]))
+        self.assertContains(response, 'new EventSource')
+        with override_settings(LIVE_RESULTS_STREAM=False):
+            response = await self.async_client.get(reverse('polls:results', args=[self.question.id]))
+        self.assertNotContains(response, 'new EventSource')
+
+
+class PollIndexTest(TestCase):
+    """Tests del listado paginado de sondages"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        for i in range(15):
+            question = Question.objects.create(
+                question_text=f'Question {i}',
+                author=self.alice if i % 2 else self.bob,
+                is_active=i % 3 != 0,
+                pub_date=timezone.now() - datetime.timedelta(days=i),
+            )
+            Choice.objects.create(question=question, choice_text='Oui', votes=i)
+            Choice.objects.create(question=question, choice_text='Non', votes=1)
+
+    def _polls_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries if '"polls_' in q['sql']]
+
+    def test_page_annotations(self):
+        """Test de los contadores anotados y de la paginación"""
+        response, _ = self._polls_queries(reverse('polls:index'))
+        questions = response.context['latest_question_list']
+        self.assertEqual(len(questions), 12)
+        self.assertEqual(questions[0].question_text, 'Question 0')
+        self.assertEqual((questions[3].choice_count, questions[3].total_votes), (2, 4))
+        self.assertTrue(response.context['is_paginated'])
+
+        response, _ = self._polls_queries(reverse('polls:index') + '?page=2')
+        self.assertEqual(len(response.context['latest_question_list']), 3)
+
+    def test_constant_query_count(self):
+        """Test del número de consultas independiente del tamaño de la página"""
+        _, full_page = self._polls_queries(reverse('polls:index'))
+        _, last_page = self._polls_queries(reverse('polls:index') + '?page=2')
+        # COUNT de la paginación + la página con autor y contadores
+        self.assertEqual(len(full_page), 2)
+        self.assertEqual(len(last_page), 2)
+
+    def test_filters(self):
+        """Test de los filtros activo, autor y recientes"""
+        response, _ = self._polls_queries(reverse('polls:index') + '?active=0')
+        self.assertTrue(all(not q.is_active for q in response.context['latest_question_list']))
+        self.assertEqual(response.context['paginator'].count, 5)
+
+        response, _ = self._polls_queries(reverse('polls:index') + '?author=alice&active=1')
+        texts = {q.question_text for q in response.context['latest_question_list']}
+        self.assertEqual(texts, {'Question 1', 'Question 5', 'Question 7', 'Question 11', 'Question 13'})
+
+        response, _ = self._polls_queries(reverse('polls:index') + '?recent=2')
+        self.assertEqual(response.context['paginator'].count, 2)
+
+        response, _ = self._polls_queries(reverse('polls:index') + '?recent=abc')
+        self.assertEqual(response.context['paginator'].count, 15)
+
+
+class EagerLoadingAPITest(TestCase):
+    """Tests du chargement anticipé déduit des serializers (tp_django.api)"""
+
+    def _get(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in queries if '"polls_' in q['sql'] or '"auth_user"' in q['sql']]
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        for i in range(4):
+            author = User.objects.create_user(username=f'author{i}', password='testpass123')
+            question = Question.objects.create(question_text=f'Q{i}', author=author)
+            for letter in 'ABC':
+                Choice.objects.create(question=question, choice_text=letter)
+
+    def test_question_list_constant_queries(self):
+        """Test que la liste ne fait qu'une requête par niveau, quel que soit le volume"""
+        response, queries = self._get('/polls/api/questions/')
+
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"auth_user"', queries[0])
+        # L'auteur de la question vient du parent déjà chargé, pas d'une jointure par choix
+        self.assertNotIn('"auth_user"', queries[1])
+        first = response.data[0]
+        self.assertEqual(first['choices'][0]['question_author_username'], first['author_username'])
+
+    def test_choice_list_joins_question_author(self):
+        """Test du select_related déduit de question.author.username"""
+        response, queries = self._get('/polls/api/choices/')
+
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data[0]['question_author_username'], 'author0')
+
+    def test_plan_report(self):
+        """Test du rapport décrivant le plan retenu"""
+        from polls.serializers import ChoiceSerializer, QuestionSerializer
+        from tp_django.api import QueryPlan
+
+        plan = QueryPlan.from_serializer(Question, QuestionSerializer())
+        self.assertEqual(plan.describe(), 'select_related=author; prefetch_related=choice_set')
+
+        plan = QueryPlan.from_serializer(Choice, ChoiceSerializer(), narrow=True)
+        self.assertEqual(
+            plan.describe(),
+            'select_related=question,question__author; '
+            'only=choice_text,id,question,question__author,question__author__username,votes'
+        )
+
+
+class ChoiceReconciliationTest(TestCase):
+    """Tests de l'enregistrement des choix par différence (polls.choices)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.question = Question.objects.create(question_text='Couleur ?', author=self.user)
+        self.red = Choice.objects.create(question=self.question, choice_text='Rouge', votes=4)
+        self.blue = Choice.objects.create(question=self.question, choice_text='Bleu', votes=2)
+        self.green = Choice.objects.create(question=self.question, choice_text='Vert', votes=1)
+        self.client.login(username='testuser', password='testpass123')
+
+    def _edit(self, ids, texts):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        data = {'question_text': 'Couleur ?', 'is_active': 'on', 'choice_id': ids, 'choice_text': texts}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('polls:edit_poll', args=[self.question.id]), data)
+        self.assertEqual(response.status_code, 302)
+        return [q['sql'] for q in ctx.captured_queries if '"polls_choice"' in q['sql']]
+
+    def test_edit_keeps_votes_and_writes_differences(self):
+        """Test que renommer, ajouter et retirer gardent les votes des choix conservés"""
+        queries = self._edit(
+            [str(self.red.id), str(self.blue.id), ''],
+            ['Rouge', 'Bleu marine', 'Jaune'],
+        )
+
+        choices = {c.choice_text: c for c in self.question.choice_set.all()}
+        self.assertEqual(set(choices), {'Rouge', 'Bleu marine', 'Jaune'})
+        self.assertEqual(choices['Rouge'].pk, self.red.pk)
+        self.assertEqual(choices['Rouge'].votes, 4)
+        self.assertEqual(choices['Bleu marine'].pk, self.blue.pk)
+        self.assertEqual(choices['Bleu marine'].votes, 2)
+        self.assertEqual(choices['Jaune'].votes, 0)
+        # Lecture, UPDATE groupé, INSERT groupé, puis suppression (sélection + DELETE)
+        self.assertEqual([sql.split()[0] for sql in queries], ['SELECT', 'UPDATE', 'INSERT', 'SELECT', 'DELETE'])
+
+    def test_unchanged_edit_writes_nothing(self):
+        """Test qu'une édition sans changement ne touche pas aux choix"""
+        ids = [str(self.red.id), str(self.blue.id), str(self.green.id)]
+        queries = self._edit(ids, ['Rouge', 'Bleu', 'Vert'])
+
+        self.assertEqual([sql.split()[0] for sql in queries], ['SELECT'])
+
+    def test_match_by_text_without_ids(self):
+        """Test du rapprochement par texte quand le formulaire n'envoie pas d'ids"""
+        from django.http import QueryDict
+        from polls.choices import reconcile_choices, submitted_choices
+
+        data = QueryDict(mutable=True)
+        data.setlist('choice_text', ['Vert', ' ', 'Rouge', 'Noir'])
+        self.assertEqual(submitted_choices(data), [(None, 'Vert'), (None, 'Rouge'), (None, 'Noir')])
+
+        self.assertEqual(reconcile_choices(self.question, submitted_choices(data)), (1, 0, 1))
+        self.assertEqual(Choice.objects.get(pk=self.green.pk).votes, 1)
+        self.assertFalse(Choice.objects.filter(pk=self.blue.pk).exists())
+
+    def test_create_poll_single_insert(self):
+        """Test de la création : un seul INSERT pour toutes les options"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        data = {'question_text': 'Nouveau ?', 'is_active': 'on', 'choice_text': ['A', 'B', '', 'C']}
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('polls:create_poll'), data)
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "polls_choice"')]
+
+        self.assertEqual(len(inserts), 1)
+        question = Question.objects.get(question_text='Nouveau ?')
+        self.assertEqual([c.choice_text for c in question.choice_set.order_by('pk')], ['A', 'B', 'C'])
+
+
+class VoteThrottleTest(TestCase):
+    """Tests de la limitation de débit des votes (tp_django.throttling)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(username='voter', password='testpass123')
+        self.question = Question.objects.create(question_text='Spam ?', author=self.user)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Oui')
+
+    def test_token_bucket_refill(self):
+        """Test du seau : capacité, refus mémorisé localement puis recharge"""
+        from unittest import mock
+        from tp_django.throttling import TokenBucket
+
+        bucket = TokenBucket('test', '2/min')
+        self.assertEqual(bucket.consume('k', now=1000), (True, 0))
+        self.assertEqual(bucket.consume('k', now=1000), (True, 0))
+        allowed, wait = bucket.consume('k', now=1000)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30)
+
+        # Refus suivant servi par le processus, sans lire le cache
+        with mock.patch('tp_django.throttling.cache') as shared:
+            self.assertFalse(bucket.consume('k', now=1010)[0])
+        shared.get.assert_not_called()
+
+        self.assertEqual(bucket.consume('k', now=1030), (True, 0))
+        self.assertTrue(bucket.consume('other', now=1030)[0])
+
+    def test_concurrent_consumers_share_tokens(self):
+        """Test que des requêtes simultanées ne dépensent pas deux fois le même jeton"""
+        import threading
+        from unittest import mock
+        from django.core.cache import cache
+        from django.core.cache.backends.locmem import LocMemCache
+        from tp_django.throttling import TokenBucket
+
+        bucket = TokenBucket('test', '5/min')
+        results, barrier = [], threading.Barrier(20)
+        original_get = LocMemCache.get
+
+        def slow_get(self, *args, **kwargs):
+            # Élargit la fenêtre entre la lecture et l'écriture du seau (instance de cache par thread)
+            value = original_get(self, *args, **kwargs)
+            threading.Event().wait(0.001)
+            return value
+
+        def worker():
+            barrier.wait()
+            results.append(bucket.consume('k', now=1000)[0])
+
+        with mock.patch.object(LocMemCache, 'get', autospec=True, side_effect=slow_get), \
+                mock.patch('tp_django.throttling.LOCK_WAIT', 5):
+            threads = [threading.Thread(target=worker) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 5)
+
+        # Verrou tenu par un autre worker : refus sans lire l'état du seau
+        cache.add(bucket._lock_key('other'), True, 30)
+        with mock.patch('tp_django.throttling.LOCK_WAIT', 0):
+            self.assertFalse(bucket.consume('other', now=1000)[0])
+        self.assertIsNone(cache.get(bucket.cache_key('other')))
+
+    def test_html_vote_throttled_before_orm(self):
+        """Test du 429 sur la vue HTML, sans requête sur les tables polls"""
+        from unittest import mock
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from tp_django import throttling
+
+        url = reverse('polls:vote', args=[self.question.id])
+        self.client.cookies['visitor_id'] = 'bot'
+        with mock.patch.dict(throttling._buckets, {'vote': throttling.TokenBucket('vote', '1/min')}):
+            self.assertEqual(self.client.post(url, {'choice': self.choice.id}).status_code, 302)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(url, {'choice': self.choice.id})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertFalse([q for q in ctx.captured_queries if '"polls_' in q['sql']])
+
+    def test_api_vote_throttled(self):
+        """Test du 429 sur l'action vote de l'API, par utilisateur"""
+        from unittest import mock
+        from rest_framework.test import APIClient
+        from tp_django import throttling
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/polls/api/questions/{self.question.id}/vote/'
+        with mock.patch.dict(throttling._buckets, {'vote': throttling.TokenBucket('vote', '2/min')}):
+            self.assertEqual(client.post(url, {'choice_id': self.choice.id}).status_code, 200)
+            # Doublon : 409, mais le jeton est consommé
+            self.assertEqual(client.post(url, {'choice_id': self.choice.id}).status_code, 409)
+            response = client.post(url, {'choice_id': self.choice.id})
+            # Les lectures ne consomment pas de jeton
+            self.assertEqual(client.get(f'/polls/api/questions/{self.question.id}/').status_code, 200)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class RankedPollTest(TestCase):
+    """Tests des sondages à classement et du dépouillement IRV (polls.ranked)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(username='ranker', password='testpass123')
+        self.question = Question.objects.create(question_text='Langage ?', author=self.user, kind=Question.RANKED)
+        self.a, self.b, self.c = (
+            Choice.objects.create(question=self.question, choice_text=text) for text in ('Python', 'Go', 'Rust')
+        )
+
+    def test_instant_runoff_redistributes(self):
+        """Test de l'élimination et du report des voix tour par tour"""
+        import numpy as np
+        from polls.ranked import decode_ranking, encode_ranking, instant_runoff
+
+        rankings = [[1, 2]] * 4 + [[2, 3]] * 3 + [[3, 2]] * 2 + [[3]] + [[99, 1]]
+        ballots = np.vstack([np.frombuffer(encode_ranking(r), dtype='<i4') for r in rankings])
+        self.assertEqual(decode_ranking(encode_ranking([3, 1])), [3, 1])
+
+        rounds, winner = instant_runoff(ballots, [1, 2, 3])
+
+        # Le choix 99 (supprimé depuis) est sauté : le dernier bulletin compte pour 1
+        self.assertEqual(rounds[0]['counts'], {1: 5, 2: 3, 3: 3})
+        self.assertEqual(rounds[0]['eliminated'], [2, 3])
+        self.assertEqual(winner, 1)
+        self.assertEqual(rounds[1]['counts'], {1: 5})
+        self.assertEqual(rounds[1]['exhausted'], 6)
+
+        rounds, winner = instant_runoff(ballots[:9], [1, 2, 3])
+        self.assertEqual(rounds[0]['eliminated'], [3])
+        self.assertEqual(rounds[1]['counts'], {1: 4, 2: 5})
+        self.assertEqual(winner, 2)
+
+    def test_instant_runoff_sparse_choice_ids(self):
+        """Test qu'un grand écart entre ids de choix n'alloue pas une table à sa mesure"""
+        import tracemalloc
+        import numpy as np
+        from polls.ranked import encode_ranking, instant_runoff
+
+        rankings = [[50_000_000, 1]] * 2 + [[1]] * 3 + [[7, 50_000_000]]
+        ballots = np.vstack([np.frombuffer(encode_ranking(r), dtype='<i4') for r in rankings])
+        tracemalloc.start()
+        try:
+            rounds, winner = instant_runoff(ballots, [1, 50_000_000])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(rounds[0]['counts'], {1: 3, 50_000_000: 3})
+        self.assertEqual(rounds[0]['exhausted'], 0)
+        self.assertLess(peak, 1_000_000)
+
+    def test_web_ballot_and_results(self):
+        """Test du bulletin depuis le formulaire et des tours sur la page de résultats"""
+        url = reverse('polls:vote', args=[self.question.id])
+        self.client.cookies['visitor_id'] = 'first'
+        response = self.client.post(url, {f'rank_{self.b.id}': '1', f'rank_{self.a.id}': '2', f'rank_{self.c.id}': ''})
+        self.assertEqual(response.status_code, 302)
+
+        response = self.client.post(url, {f'rank_{self.a.id}': '1'})
+        self.assertContains(response, 'Vous avez déjà voté pour ce sondage.')
+
+        self.client.cookies['visitor_id'] = 'other'
+        response = self.client.post(url, {f'rank_{self.a.id}': '1', f'rank_{self.b.id}': '1'})
+        self.assertContains(response, 'même rang')
+
+        response = self.client.get(reverse('polls:results', args=[self.question.id]))
+        self.assertContains(response, 'Gagnant : <strong>Go</strong>')
+        self.assertContains(response, 'Tour 1')
+
+    def test_api_ballot_and_cached_runoff(self):
+        """Test de l'API : bulletin, résultat en cache jusqu'au bulletin suivant"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        base = f'/polls/api/questions/{self.question.id}'
+        response = client.post(f'{base}/ballot/', {'ranking': [self.c.id, self.a.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.post(f'{base}/ballot/', {'ranking': [self.a.id]}, format='json').status_code, 409)
+        self.assertEqual(client.post(f'{base}/vote/', {'choice_id': self.a.id}).status_code, 400)
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        client.force_authenticate(user=other)
+        response = client.post(f'{base}/ballot/', {'ranking': [self.a.id, self.a.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(client.get(f'{base}/runoff/').data['ballots'], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            payload = client.get(f'{base}/runoff/').data
+        self.assertFalse([q for q in ctx.captured_queries if '"polls_ballot"' in q['sql']])
+        self.assertEqual(payload['winner'], self.c.id)
+
+        client.post(f'{base}/ballot/', {'ranking': [self.a.id]}, format='json')
+        payload = client.get(f'{base}/runoff/').data
+        self.assertEqual(payload['ballots'], 2)
+        self.assertEqual(payload['rounds'][0]['counts'], {self.a.id: 1, self.b.id: 0, self.c.id: 1})
+
+
+class ExportCSVTest(TestCase):
+    """Tests des exports CSV en flux (polls.export)"""
+
+    def setUp(self):
+        from polls.vote_buffer import record_vote
+
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.voter = User.objects.create_user(username='voter', password='testpass123')
+        self.question = Question.objects.create(question_text='Thé ou café ?', author=self.author)
+        self.tea = Choice.objects.create(question=self.question, choice_text='Thé')
+        self.coffee = Choice.objects.create(question=self.question, choice_text='Café, serré')
+        record_vote(self.tea, f'user:{self.voter.pk}', self.voter)
+        record_vote(self.coffee, 'visitor:abc')
+        record_vote(self.coffee, 'visitor:def')
+
+    def _csv(self, response):
+        import csv
+        import io
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_question_results_and_votes(self):
+        """Test de l'export des résultats et de l'historique d'une question"""
+        self.client.login(username='author', password='testpass123')
+
+        rows = self._csv(self.client.get(reverse('polls:export_results', args=[self.question.id])))
+        self.assertEqual(rows[0][:3], ['question_id', 'question', 'publiee_le'])
+        self.assertEqual([row[5:] for row in rows[1:]], [['Thé', '1', '33.33'], ['Café, serré', '2', '66.67']])
+
+        rows = self._csv(self.client.get(reverse('polls:export_votes', args=[self.question.id])))
+        self.assertEqual(rows[0], ['date', 'utilisateur', 'choice_id', 'choix'])
+        self.assertEqual([row[1] for row in rows[1:]], ['voter', '', ''])
+        self.assertNotIn('visitor:abc', str(rows))
+
+    def test_author_export_and_permissions(self):
+        """Test de l'export de tous les sondages de l'auteur, et refus pour les autres"""
+        other = Question.objects.create(question_text='Autre', author=self.voter)
+        Choice.objects.create(question=other, choice_text='Non compté')
+
+        self.client.login(username='author', password='testpass123')
+        rows = self._csv(self.client.get(reverse('polls:export_my_polls')))
+        self.assertEqual({row[1] for row in rows[1:]}, {'Thé ou café ?'})
+
+        self.client.login(username='voter', password='testpass123')
+        response = self.client.get(reverse('polls:export_votes', args=[self.question.id]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_rows_read_in_chunks(self):
+        """Test que les lignes sont lues avec un itérateur par paquets, pas en une liste"""
+        from unittest import mock
+        from django.db.models.query import QuerySet
+
+        self.client.login(username='author', password='testpass123')
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            self._csv(self.client.get(reverse('polls:export_votes', args=[self.question.id])))
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 2000})
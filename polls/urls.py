@@ -16,6 +16,8 @@ urlpatterns = [
  path("<int:pk>/", views.DetailView.as_view(), name="detail"),
  # ex: /polls/5/results/
  path("<int:pk>/results/", views.ResultsView.as_view(), name="results"),
+ # ex: /polls/5/results/stream/ (SSE, ASGI)
+ path("<int:pk>/results/stream/", views.results_stream, name="results_stream"),
  # ex: /polls/5/vote/
  path("<int:question_id>/vote/", views.vote, name="vote"),
  
@@ -24,6 +26,10 @@ urlpatterns = [
  path("<int:question_id>/edit/", views.edit_poll, name="edit_poll"),
  path("<int:question_id>/toggle/", views.toggle_poll_status, name="toggle_poll"),
  path("<int:question_id>/delete/", views.delete_poll, name="delete_poll"),
+ # Exports CSV (auteur)
+ path("<int:question_id>/export/results.csv", views.export_results, name="export_results"),
+ path("<int:question_id>/export/votes.csv", views.export_votes, name="export_votes"),
+ path("export/mine.csv", views.export_my_polls, name="export_my_polls"),
  # API URLs
  path('api/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,38 +1,117 @@
+import datetime
+
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import  HttpResponseRedirect
-from django.db.models import F
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import  Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from .models import Choice, Question
-from .forms import QuestionForm, ChoiceFormSet
+from .choices import reconcile_choices, submitted_choices
+from .forms import NewQuestionForm, QuestionForm, ChoiceFormSet
+from .results import get_results
+from .ranked import cast_ballot, clean_ranking, get_runoff
+from .live import hub
+from . import export
+from .vote_buffer import record_vote, voter_key
 from django.views import generic
 from django.contrib.auth.decorators import login_required
+from tp_django.throttling import throttle
+from accounts.deletion import delete_questions
 
 # Create your views here.
 
 class IndexView(generic.ListView):
     template_name = "polls/index.html"
     context_object_name = "latest_question_list"
+    paginate_by = 12
+
     def get_queryset(self):
-        """Return the last five published questions."""
-        return Question.objects.order_by("-pub_date")[:5]
+        """Sondages filtrés (actif, auteur, récents), auteur et compteurs chargés en une requête"""
+        questions = Question.objects.select_related("author").annotate(
+            choice_count=Count("choice"),
+            total_votes=Coalesce(Sum("choice__votes"), 0),
+        )
+        active = self.request.GET.get("active")
+        if active in ("1", "0"):
+            questions = questions.filter(is_active=active == "1")
+        author = self.request.GET.get("author", "").strip()
+        if author:
+            questions = questions.filter(author__username=author)
+        try:
+            recent = int(self.request.GET.get("recent", ""))
+        except ValueError:
+            recent = None
+        if recent and recent > 0:
+            questions = questions.filter(pub_date__gte=timezone.now() - datetime.timedelta(days=recent))
+        return questions.order_by("-pub_date", "-pk")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filters"] = {
+            "active": self.request.GET.get("active", ""),
+            "author": self.request.GET.get("author", "").strip(),
+            "recent": self.request.GET.get("recent", ""),
+        }
+        return context
 
 class DetailView(generic.DetailView):
     model = Question
     template_name = "polls/detail.html"
 
 class ResultsView(generic.DetailView):
-    model = Question
+    queryset = Question.objects.select_related('author')
     template_name = "polls/results.html"
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        question = self.get_object()
-        # Calcular el total de votos
-        total_votes = sum(choice.votes for choice in question.choice_set.all())
+        if self.object.is_ranked:
+            # Vuelta por vuelta del voto alternativo, con el texto de cada opción
+            runoff = get_runoff(self.object.pk)
+            texts = dict(self.object.choice_set.values_list("pk", "choice_text"))
+            context["runoff"] = runoff
+            context["runoff_rounds"] = [
+                {
+                    "round": tour["round"],
+                    "exhausted": tour["exhausted"],
+                    "counts": sorted(
+                        ((texts.get(pk, "?"), votes, pk in tour["eliminated"]) for pk, votes in tour["counts"].items()),
+                        key=lambda row: -row[1],
+                    ),
+                }
+                for tour in runoff["rounds"]
+            ]
+            context["runoff_winner"] = texts.get(runoff["winner"])
+        # Resultados en caché (una sola consulta si no están), con los votos del búfer
+        payload = get_results(self.object.pk)
+        context['choices'] = [result['choice'] for result in payload['results']]
+        total_votes = payload['total_votes']
         context['total_votes'] = total_votes if total_votes > 0 else 1  # Evitar división por 0
+        # SSE solo bajo ASGI; con WSGI (runserver) la página consulta la API periódicamente
+        context['live_stream'] = live_stream_available(self.request)
+        context['live_poll_ms'] = settings.LIVE_RESULTS_POLL_MS
         return context
 
+def live_stream_available(request):
+    return settings.LIVE_RESULTS_STREAM and isinstance(request, ASGIRequest)
+
+async def results_stream(request, pk):
+    """Resultados en directo (Server-Sent Events), servidos por tp_django.asgi"""
+    if not live_stream_available(request):
+        # Bajo WSGI el flujo infinito ocuparía un hilo por página abierta: 204 detiene el EventSource
+        return HttpResponse(status=204)
+    if not await Question.objects.filter(pk=pk).aexists():
+        raise Http404("Sondage introuvable")
+    response = StreamingHttpResponse(hub.stream(pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Desactiva el buffering de los proxies (nginx) para que cada evento salga enseguida
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+@throttle('vote')
 def vote(request, question_id):
     question = get_object_or_404(Question, pk=question_id)
     
@@ -47,6 +126,9 @@ def vote(request, question_id):
             },
         )
     
+    if question.is_ranked:
+        return _ranked_vote(request, question)
+
     try:
         selected_choice = question.choice_set.get(pk=request.POST["choice"])
     except (KeyError, Choice.DoesNotExist):
@@ -60,38 +142,66 @@ def vote(request, question_id):
             },
         )
     else:
-        
-        selected_choice.votes = F("votes") + 1
-        selected_choice.save()
+        if not record_vote(selected_choice, voter_key(request), request.user):
+            return render(
+                request,
+                "polls/detail.html",
+                {
+                    "question": question,
+                    "error_message": "Vous avez déjà voté pour ce sondage.",
+                },
+            )
         # Always return an HttpResponseRedirect after successfully dealing with POST data.
         # This prevents data from being posted twice if a user hits the Back button.
         return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
 
 
+def _ranked_vote(request, question):
+    """Papeleta de un sondeo por clasificación: campos "rank_<id>" con la posición de cada opción"""
+    positions = {
+        key[len("rank_"):]: value for key, value in request.POST.items()
+        if key.startswith("rank_") and value.strip()
+    }
+    try:
+        if len(set(positions.values())) != len(positions):
+            raise ValueError("Deux choix ne peuvent pas avoir le même rang.")
+        order = sorted(positions, key=lambda choice_id: int(positions[choice_id]))
+        ranking = clean_ranking(question, order)
+    except ValueError as error:
+        message = str(error) if positions else "Classez au moins un choix."
+        return render(request, "polls/detail.html", {"question": question, "error_message": message})
+
+    if not cast_ballot(question, ranking, voter_key(request), request.user):
+        return render(
+            request,
+            "polls/detail.html",
+            {
+                "question": question,
+                "error_message": "Vous avez déjà voté pour ce sondage.",
+            },
+        )
+    return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
+
+
 @login_required
 def create_poll(request):
     """Créer un nouveau sondage"""
     if request.method == 'POST':
-        question_form = QuestionForm(request.POST)
+        question_form = NewQuestionForm(request.POST)
         
         if question_form.is_valid():
-            question = question_form.save(commit=False)
-            question.author = request.user
-            question.pub_date = timezone.now()
-            question.save()
-            
-            # Traiter les choix
-            choice_texts = request.POST.getlist('choice_text')
-            for choice_text in choice_texts:
-                if choice_text.strip():  # Ignorer les choix vides
-                    Choice.objects.create(
-                        question=question,
-                        choice_text=choice_text.strip()
-                    )
+            with transaction.atomic():
+                question = question_form.save(commit=False)
+                question.author = request.user
+                question.pub_date = timezone.now()
+                question.save()
+
+                # Traiter les choix (un seul INSERT, options vides ignorées)
+                reconcile_choices(question, submitted_choices(request.POST))
             
             return redirect('polls:index')
     else:
-        question_form = QuestionForm()
+        question_form = NewQuestionForm()
     
     return render(request, 'polls/create_poll.html', {
         'question_form': question_form
@@ -111,17 +221,11 @@ def edit_poll(request, question_id):
         question_form = QuestionForm(request.POST, instance=question)
         
         if question_form.is_valid():
-            question_form.save()
-            
-            # Supprimer tous les anciens choix et créer les nouveaux
-            question.choice_set.all().delete()
-            choice_texts = request.POST.getlist('choice_text')
-            for choice_text in choice_texts:
-                if choice_text.strip():
-                    Choice.objects.create(
-                        question=question,
-                        choice_text=choice_text.strip()
-                    )
+            with transaction.atomic():
+                question_form.save()
+
+                # Conserver les choix existants (et leurs votes), n'écrire que les différences
+                reconcile_choices(question, submitted_choices(request.POST))
             
             # Detectar desde dónde viene y mantener el parámetro 'from'
             from_param = request.GET.get('from')
@@ -185,8 +289,33 @@ def delete_poll(request, question_id):
     
     if question.author == request.user:
         if request.method == 'POST':
-            question.delete()
+            # Votos, papeletas y opciones por lotes, sin cargarlos en memoria
+            delete_questions(Question.objects.filter(pk=question.pk))
             return redirect('polls:index')
         return render(request, 'polls/confirm_delete.html', {'question': question})
     
     return redirect('polls:index')
+
+
+@login_required
+def export_results(request, question_id):
+    """Exporter les résultats d'un sondage en CSV (réservé à l'auteur)"""
+    question = get_object_or_404(Question, pk=question_id)
+    if question.author_id != request.user.pk:
+        return HttpResponseForbidden("Seul l'auteur peut exporter ce sondage.")
+    return export.question_results(question)
+
+
+@login_required
+def export_votes(request, question_id):
+    """Exporter l'historique des votes d'un sondage en CSV (réservé à l'auteur)"""
+    question = get_object_or_404(Question, pk=question_id)
+    if question.author_id != request.user.pk:
+        return HttpResponseForbidden("Seul l'auteur peut exporter ce sondage.")
+    return export.question_votes(question)
+
+
+@login_required
+def export_my_polls(request):
+    """Exporter les résultats de tous mes sondages en CSV"""
+    return export.author_results(request.user)
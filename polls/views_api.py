@@ -1,9 +1,21 @@
-from drf_spectacular.utils import extend_schema
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from tp_django.api import BulkCreateMixin, BulkRetrieveMixin, SparseFieldsetsMixin
+from tp_django.throttling import VoteRateThrottle
 from .models import Question, Choice
 from .serializers import QuestionSerializer, ChoiceSerializer
+from .results import get_results
+from . import ranked, results
+from .ranked import cast_ballot, clean_ranking, get_runoff
+from .vote_buffer import BUCKET_INTERVALS, record_vote, vote_buckets, voter_key
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -17,11 +29,27 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return obj.question.author == request.user
         return False
 
-class ChoiceViewSet(viewsets.ModelViewSet):
+class ChoiceViewSet(SparseFieldsetsMixin, BulkCreateMixin, viewsets.ModelViewSet):
     queryset = Choice.objects.all()
     serializer_class = ChoiceSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
-    
+    bulk_preload_fields = ('question',)
+
+    def validate_bulk_item(self, validated_data):
+        # Seul l'auteur du sondage peut y ajouter des choix
+        if validated_data['question'].author_id != self.request.user.id:
+            return 'Seul l\'auteur du sondage peut ajouter des choix.'
+        return None
+
+    def after_bulk_create(self, objects):
+        # bulk_create n'envoie pas de signaux : invalidation explicite, comme polls.choices
+        question_ids = {choice.question_id for choice in objects}
+        results.invalidate(*question_ids)
+        ranked.invalidate(*question_ids)
+        transaction.on_commit(
+            lambda: (results.invalidate(*question_ids), ranked.invalidate(*question_ids)), robust=True
+        )
+
     def get_queryset(self):
         # Filtrer par question si spécifié
         question_id = self.request.query_params.get('question')
@@ -29,7 +57,7 @@ class ChoiceViewSet(viewsets.ModelViewSet):
             return Choice.objects.filter(question_id=question_id)
         return Choice.objects.all()
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(SparseFieldsetsMixin, BulkRetrieveMixin, viewsets.ModelViewSet):
     queryset = Question.objects.all().order_by('-pub_date')
     serializer_class = QuestionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
@@ -41,7 +69,8 @@ class QuestionViewSet(viewsets.ModelViewSet):
         summary="Voter pour un choix",
         description="Permet de voter pour un choix spécifique dans ce sondage"
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_classes=[VoteRateThrottle])
     def vote(self, request, pk=None):
         """Action personnalisée pour voter"""
         question = self.get_object()
@@ -53,6 +82,12 @@ class QuestionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if question.is_ranked:
+            return Response(
+                {'error': 'Sondage à classement : utilisez l\'action ballot.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # Récupérer le choix
         choice_id = request.data.get('choice_id')
         if not choice_id:
@@ -69,19 +104,68 @@ class QuestionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Voter (incrementer)
-        from django.db.models import F
-        choice.votes = F('votes') + 1
-        choice.save()
-        
-        # Recharger pour avoir la valeur actuelle
-        choice.refresh_from_db()
+        # Voter : votes stockés + votes en attente, sans relire la base
+        if not record_vote(choice, voter_key(request), request.user):
+            return Response(
+                {'error': 'Vous avez déjà voté pour ce sondage.'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         return Response({
             'message': 'Vote enregistré avec succès.',
             'choice': ChoiceSerializer(choice).data
         })
 
+    @extend_schema(
+        summary="Voter par classement",
+        description="Bulletin d'un sondage à classement : ranking = ids des choix par ordre de préférence"
+    )
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_classes=[VoteRateThrottle])
+    def ballot(self, request, pk=None):
+        """Action pour déposer un bulletin classé"""
+        question = self.get_object()
+        if not question.is_ranked:
+            return Response(
+                {'error': 'Ce sondage n\'est pas à classement : utilisez l\'action vote.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not question.is_active:
+            return Response(
+                {'error': 'Ce sondage est fermé et n\'accepte plus de votes.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ranking = request.data.get('ranking')
+        try:
+            if not isinstance(ranking, list):
+                raise ValueError('ranking doit être une liste d\'ids de choix.')
+            ranking = clean_ranking(question, ranking)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not cast_ballot(question, ranking, voter_key(request), request.user):
+            return Response(
+                {'error': 'Vous avez déjà voté pour ce sondage.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'message': 'Bulletin enregistré avec succès.', 'ranking': ranking})
+
+    @extend_schema(
+        summary="Résultats du vote alternatif",
+        description="Dépouillement par élimination successive, tour par tour"
+    )
+    @action(detail=True, methods=['get'])
+    def runoff(self, request, pk=None):
+        """Action pour les tours du vote alternatif"""
+        question = self.get_object()
+        if not question.is_ranked:
+            return Response(
+                {'error': 'Ce sondage n\'est pas à classement.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(get_runoff(question.pk))
+
     @extend_schema(
         summary="Obtenir les résultats du sondage",
         description="Retourne les résultats détaillés avec statistiques"
@@ -90,23 +174,56 @@ class QuestionViewSet(viewsets.ModelViewSet):
     def results(self, request, pk=None):
         """Action pour voir les résultats"""
         question = self.get_object()
-        choices = question.choice_set.all()
-        total_votes = sum(choice.votes for choice in choices)
-        
-        results_data = {
-            'question': QuestionSerializer(question).data,
-            'total_votes': total_votes,
-            'results': []
-        }
-        
-        for choice in choices:
-            percentage = (choice.votes / total_votes * 100) if total_votes > 0 else 0
-            results_data['results'].append({
-                'choice': ChoiceSerializer(choice).data,
-                'percentage': round(percentage, 2)
-            })
-        
-        return Response(results_data)
+        return Response(get_results(question.pk))
+
+    @extend_schema(
+        summary="Évolution des votes dans le temps",
+        description="Votes par minute ou par heure (interval), entre since et until (ISO 8601)",
+        parameters=[
+            OpenApiParameter('interval', str, enum=list(BUCKET_INTERVALS)),
+            OpenApiParameter('since', OpenApiTypes.DATETIME),
+            OpenApiParameter('until', OpenApiTypes.DATETIME),
+        ]
+    )
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Action pour les votes regroupés par tranche de temps"""
+        question = self.get_object()
+        interval = request.query_params.get('interval', 'hour')
+        if interval not in BUCKET_INTERVALS:
+            return Response(
+                {'error': f'interval doit valoir {" ou ".join(BUCKET_INTERVALS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_buckets = BUCKET_INTERVALS[interval][1]
+        step = datetime.timedelta(**{f'{interval}s': 1})
+
+        try:
+            until = self._parse_datetime(request.query_params.get('until')) or timezone.now()
+            since = self._parse_datetime(request.query_params.get('since')) or until - step * max_buckets
+        except ValueError:
+            return Response({'error': 'Date invalide (format ISO 8601 attendu).'}, status=status.HTTP_400_BAD_REQUEST)
+        if since >= until or until - since > step * max_buckets:
+            return Response(
+                {'error': f'La plage doit être positive et couvrir au plus {max_buckets} tranches.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'interval': interval,
+            'since': since,
+            'until': until,
+            'buckets': vote_buckets(question.pk, interval, since, until),
+        })
+
+    @staticmethod
+    def _parse_datetime(value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
 
     @extend_schema(
         summary="Basculer le statut actif/inactif",
@@ -0,0 +1,222 @@
+"""Enregistrement des votes : registre ``Vote`` et tampon d'écriture.
+
+Chaque vote ajoute une ligne au registre ``Vote`` (un seul vote par votant et
+par question, garanti par un index unique) et incrémente le compteur
+dénormalisé ``Choice.votes``, lu par les pages de résultats.
+
+Sans tampon, chaque vote exécute un ``INSERT`` et un ``UPDATE polls_choice SET
+votes = votes + 1`` sur une seule ligne : sur un sondage populaire, tous les
+votants attendent le même verrou. Avec ``VOTE_BUFFERING = True``, chaque
+worker cumule les votes et un thread les écrit toutes les
+``VOTE_BUFFER_FLUSH_INTERVAL`` secondes : un ``bulk_create`` pour le registre
+et un seul ``UPDATE ... SET votes = votes + CASE ... END`` pour les compteurs.
+
+Les résultats lisent le compteur stocké plus les votes en attente du worker
+courant (``results.get_results``) ; ceux des autres workers apparaissent au plus
+tard après un intervalle. Les votes en attente sont perdus si le processus
+est tué brutalement (un ``flush`` est fait à l'arrêt normal).
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import TruncHour, TruncMinute
+from accounts import activity
+from .models import Choice, Vote
+from . import results
+
+logger = logging.getLogger(__name__)
+
+# Fonction de troncature et plage maximale (en nombre de tranches) par intervalle
+BUCKET_INTERVALS = {
+    'minute': (TruncMinute, 24 * 60),
+    'hour': (TruncHour, 31 * 24),
+}
+
+
+def buffering_enabled():
+    return getattr(settings, 'VOTE_BUFFERING', False)
+
+
+def voter_key(request):
+    """Identifiant du votant : utilisateur, sinon cookie visitor_id, sinon session"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    visitor_id = request.COOKIES.get('visitor_id')
+    if visitor_id:
+        return f"visitor:{visitor_id[:48]}"
+    if not request.session.session_key:
+        request.session.save()
+    return f"session:{request.session.session_key}"
+
+
+def insert_votes(votes):
+    """Insère les votes non dupliqués en un ``bulk_create`` ; retourne ceux enregistrés"""
+    existing = set(Vote.objects.filter(
+        question_id__in={vote.question_id for vote in votes},
+        voter_id__in={vote.voter_id for vote in votes},
+    ).values_list('question_id', 'voter_id'))
+    fresh = []
+    for vote in votes:
+        key = (vote.question_id, vote.voter_id)
+        if key not in existing:
+            existing.add(key)
+            fresh.append(vote)
+    try:
+        with transaction.atomic():
+            Vote.objects.bulk_create(fresh)
+            # bulk_create n'envoie pas post_save : votes reçus des auteurs, en un passage
+            activity.add_votes(Counter(vote.question_id for vote in fresh))
+        return fresh
+    except IntegrityError:
+        # Un autre worker a inséré un doublon entre-temps : on repasse vote par vote
+        inserted = []
+        for vote in fresh:
+            vote.pk = None
+            try:
+                with transaction.atomic():
+                    vote.save()
+                inserted.append(vote)
+            except IntegrityError:
+                pass
+        return inserted
+
+
+def increment_counters(deltas):
+    """``{choice_id: delta}`` -> un seul UPDATE pour tous les choix"""
+    if deltas:
+        Choice.objects.filter(pk__in=list(deltas)).update(votes=F('votes') + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+
+
+class VoteBuffer:
+    """Votes en attente, vidés par un thread toutes les ``flush_interval`` secondes"""
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = flush_interval
+        self._votes = []
+        self._pending = {}
+        self._voters = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, vote):
+        """Met un vote en attente ; retourne le delta en attente pour son choix,
+        ou None si ce votant a déjà un vote en attente pour la question"""
+        with self._lock:
+            key = (vote.question_id, vote.voter_id)
+            if key in self._voters:
+                return None
+            self._voters.add(key)
+            self._votes.append(vote)
+            self._pending[vote.choice_id] = self._pending.get(vote.choice_id, 0) + 1
+            pending = self._pending[vote.choice_id]
+        self._ensure_thread()
+        return pending
+
+    def pending(self, choice_ids=None):
+        with self._lock:
+            if choice_ids is None:
+                return dict(self._pending)
+            return {pk: self._pending[pk] for pk in choice_ids if pk in self._pending}
+
+    def flush(self):
+        """Écrit le registre et les compteurs ; retourne le nombre de votes enregistrés"""
+        with self._lock:
+            votes, self._votes = self._votes, []
+            self._pending, self._voters = {}, set()
+        if not votes:
+            return 0
+        try:
+            with transaction.atomic():
+                inserted = insert_votes(votes)
+                increment_counters(Counter(vote.choice_id for vote in inserted))
+            results.invalidate(*{vote.question_id for vote in inserted})
+        except Exception:
+            # On remet les votes en attente : ils repartiront au prochain flush
+            for vote in votes:
+                vote.pk, vote._state.adding = None, True
+                self.add(vote)
+            raise
+        return len(inserted)
+
+    def _ensure_thread(self):
+        if self.flush_interval is None or (self._thread and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Échec du flush des votes, nouvel essai au prochain intervalle')
+
+
+buffer = VoteBuffer(flush_interval=getattr(settings, 'VOTE_BUFFER_FLUSH_INTERVAL', 0.25))
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception('Votes en attente perdus à l\'arrêt')
+
+
+def record_vote(choice, voter_id, user=None):
+    """Enregistre un vote et met à jour ``choice.votes`` sans relire la base.
+
+    Retourne False si ce votant a déjà voté pour la question.
+    """
+    vote = Vote(question_id=choice.question_id, choice=choice, voter_id=voter_id,
+                user=user if user is not None and user.is_authenticated else None)
+    if buffering_enabled():
+        if Vote.objects.filter(question_id=vote.question_id, voter_id=voter_id).exists():
+            return False
+        pending = buffer.add(vote)
+        if pending is None:
+            return False
+        choice.votes += pending
+        return True
+
+    try:
+        with transaction.atomic():
+            vote.save()
+            Choice.objects.filter(pk=choice.pk).update(votes=F('votes') + 1)
+    except IntegrityError:
+        return False
+    results.invalidate(choice.question_id)
+    choice.votes += 1
+    return True
+
+
+def vote_buckets(question_id, interval, since, until):
+    """Votes par tranche de temps et par choix, lus par l'index (question, created_at)"""
+    trunc = BUCKET_INTERVALS[interval][0]
+    rows = Vote.objects.filter(
+        question_id=question_id, created_at__gte=since, created_at__lt=until
+    ).annotate(bucket=trunc('created_at')).values('bucket', 'choice_id').annotate(
+        count=Count('id')
+    ).order_by('bucket', 'choice_id')
+
+    buckets = []
+    for row in rows:
+        if not buckets or buckets[-1]['start'] != row['bucket']:
+            buckets.append({'start': row['bucket'], 'total': 0, 'choices': {}})
+        buckets[-1]['total'] += row['count']
+        buckets[-1]['choices'][row['choice_id']] = row['count']
+    return buckets
@@ -0,0 +1,443 @@
+"""Outils DRF partagés par les API blog et polls.
+
+Fieldsets partiels : ``?fields=id,title,comments.content`` ne garde que les
+champs listés, ``?omit=content,comments.author`` retire des champs (la notation
+pointée descend dans les serializers imbriqués). Les champs sont retirés du
+serializer avant la sérialisation, et le queryset est réduit en conséquence
+(``only()`` sur les colonnes utiles, ``prefetch_related`` uniquement pour les
+relations demandées).
+
+Chargement anticipé : ``EagerLoadingMixin`` lit les ``source`` des champs du
+serializer (``author.username``, ``choice_set``...) et applique les
+``select_related`` / ``prefetch_related`` correspondants, sans N+1 par élément.
+
+Opérations groupées : ``BulkRetrieveMixin`` et ``BulkCreateMixin`` ajoutent une
+route ``bulk/`` aux viewsets, avec une taille maximale et des erreurs par élément.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework import permissions, serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+def parse_fieldset(value):
+    """``"id,comments.content"`` -> ``{'id': {}, 'comments': {'content': {}}}``"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class FieldsetSpec:
+    """Champs gardés (``include``, None = tous) et champs retirés (``omit``)"""
+
+    def __init__(self, include=None, omit=None):
+        self.include = include
+        self.omit = omit or {}
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        params = getattr(request, 'query_params', {})
+        if 'fields' not in params and 'omit' not in params:
+            return None
+        include = parse_fieldset(params['fields']) if 'fields' in params else None
+        return cls(include or None, parse_fieldset(params.get('omit')))
+
+    def keeps(self, name):
+        if self.include is not None and name not in self.include:
+            return False
+        # Une feuille de omit retire le champ, un nœud descend dans le serializer imbriqué
+        return not (name in self.omit and not self.omit[name])
+
+    def child(self, name):
+        include = self.include.get(name) if self.include is not None else None
+        return FieldsetSpec(include or None, self.omit.get(name))
+
+
+class SparseFieldsetsSerializerMixin:
+    """Retire du serializer les champs exclus par ``?fields=`` / ``?omit=``"""
+
+    def _get_fieldset_spec(self):
+        if hasattr(self, '_fieldset_spec'):
+            return self._fieldset_spec
+        # Seul le serializer racine lit la requête ; les imbriqués reçoivent leur spec du parent
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return None
+        return self.context.get('fieldset_spec')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self._get_fieldset_spec()
+        if spec is None:
+            return fields
+
+        for name in list(fields):
+            if not spec.keeps(name):
+                del fields[name]
+                continue
+            nested = fields[name]
+            if isinstance(nested, serializers.ListSerializer):
+                nested = nested.child
+            if isinstance(nested, SparseFieldsetsSerializerMixin):
+                nested._fieldset_spec = spec.child(name)
+        return fields
+
+
+def _resolve_path(model, parts):
+    """Convertit une source DRF (``author.username``) en lookups ORM.
+
+    Retourne ``(only, select_related)`` ou None si la source n'est pas un champ concret.
+    """
+    only, select, path = [], [], []
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        path.append(part)
+        only.append('__'.join(path))
+        if field.is_relation and index < len(parts) - 1:
+            select.append('__'.join(path))
+            model = field.related_model
+        elif index < len(parts) - 1:
+            return None
+    return only, select
+
+
+def _get_model_field(model, name):
+    """Comme ``_meta.get_field`` mais accepte aussi les accesseurs inverses (``choice_set``)"""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for relation in model._meta.related_objects:
+            if relation.get_accessor_name() == name:
+                return relation
+        raise
+
+
+class QueryPlan:
+    """Relations à charger (et colonnes à garder) déduites des sources d'un serializer.
+
+    ``select`` : chemins ``select_related`` ; ``prefetch`` : relations multiples,
+    avec le plan du serializer imbriqué ; ``only`` : colonnes gardées (None = toutes) ;
+    ``unresolved`` : champs dont la source n'est pas un champ concret.
+    """
+
+    def __init__(self, model, parent_field=None):
+        self.model = model
+        self.parent_field = parent_field
+        self.select = set()
+        self.prefetch = {}
+        self.only = None
+        self.unresolved = []
+
+    @classmethod
+    def from_serializer(cls, model, serializer, required=(), narrow=False, parent_field=None):
+        plan = cls(model, parent_field)
+        only = {model._meta.pk.name, *required}
+
+        for name, field in serializer.fields.items():
+            if field.source == '*':
+                plan.unresolved.append(name)
+                continue
+            parts = field.source.split('.')
+            try:
+                model_field = _get_model_field(model, parts[0])
+            except FieldDoesNotExist:
+                # Propriété ou méthode du modèle : on ne sait pas quelles colonnes elle lit
+                plan.unresolved.append(name)
+                continue
+
+            if model_field.one_to_many and len(parts) == 1:
+                child = field.child if isinstance(field, serializers.ListSerializer) else field
+                child_plan = None
+                if isinstance(child, serializers.Serializer):
+                    # La FK vers le parent est indispensable au prefetch
+                    fk = model_field.field.name
+                    child_plan = cls.from_serializer(
+                        model_field.related_model, child, required=[fk], narrow=narrow, parent_field=fk
+                    )
+                plan.prefetch[parts[0]] = child_plan
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                plan.prefetch[parts[0]] = None
+                plan.unresolved.append(name)
+                continue
+
+            resolved = _resolve_path(model, parts)
+            if resolved is None:
+                plan.unresolved.append(name)
+                continue
+            only.update(resolved[0])
+            plan.select.update(resolved[1])
+
+        for child_plan in plan.prefetch.values():
+            if child_plan is not None:
+                child_plan._drop_loaded_by_parent(plan.select)
+        if narrow and not plan.unresolved:
+            plan.only = only
+        return plan
+
+    def _drop_loaded_by_parent(self, parent_select):
+        """Le prefetch rattache chaque enfant à son parent déjà chargé : ``question__author``
+        est inutile côté choix si la question a déjà ``author`` en ``select_related``"""
+        prefix = f'{self.parent_field}__'
+
+        def loaded(path):
+            return path == self.parent_field or (
+                path.startswith(prefix) and path[len(prefix):] in parent_select
+            )
+
+        dropped = {path for path in self.select if loaded(path)}
+        if not dropped:
+            return
+        self.select -= dropped
+        if self.only is not None:
+            self.only = {
+                path for path in self.only
+                if not any(path.startswith(f'{relation}__') for relation in dropped)
+            }
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*(
+                Prefetch(name, queryset=child.apply(child.model._default_manager.all())) if child else name
+                for name, child in self.prefetch.items()
+            ))
+        if self.only is not None:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    def describe(self):
+        """Résumé lisible du plan, ex. ``select_related=author; prefetch_related=choice_set``"""
+        parts = []
+        if self.select:
+            parts.append('select_related=' + ','.join(sorted(self.select)))
+        if self.prefetch:
+            lookups = []
+            for name, child in self.prefetch.items():
+                detail = child.describe() if child else ''
+                lookups.append(f'{name}({detail})' if detail else name)
+            parts.append('prefetch_related=' + ','.join(lookups))
+        if self.only is not None:
+            parts.append('only=' + ','.join(sorted(self.only)))
+        if self.unresolved:
+            parts.append('unresolved=' + ','.join(self.unresolved))
+        return '; '.join(parts)
+
+
+def plan_queryset(queryset, serializer, required=()):
+    """Réduit le queryset aux colonnes et relations utilisées par ``serializer.fields``"""
+    return QueryPlan.from_serializer(queryset.model, serializer, required, narrow=True).apply(queryset)
+
+
+class EagerLoadingMixin:
+    """Mixin de viewset : ``select_related`` / ``prefetch_related`` déduits des sources du serializer.
+
+    Appliqué aux actions listées dans ``eager_loading_actions`` ; en DEBUG, le plan
+    retenu est renvoyé dans l'en-tête ``X-Query-Plan`` (et journalisé).
+    """
+    eager_loading_actions = ('list', 'retrieve', 'bulk_retrieve')
+
+    def get_query_plan(self, queryset):
+        if getattr(self, 'action', None) not in self.eager_loading_actions:
+            return None
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return QueryPlan.from_serializer(queryset.model, serializer)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = self.get_query_plan(queryset)
+        if plan is None:
+            return queryset
+        self.query_plan = plan
+        logger.debug('%s.%s : %s', type(self).__name__, self.action, plan.describe() or 'aucune relation')
+        return plan.apply(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        plan = getattr(self, 'query_plan', None)
+        if settings.DEBUG and plan is not None:
+            response['X-Query-Plan'] = plan.describe() or '-'
+        return response
+
+
+class SparseFieldsetsMixin(EagerLoadingMixin):
+    """Mixin de viewset : passe la spec au serializer et réduit le queryset"""
+
+    def get_fieldset_spec(self):
+        if not hasattr(self, '_fieldset_spec'):
+            self._fieldset_spec = FieldsetSpec.from_request(getattr(self, 'request', None))
+        return self._fieldset_spec
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset_spec'] = self.get_fieldset_spec()
+        return context
+
+    def get_query_plan(self, queryset):
+        if self.get_fieldset_spec() is None:
+            return super().get_query_plan(queryset)
+        # Le serializer ne garde que les champs demandés : le plan ne charge que ceux-là
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return QueryPlan.from_serializer(queryset.model, serializer, narrow=True)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Résout la clé dans un dict pré-chargé au lieu d'un ``get()`` par élément"""
+
+    def __init__(self, instances, **kwargs):
+        self.instances = instances
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.instances[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+def parse_id_list(value):
+    """``"1,2,x"`` -> ``([1, 2], ['x'])`` : ids valides et valeurs rejetées"""
+    ids, invalid = [], []
+    for raw in (value or '').split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        if raw.isdigit():
+            if int(raw) not in ids:
+                ids.append(int(raw))
+        else:
+            invalid.append(raw)
+    return ids, invalid
+
+
+class BulkRetrieveMixin:
+    """``GET <liste>/bulk/?ids=1,2,3`` : plusieurs objets en une seule requête"""
+    bulk_max_items = 100
+
+    @action(detail=False, methods=['get'], url_path='bulk')
+    def bulk_retrieve(self, request):
+        ids, invalid = parse_id_list(request.query_params.get('ids'))
+        if not ids and not invalid:
+            return Response({'error': 'Le paramètre ids est requis.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.bulk_max_items:
+            return Response(
+                {'error': f'Maximum {self.bulk_max_items} ids par requête.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        found = {obj.pk: obj for obj in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)}
+        results = [found[pk] for pk in ids if pk in found]
+        errors = [{'id': value, 'error': 'Identifiant invalide.'} for value in invalid]
+        errors += [{'id': pk, 'error': 'Introuvable.'} for pk in ids if pk not in found]
+        return Response({
+            'results': self.get_serializer(results, many=True).data,
+            'errors': errors,
+        })
+
+
+class BulkCreateMixin:
+    """``POST <liste>/bulk/`` avec une liste d'objets : validation par élément,
+    un seul ``bulk_create`` dans une transaction pour les éléments valides.
+
+    Les clés étrangères listées dans ``bulk_preload_fields`` sont chargées en une
+    requête pour tout le lot. Réponse 201 si tout est créé, 207 si une partie
+    est en erreur, 400 si rien n'est valide. Sur MySQL, ``bulk_create`` ne
+    renvoie pas les clés primaires : ``id`` vaut alors null dans la réponse.
+    """
+    bulk_max_items = 100
+    bulk_preload_fields = ()
+
+    def get_bulk_save_kwargs(self):
+        return {}
+
+    def validate_bulk_item(self, validated_data):
+        """Contrôle supplémentaire par élément : retourne un message d'erreur ou None"""
+        return None
+
+    def after_bulk_create(self, objects):
+        """Appelé dans la transaction après l'insertion : ``bulk_create`` n'envoie pas
+        ``post_save``, les caches et compteurs tenus par signaux sont à mettre à jour ici"""
+
+    def _preload_related(self, items):
+        preloaded = {}
+        fields = self.get_serializer().fields
+        for name in self.bulk_preload_fields:
+            ids = {item.get(name) for item in items if isinstance(item, dict)}
+            ids = [int(pk) for pk in ids if str(pk).isdigit()]
+            preloaded[name] = fields[name].get_queryset().in_bulk(ids)
+        return preloaded
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            permission_classes=[permissions.IsAuthenticated])
+    def bulk_create(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Une liste non vide est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'error': f'Maximum {self.bulk_max_items} éléments par requête.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        preloaded = self._preload_related(items)
+        model = self.get_queryset().model
+        save_kwargs = self.get_bulk_save_kwargs()
+        objects, indexes, errors = [], [], []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            for name, instances in preloaded.items():
+                serializer.fields[name] = PreloadedPrimaryKeyRelatedField(
+                    instances, queryset=serializer.fields[name].get_queryset()
+                )
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            message = self.validate_bulk_item(serializer.validated_data)
+            if message:
+                errors.append({'index': index, 'errors': {'non_field_errors': [message]}})
+                continue
+            objects.append(model(**serializer.validated_data, **save_kwargs))
+            indexes.append(index)
+
+        if objects:
+            with transaction.atomic():
+                model._default_manager.bulk_create(objects)
+                self.after_bulk_create(objects)
+
+        if not objects:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': [
+                {'index': index, 'data': data}
+                for index, data in zip(indexes, self.get_serializer(objects, many=True).data)
+            ],
+            'errors': errors,
+        }, status=response_status)
@@ -3,6 +3,10 @@ ASGI config for tp_django project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production runs on this entry point (see Procfile) so that long-lived
+responses such as the live poll results stream (``polls.live``) hold an
+event-loop task instead of a whole worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,209 @@
+"""Cache à deux niveaux : LRU par processus devant le cache partagé (``CACHES``).
+
+``tiered.get_or_compute(key, compute, timeout)`` cherche d'abord dans le LRU du
+processus (entrées gardées au plus ``CACHE_LOCAL_TTL`` secondes), puis dans le
+cache partagé, et n'appelle ``compute`` qu'en dernier recours. Le cache partagé
+stocke ``(valeur, frais_jusqu'à)`` et garde l'entrée ``CACHE_STALE_TTL``
+secondes de plus : passé ``timeout``, un seul worker (verrou ``cache.add``)
+recalcule pendant que les autres servent la valeur périmée. Sur une absence
+totale (invalidation), les autres attendent brièvement le résultat du premier.
+
+Avec ``namespace``, la clé inclut la version de l'espace de noms : ``bump``
+invalide d'un coup toutes ses clés (ex. la page d'accueil à chaque article).
+Les autres processus voient la nouvelle version au plus ``CACHE_LOCAL_TTL``
+secondes plus tard. Si le cache partagé est lui-même en mémoire (LocMemCache),
+le niveau local n'apporterait rien : il est désactivé.
+
+Les valeurs du niveau local sont partagées entre requêtes : ne pas les modifier.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+LOCAL_MAX_ENTRIES = getattr(settings, 'CACHE_LOCAL_MAX_ENTRIES', 1000)
+LOCAL_TTL = getattr(settings, 'CACHE_LOCAL_TTL', 2)
+STALE_TTL = getattr(settings, 'CACHE_STALE_TTL', 60)
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.02
+
+COUNTERS = ('local_hits', 'shared_hits', 'stale', 'misses', 'recomputes', 'waits')
+
+
+class TieredCache:
+    """LRU local + cache partagé, recalcul en vol unique et compteurs par processus"""
+
+    def __init__(self, alias='default', maxsize=LOCAL_MAX_ENTRIES, local_ttl=LOCAL_TTL, stale_ttl=STALE_TTL):
+        self.alias = alias
+        self.maxsize = maxsize
+        self.local_ttl = local_ttl
+        self.stale_ttl = stale_ttl
+        self._local = OrderedDict()
+        self._versions = {}
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def local_enabled(self):
+        return self.maxsize > 0 and self.local_ttl > 0 and not isinstance(self.shared, LocMemCache)
+
+    # Versions d'espaces de noms
+
+    def version_key(self, namespace):
+        return f"{namespace}:version"
+
+    def version(self, namespace, now=None):
+        now = time.time() if now is None else now
+        cached = self._versions.get(namespace)
+        if cached is not None and cached[1] > now and self.local_enabled:
+            return cached[0]
+        version = self.shared.get(self.version_key(namespace))
+        if version is None:
+            # Départ horodaté : une version perdue (éviction) ne retombe pas sur d'anciennes clés
+            self.shared.add(self.version_key(namespace), int(now * 1000), None)
+            version = self.shared.get(self.version_key(namespace), int(now * 1000))
+        self._versions[namespace] = (version, now + self.local_ttl)
+        return version
+
+    def bump(self, namespace):
+        """Invalide toutes les clés de l'espace de noms"""
+        try:
+            version = self.shared.incr(self.version_key(namespace))
+        except ValueError:
+            version = int(time.time() * 1000)
+            self.shared.set(self.version_key(namespace), version, None)
+        self._versions[namespace] = (version, time.time() + self.local_ttl)
+        return version
+
+    def full_key(self, key, namespace=None):
+        if namespace is None:
+            return key
+        return f"{namespace}:v{self.version(namespace)}:{key}"
+
+    # Lecture
+
+    def get_or_compute(self, key, compute, timeout, namespace=None):
+        key = self.full_key(key, namespace)
+        now = time.time()
+
+        value = self._local_get(key, now)
+        if value is not None:
+            self._count('local_hits')
+            return value[0]
+
+        envelope = self.shared.get(key)
+        if envelope is not None:
+            value, fresh_until = envelope
+            if fresh_until > now:
+                self._count('shared_hits')
+                self._local_set(key, envelope, now)
+                return value
+            if self._acquire(key):
+                self._count('stale')
+                return self._recompute(key, compute, timeout)
+            # Un autre worker recalcule : la valeur périmée en attendant
+            self._count('stale')
+            return value
+
+        self._count('misses')
+        if self._acquire(key):
+            return self._recompute(key, compute, timeout)
+        return self._wait(key, compute, timeout)
+
+    def delete(self, *keys, namespace=None):
+        keys = [self.full_key(key, namespace) for key in keys]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        self.shared.delete_many(keys)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._versions.clear()
+
+    def stats(self):
+        """Compteurs du processus et taux de réponses servies sans recalcul"""
+        with self._lock:
+            stats = dict(self._counters)
+        served = stats['local_hits'] + stats['shared_hits'] + stats['stale']
+        total = served + stats['misses']
+        stats['hit_ratio'] = round(served / total * 100, 1) if total else 0
+        stats['local_entries'] = len(self._local)
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters = dict.fromkeys(COUNTERS, 0)
+
+    # Interne
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _lock_key(self, key):
+        return f"{key}:lock"
+
+    def _acquire(self, key):
+        return self.shared.add(self._lock_key(key), True, LOCK_TIMEOUT)
+
+    def _recompute(self, key, compute, timeout, locked=True):
+        try:
+            self._count('recomputes')
+            value = compute()
+            envelope = (value, time.time() + timeout)
+            self.shared.set(key, envelope, timeout + self.stale_ttl)
+            self._local_set(key, envelope, time.time())
+            return value
+        finally:
+            if locked:
+                self.shared.delete(self._lock_key(key))
+
+    def _wait(self, key, compute, timeout):
+        # Le premier worker calcule : on attend son résultat plutôt que de recalculer
+        self._count('waits')
+        deadline = time.time() + WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            envelope = self.shared.get(key)
+            if envelope is not None:
+                return envelope[0]
+            if self._acquire(key):
+                return self._recompute(key, compute, timeout)
+        # Calcul trop long ou verrou abandonné (worker tué) : on calcule sans attendre davantage
+        return self._recompute(key, compute, timeout, locked=False)
+
+    def _local_get(self, key, now):
+        if not self.local_enabled:
+            return None
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return (entry[0],)
+
+    def _local_set(self, key, envelope, now):
+        if not self.local_enabled:
+            return
+        value, fresh_until = envelope
+        with self._lock:
+            self._local[key] = (value, min(fresh_until, now + self.local_ttl))
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+
+tiered = TieredCache()
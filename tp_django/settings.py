@@ -99,6 +99,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'tp_django.wsgi.application'
 
+# Tests: FEEDS_ROOT en un directorio temporal (tp_django.test_runner)
+TEST_RUNNER = 'tp_django.test_runner.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -124,6 +127,45 @@ else:
         }
     }
 
+# Caché compartida (nivel 2 de tp_django.cache): CACHE_BACKEND elige el almacenamiento
+#   locmem    : memoria del proceso (por defecto en desarrollo; no compartida entre workers)
+#   file      : ficheros en CACHE_LOCATION (por defecto en producción; add() no es atómico,
+#               el cerrojo de tp_django.throttling no es estricto entre workers)
+#   memcached : servidor memcached en CACHE_LOCATION (requiere pymemcache)
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, '.cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+        # Cambiar CACHE_VERSION invalida todas las claves (p. ej. al cambiar el formato de un payload)
+        'VERSION': int(os.environ.get('CACHE_VERSION', 1)),
+        'TIMEOUT': 300,
+    }
+}
+# Nivel 1 (LRU por proceso delante de la caché compartida) y margen durante el cual
+# una entrada caducada se sigue sirviendo mientras un solo worker la recalcula
+CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 1000))
+CACHE_LOCAL_TTL = float(os.environ.get('CACHE_LOCAL_TTL', 2))
+CACHE_STALE_TTL = int(os.environ.get('CACHE_STALE_TTL', 60))
+
+# Sesiones: SESSION_BACKEND elige el almacenamiento
+#   db             : tabla django_session, una lectura por petición que usa la sesión
+#   cached_db      : caché primero, base de datos si falta (escrituras en ambas)
+#   cache          : solo caché (exige un caché compartido entre workers, p. ej. Redis)
+#   signed_cookies : datos firmados en la cookie, ninguna consulta (límite ~4 KB)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -183,6 +225,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Flux RSS/Atom et sitemap pré-générés (blog.feeds)
+FEEDS_ROOT = os.path.join(BASE_DIR, 'feeds')
+FEEDS_CACHE_MAX_AGE = int(os.environ.get('FEEDS_CACHE_MAX_AGE', 6 * 60 * 60))
+# Intervalo mínimo entre dos reensamblados del sitemap tras una escritura; las marcas
+# pendientes las recoge `manage.py build_feeds --sitemap` (tarea periódica)
+FEEDS_SITEMAP_INTERVAL = int(os.environ.get('FEEDS_SITEMAP_INTERVAL', 300))
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Autocomplétion en mémoire (blog.autocomplete) : rechargement périodique par processus
+AUTOCOMPLETE_MAX_AGE = int(os.environ.get('AUTOCOMPLETE_MAX_AGE', 5 * 60))
+
+# Tampon de votes (polls.vote_buffer) : écritures groupées toutes les N secondes par worker
+VOTE_BUFFERING = os.environ.get('VOTE_BUFFERING', 'False') == 'True'
+VOTE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('VOTE_BUFFER_FLUSH_INTERVAL', 0.25))
+POLL_RESULTS_CACHE_TIMEOUT = int(os.environ.get('POLL_RESULTS_CACHE_TIMEOUT', 60 * 60))
+
+# Resultados en directo por SSE (polls.live) : intervalo máximo entre dos envíos por pregunta
+LIVE_RESULTS_INTERVAL_MS = int(os.environ.get('LIVE_RESULTS_INTERVAL_MS', 1000))
+# El flujo solo se abre bajo ASGI (Procfile) ; si no, o con LIVE_RESULTS_STREAM=False,
+# la página de resultados consulta la API cada LIVE_RESULTS_POLL_MS milisegundos
+LIVE_RESULTS_STREAM = os.environ.get('LIVE_RESULTS_STREAM', 'True') == 'True'
+LIVE_RESULTS_POLL_MS = int(os.environ.get('LIVE_RESULTS_POLL_MS', 5000))
+
+# Limitation de débit (tp_django.throttling) : seau à jetons par client, "capacité/période"
+THROTTLE_RATES = {
+    'vote': os.environ.get('THROTTLE_RATE_VOTE', '30/min'),
+    'comment': os.environ.get('THROTTLE_RATE_COMMENT', '10/min'),
+}
+
+# Suppression par lots (accounts.deletion) : taille des tranches, et seuil au-delà
+# duquel la suppression d'un compte se termine en arrière-plan
+DELETION_BATCH_SIZE = int(os.environ.get('DELETION_BATCH_SIZE', 1000))
+DELETION_ASYNC_THRESHOLD = int(os.environ.get('DELETION_ASYNC_THRESHOLD', 20000))
+
+# Authentification JWT de l'API (accounts.authentication) : utilisateurs en cache LRU
+# par processus (taille, durée de vie en secondes), cache partagé en second niveau
+# en option, et lectures (GET/HEAD/OPTIONS) sur les seuls claims du jeton en option
+JWT_USER_CACHE_SIZE = int(os.environ.get('JWT_USER_CACHE_SIZE', 5000))
+JWT_USER_CACHE_TTL = int(os.environ.get('JWT_USER_CACHE_TTL', 60))
+JWT_USER_CACHE_SHARED = os.environ.get('JWT_USER_CACHE_SHARED', 'False') == 'True'
+JWT_STATELESS_READS = os.environ.get('JWT_STATELESS_READS', 'False') == 'True'
+
 # Django Debug Toolbar
 INTERNAL_IPS = [
     "127.0.0.1",
@@ -191,7 +275,7 @@ INTERNAL_IPS = [
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -0,0 +1,19 @@
+"""Lanceur de tests : les fichiers générés pendant les tests restent hors du dépôt."""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """``DiscoverRunner`` avec ``FEEDS_ROOT`` dans un répertoire temporaire, supprimé à la fin"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.feeds_root = tempfile.mkdtemp(prefix='tp_django-feeds-')
+        settings.FEEDS_ROOT = self.feeds_root
+
+    def teardown_test_environment(self, **kwargs):
+        shutil.rmtree(self.feeds_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -60,4 +60,116 @@ class MainUrlsTest(TestCase):
     def test_404_handling(self):
         """Test de manejo de URLs inexistentes"""
         response = self.client.get('/nonexistent-url/')
-        self.assertEqual(response.status_code, 404)
\ No newline at end of file
+        self.assertEqual(response.status_code, 404)
+
+class TieredCacheTest(TestCase):
+    """Tests du cache à deux niveaux (tp_django.cache)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.calls = []
+
+    def compute(self, value):
+        def compute():
+            self.calls.append(value)
+            return value
+        return compute
+
+    def test_stale_value_served_while_another_worker_recomputes(self):
+        """Test qu'une entrée périmée est servie telle quelle tant qu'un autre worker tient le verrou"""
+        import time
+        from tp_django.cache import TieredCache
+
+        tiered = TieredCache()
+        tiered.shared.set('k', ('ancienne', time.time() - 1), 60)
+        tiered.shared.add('k:lock', True, 30)
+        self.assertEqual(tiered.get_or_compute('k', self.compute('nouvelle'), 60), 'ancienne')
+        self.assertEqual(self.calls, [])
+
+        tiered.shared.delete('k:lock')
+        self.assertEqual(tiered.get_or_compute('k', self.compute('nouvelle'), 60), 'nouvelle')
+        self.assertEqual(tiered.get_or_compute('k', self.compute('encore'), 60), 'nouvelle')
+        self.assertEqual(self.calls, ['nouvelle'])
+        stats = tiered.stats()
+        self.assertEqual((stats['stale'], stats['shared_hits'], stats['recomputes']), (2, 1, 1))
+        self.assertFalse(tiered.shared.get('k:lock'))
+
+    def test_miss_waits_for_the_lock_holder(self):
+        """Test qu'une absence attend le résultat du worker qui calcule au lieu de recalculer"""
+        import time
+        from unittest import mock
+        from tp_django.cache import TieredCache
+
+        tiered = TieredCache()
+        tiered.shared.add('k:lock', True, 30)
+        other_worker = lambda seconds: tiered.shared.set('k', ('calculée ailleurs', time.time() + 60), 60)
+        with mock.patch('tp_django.cache.time.sleep', side_effect=other_worker):
+            value = tiered.get_or_compute('k', self.compute('ici'), 60)
+        self.assertEqual(value, 'calculée ailleurs')
+        self.assertEqual(self.calls, [])
+        self.assertEqual((tiered.stats()['misses'], tiered.stats()['waits']), (1, 1))
+
+    def test_local_tier_in_front_of_file_cache(self):
+        """Test du LRU local devant un cache fichier : succès sans accès au cache partagé, éviction"""
+        import tempfile
+        from unittest import mock
+        from django.test import override_settings
+        from tp_django.cache import TieredCache
+
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            tiered = TieredCache(maxsize=2, local_ttl=60)
+            self.assertTrue(tiered.local_enabled)
+            tiered.get_or_compute('a', self.compute('A'), 60)
+            with mock.patch.object(type(tiered.shared), 'get') as shared_get:
+                self.assertEqual(tiered.get_or_compute('a', self.compute('A2'), 60), 'A')
+            shared_get.assert_not_called()
+
+            tiered.get_or_compute('b', self.compute('B'), 60)
+            tiered.get_or_compute('c', self.compute('C'), 60)
+            self.assertEqual(tiered.stats()['local_entries'], 2)
+            # 'a' évincée du LRU, encore dans le cache fichier
+            self.assertEqual(tiered.get_or_compute('a', self.compute('A3'), 60), 'A')
+            self.assertEqual(self.calls, ['A', 'B', 'C'])
+
+            tiered.delete('a')
+            self.assertEqual(tiered.get_or_compute('a', self.compute('A4'), 60), 'A4')
+        self.assertFalse(TieredCache().local_enabled)
+
+    def test_namespace_bump_invalidates_keys(self):
+        """Test qu'un changement de version rend invisibles toutes les clés de l'espace de noms"""
+        from tp_django.cache import TieredCache
+
+        tiered = TieredCache()
+        self.assertEqual(tiered.get_or_compute('k', self.compute(1), 60, namespace='ns'), 1)
+        self.assertEqual(tiered.get_or_compute('k', self.compute(2), 60, namespace='ns'), 1)
+        tiered.bump('ns')
+        self.assertEqual(tiered.get_or_compute('k', self.compute(3), 60, namespace='ns'), 3)
+        self.assertEqual(tiered.get_or_compute('k', self.compute(4), 60), 4)
+
+    def test_home_feed_cached_until_article_written(self):
+        """Test que l'accueil est servi du cache et change dès qu'un article est publié"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        author = User.objects.create_user(username='author', password='testpass123')
+        Article.objects.create(title='Premier', content='Contenu', author=author)
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/')
+        self.assertContains(response, 'Premier')
+        self.assertEqual([q for q in ctx.captured_queries if '"blog_' in q['sql']], [])
+
+        Article.objects.create(title='Second', content='Contenu', author=author)
+        self.assertContains(self.client.get('/'), 'Second')
+
+    def test_dashboard_shows_cache_counters(self):
+        """Test que le tableau de bord staff affiche les compteurs du cache"""
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        self.client.get(reverse('accounts:dashboard'))
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertContains(response, 'Cache (ce processus)')
+        self.assertEqual(response.context['total_users'], User.objects.count())
@@ -0,0 +1,177 @@
+"""Limitation de débit par client (seau à jetons), pour DRF et les vues Django.
+
+Chaque portée (``vote``, ``comment``) a un débit ``THROTTLE_RATES`` de la forme
+``"10/min"`` : un seau de 10 jetons par client, rempli de 10 jetons par minute.
+Le client est identifié par son utilisateur, sinon son cookie ``visitor_id``,
+sinon son IP. L'état des seaux vit dans le cache partagé (tous les workers),
+modifié sous un verrou court (``cache.add``) : des requêtes simultanées du même
+client ne peuvent pas dépenser deux fois le même jeton. Ce verrou n'est fiable
+qu'avec un ``add`` atomique (locmem, memcached, redis) : avec ``FileBasedCache``
+(``CACHE_BACKEND=file``), ``add`` lit puis écrit le fichier et deux workers
+peuvent prendre le verrou ensemble. Chaque processus garde
+en plus, pour les clients refusés, l'heure du prochain jeton : les requêtes
+suivantes sont refusées sans toucher au cache ni à la base.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.throttling import BaseThrottle
+from accounts.middleware import get_client_ip
+
+PERIODS = {'s': 1, 'sec': 1, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+LOCAL_MAX_BLOCKED = 10000
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.05
+LOCK_INTERVAL = 0.002
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 10 / 60)`` : capacité et jetons par seconde"""
+    count, _, period = rate.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def client_key(request):
+    """Identifiant du client : utilisateur, sinon cookie visitor_id, sinon IP"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    visitor_id = request.COOKIES.get('visitor_id')
+    if visitor_id:
+        return f"visitor:{visitor_id[:48]}"
+    return f"ip:{get_client_ip(request)}"
+
+
+class TokenBucket:
+    """Seau à jetons d'une portée : état dans le cache, refus mémorisés par processus"""
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.capacity, self.refill = parse_rate(rate)
+        self.timeout = int(self.capacity / self.refill) + 1
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, key):
+        return f"throttle:{self.scope}:{key}"
+
+    def consume(self, key, cost=1, now=None):
+        """Prend ``cost`` jetons : retourne ``(autorisé, secondes avant de pouvoir réessayer)``"""
+        now = time.time() if now is None else now
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return False, blocked_until - now
+            with self._lock:
+                self._blocked.pop(key, None)
+
+        if not self._acquire(key):
+            # Rafale concurrente du même client : le verrou reste pris, on refuse
+            return False, LOCK_WAIT
+        try:
+            tokens, stamp = cache.get(self.cache_key(key)) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + max(now - stamp, 0) * self.refill)
+            if tokens < cost:
+                if tokens < 1:
+                    # Mémorisé seulement si même une requête d'un jeton serait refusée
+                    self._block(key, now + (1 - tokens) / self.refill, now)
+                return False, (cost - tokens) / self.refill
+            cache.set(self.cache_key(key), (tokens - cost, now), self.timeout)
+            return True, 0
+        finally:
+            cache.delete(self._lock_key(key))
+
+    def _lock_key(self, key):
+        return f"{self.cache_key(key)}:lock"
+
+    def _acquire(self, key):
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(self._lock_key(key), True, LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_INTERVAL)
+        return True
+
+    def _block(self, key, until, now):
+        with self._lock:
+            if len(self._blocked) >= LOCAL_MAX_BLOCKED:
+                self._blocked = {k: t for k, t in self._blocked.items() if t > now}
+            self._blocked[key] = until
+
+    def reset(self):
+        """Oublie les refus mémorisés par ce processus (l'état du cache est inchangé)"""
+        with self._lock:
+            self._blocked.clear()
+
+
+_buckets = {}
+
+
+def get_bucket(scope):
+    """Seau de la portée, créé au premier usage avec le débit de ``THROTTLE_RATES``"""
+    bucket = _buckets.get(scope)
+    if bucket is None:
+        bucket = _buckets.setdefault(scope, TokenBucket(scope, settings.THROTTLE_RATES[scope]))
+    return bucket
+
+
+def throttle(scope):
+    """Décorateur de vue Django : 429 avec ``Retry-After`` si le client dépasse son débit.
+
+    Seules les méthodes d'écriture consomment un jeton.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in permissions.SAFE_METHODS:
+                allowed, wait = get_bucket(scope).consume(client_key(request))
+                if not allowed:
+                    response = HttpResponse("Trop de requêtes, réessayez plus tard.", status=429)
+                    response['Retry-After'] = str(int(wait) + 1)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle DRF : même seau que le décorateur ``throttle`` pour la portée ``scope``"""
+    scope = None
+
+    def allow_request(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        bucket = get_bucket(self.scope)
+        cost = self.get_cost(request, view)
+        if cost > bucket.capacity:
+            # Le seau ne contient jamais assez de jetons : réessayer ne servirait à rien
+            raise ValidationError({'error': f'Maximum {bucket.capacity} éléments par requête pour ce débit.'})
+        allowed, self._wait = bucket.consume(client_key(request), cost)
+        return allowed
+
+    def get_cost(self, request, view):
+        """Jetons pris par la requête : un par élément pour les créations groupées"""
+        if getattr(view, 'action', None) != 'bulk_create' or not isinstance(request.data, list):
+            return 1
+        # Un lot trop grand est refusé (400) sans rien créer : un seul jeton
+        if len(request.data) > getattr(view, 'bulk_max_items', len(request.data)):
+            return 1
+        return max(len(request.data), 1)
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class VoteRateThrottle(TokenBucketThrottle):
+    scope = 'vote'
+
+
+class CommentRateThrottle(TokenBucketThrottle):
+    scope = 'comment'